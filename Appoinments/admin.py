@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Center, Service, Booking
+from .models import Center, Service, Booking, BookingOutbox
 
 # Simple registration
 admin.site.register(Center)
 admin.site.register(Service)
-admin.site.register(Booking)
\ No newline at end of file
+admin.site.register(Booking)
+admin.site.register(BookingOutbox)
\ No newline at end of file
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AppoinmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Appoinments'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .middleware import install_query_hook
+
+        connection_created.connect(install_query_hook)
@@ -0,0 +1,49 @@
+# archive.py (Move past bookings from the hot Booking table to BookingArchive in small batches)
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, BookingArchive, BookingDayLock, BookingOutbox, DayAvailability
+from .signals import booking_signals_muted
+
+ARCHIVE_FIELDS = [field.attname for field in Booking._meta.concrete_fields]
+BATCH_SIZE = 1000
+
+
+def default_cutoff():
+    """Bookings dated before this are archived; BOOKING_ARCHIVE_AFTER_DAYS of history stay hot"""
+    return timezone.localdate() - timedelta(days=getattr(settings, 'BOOKING_ARCHIVE_AFTER_DAYS', 30))
+
+
+def archivable(cutoff):
+    # A booking still waiting in the outbox stays until the worker has sent it
+    return Booking.objects.filter(date__lt=cutoff).exclude(outbox__status='pending')
+
+
+def archive_batch(cutoff, batch_size=BATCH_SIZE):
+    """Copy then delete one batch in its own short transaction; returns the rows moved
+
+    Every batch commits on its own, so an interrupted run simply continues
+    with the next call. An id already present in BookingArchive raises
+    IntegrityError and rolls the batch back, so no booking is deleted uncopied.
+    """
+    with transaction.atomic(), booking_signals_muted():
+        rows = list(
+            archivable(cutoff).order_by('date', 'start_time', 'id').values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        BookingArchive.objects.bulk_create([BookingArchive(**row) for row in rows])
+        ids = [row['id'] for row in rows]
+        BookingOutbox.objects.filter(booking_id__in=ids).delete()
+        Booking.objects.filter(id__in=ids).delete()
+    return len(rows)
+
+
+def purge_day_state(cutoff):
+    """Drop the day locks and availability summaries of days before cutoff"""
+    locks, _ = BookingDayLock.objects.filter(date__lt=cutoff).delete()
+    summaries, _ = DayAvailability.objects.filter(date__lt=cutoff).delete()
+    return locks, summaries
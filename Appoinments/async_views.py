@@ -0,0 +1,125 @@
+# async_views.py (Async variants of the availability and send_booking endpoints, for ASGI)
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+
+from .availability_cache import aget_cached_slots
+from .models import Center, Service
+from .renderers import dumps
+from .utils import suggest_alternative_dates
+from . import live, outbox
+
+
+def _json(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+async def _get_or_404(model, **lookup):
+    obj = await model.objects.filter(**lookup).afirst()
+    if obj is None:
+        raise Http404(f"No {model._meta.object_name} matches the given query.")
+    return obj
+
+
+@require_GET
+async def availability(request, center_id, date, service_id):
+    """AvailabilityView without holding a worker thread while the DB and cache answer"""
+    center = await _get_or_404(Center, id=center_id)
+    service = await _get_or_404(Service, id=service_id)
+    try:
+        date_obj = timezone.datetime.strptime(date, '%Y-%m-%d').date()
+    except ValueError:
+        return _json({'date': ['Expected YYYY-MM-DD.']}, status=400)
+
+    slots = await aget_cached_slots(center, date_obj, service.duration_minutes)
+
+    if not slots:
+        alternatives = await sync_to_async(suggest_alternative_dates)(center, service)
+        return _json({
+            'available': False,
+            'message': 'No slots available on this date.',
+            'suggested_dates': alternatives
+        })
+
+    return _json({
+        'available': True,
+        'slots': slots[:10]  # Limit to first 10 best-fit
+    })
+
+
+@require_GET
+async def availability_stream(request, center_id, date):
+    """Server-sent events for one (center, date): a slot snapshot, then a diff per booking change
+
+    Serve under ASGI; each open stream only holds a queue, not a worker thread.
+    Streams close after AVAILABILITY_STREAM_MAX_SECONDS and EventSource
+    reconnects, receiving a fresh snapshot.
+    """
+    center = await _get_or_404(Center, id=center_id)
+    try:
+        date_obj = timezone.datetime.strptime(date, '%Y-%m-%d').date()
+    except ValueError:
+        return _json({'date': ['Expected YYYY-MM-DD.']}, status=400)
+
+    config = live.stream_settings()
+    broker = live.get_broker()
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        close_at = loop.time() + config['max_seconds']
+        yield 'retry: 3000\n\n'
+        async with broker.subscribe(live.channel_name(center.id, date_obj)) as subscription:
+            # Subscribed first, so a change landing meanwhile is not lost
+            snapshot = await sync_to_async(live.snapshot)(center.id, date_obj)
+            version = snapshot['version']
+            yield live.sse('snapshot', snapshot)
+            while (remaining := close_at - loop.time()) > 0:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), min(config['heartbeat'], remaining))
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if message is not live.RESYNC and (message['full'] or message['base'] == version):
+                    version = message['version']
+                    yield live.sse('change', message)
+                    continue
+                # Fell behind, or the diff is against a state this client never had
+                snapshot = await sync_to_async(live.snapshot)(center.id, date_obj)
+                version = snapshot['version']
+                yield live.sse('snapshot', snapshot)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx would otherwise buffer the stream
+    return response
+
+
+@csrf_exempt
+async def send_booking(request):
+    """send_booking with the deliveries awaited instead of blocking the worker"""
+    try:
+        await sync_to_async(outbox.enqueue_missing)()
+        results, _ = await outbox.adeliver_batch(batch_size=outbox.SEND_NOW_BATCH_SIZE)
+
+        if not results:
+            return _json({
+                "status": "empty",
+                "message": "No bookings waiting to be sent"
+            })
+
+        return _json({
+            "status": "completed",
+            "message": "Processed the bookings waiting to be sent",
+            "results": results
+        })
+
+    except Exception as e:
+        return _json({
+            "status": "error",
+            "message": "Internal server error",
+            "details": str(e)
+        }, status=500)
\ No newline at end of file
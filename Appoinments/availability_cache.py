@@ -0,0 +1,133 @@
+# availability_cache.py (Cached slot lists keyed by center, date and duration)
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .occupancy import DayOccupancy
+from .utils import get_possible_slots
+from . import routers
+
+GENERATION_KEY = 'availability:generation'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def _cache():
+    return caches[getattr(settings, 'AVAILABILITY_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 300)
+
+
+def _day_key(center_id, date):
+    return f'availability:day:{center_id}:{date}'
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _tokens(cache, keys):
+    """Current version tokens for keys, creating any that were never set or got evicted"""
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            cache.add(key, uuid.uuid4().hex, None)
+            tokens[key] = cache.get(key)
+    return [tokens[key] for key in keys]
+
+
+async def _atokens(cache, keys):
+    tokens = await cache.aget_many(keys)
+    for key in keys:
+        if key not in tokens:
+            await cache.aadd(key, uuid.uuid4().hex, None)
+            tokens[key] = await cache.aget(key)
+    return [tokens[key] for key in keys]
+
+
+def _bump(key):
+    # Fresh random tokens (rather than counters) keep evicted versions from ever
+    # matching entries written before an earlier invalidation
+    _cache().set(key, uuid.uuid4().hex, None)
+    _count('invalidations')
+
+
+def get_cached_slots(center, date, duration_minutes):
+    """get_possible_slots() served from the cache when the day has not changed"""
+    cache = _cache()
+    center_id = getattr(center, 'pk', center)
+    day_key = _day_key(center_id, date)
+    generation, day_version = _tokens(cache, [GENERATION_KEY, day_key])
+    key = f'availability:slots:{generation}:{day_version}:{day_key}:{duration_minutes}'
+
+    slots = cache.get(key)
+    if slots is not None:
+        _count('hits')
+        return slots
+
+    _count('misses')
+    with routers.on_primary():
+        slots = get_possible_slots(center, date, duration_minutes)
+    cache.set(key, slots, _timeout())
+    return slots
+
+
+async def aget_cached_slots(center, date, duration_minutes):
+    """get_cached_slots() for async views: async cache calls, async ORM on a miss"""
+    cache = _cache()
+    center_id = getattr(center, 'pk', center)
+    day_key = _day_key(center_id, date)
+    generation, day_version = await _atokens(cache, [GENERATION_KEY, day_key])
+    key = f'availability:slots:{generation}:{day_version}:{day_key}:{duration_minutes}'
+
+    slots = await cache.aget(key)
+    if slots is not None:
+        _count('hits')
+        return slots
+
+    _count('misses')
+    with routers.on_primary():
+        occupancy = await DayOccupancy.afor_day(center_id, date)
+    slots = get_possible_slots(center, date, duration_minutes, occupancy)
+    await cache.aset(key, slots, _timeout())
+    return slots
+
+
+def invalidate_day(center_id, date):
+    """Drop every cached slot list for one center/date"""
+    _bump(_day_key(center_id, date))
+
+
+def invalidate_day_on_commit(center_id, date):
+    """invalidate_day() now and again once the current transaction commits"""
+    # The second pass stops a reader that recomputed from the pre-commit
+    # state from leaving a stale entry behind
+    invalidate_day(center_id, date)
+    transaction.on_commit(lambda: invalidate_day(center_id, date))
+
+
+def invalidate_all():
+    """Drop every cached slot list (e.g. after a service duration change)"""
+    _bump(GENERATION_KEY)
+
+
+def stats():
+    """Hit/miss counters for this process"""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    lookups = snapshot['hits'] + snapshot['misses']
+    snapshot['hit_rate'] = snapshot['hits'] / lookups if lookups else 0.0
+    return snapshot
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,252 @@
+# benchmarks.py (Seed data and timed scenarios for the availability/booking hot paths)
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .models import Booking, BookingDayLock, BookingOutbox, Center, Service
+from .renderers import FastJSONRenderer
+from .serializers import BookingSerializer
+from .stub_service import StubBookingService
+from . import day_summary, outbox, projections, utils
+
+SERVICE_DURATIONS = [30, 45, 60, 120, 240]
+BENCH_DATABASE = 'bench.sqlite3'  # settings_bench's DATABASES['default']['NAME']
+
+
+def is_bench_database():
+    """Whether 'default' is the throwaway SQLite file from settings_bench"""
+    database = settings.DATABASES['default']
+    return database['ENGINE'].endswith('sqlite3') and Path(str(database['NAME'])).name == BENCH_DATABASE
+
+
+def seed(centers=20, services=5, months=3, bookings_per_day=8, pending_ratio=0.1, rng=None, force=False):
+    """Replace all app data with a synthetic schedule starting today; returns row counts
+
+    Deletes every center, service and booking, so it refuses to run against
+    anything but the bench database unless force=True.
+    """
+    if not (force or is_bench_database()):
+        raise RuntimeError(
+            f"Refusing to replace the data in {settings.DATABASES['default']['NAME']}; "
+            "use --settings=Book_Appoinment.settings_bench"
+        )
+    rng = rng or random.Random(42)
+    BookingOutbox.objects.all().delete()
+    BookingDayLock.objects.all().delete()
+    Booking.objects.all().delete()
+    Center.objects.all().delete()
+    Service.objects.all().delete()
+
+    center_objs = Center.objects.bulk_create([
+        Center(name=f'Center {i}', location=f'Area {i}') for i in range(centers)
+    ])
+    service_objs = Service.objects.bulk_create([
+        Service(
+            name=f'Service {i}',
+            category='service' if i % 2 == 0 else 'modification',
+            duration_minutes=SERVICE_DURATIONS[i % len(SERVICE_DURATIONS)],
+            price=50 + 10 * i
+        ) for i in range(services)
+    ])
+
+    workday_start, workday_end = utils.get_workday_start_end()
+    today = timezone.now().date()
+    days = months * 30
+    batch = []
+    total = 0
+    for center in center_objs:
+        for offset in range(days):
+            date = today + timedelta(days=offset)
+            cursor = datetime.combine(date, workday_start)
+            close = datetime.combine(date, workday_end)
+            for _ in range(bookings_per_day):
+                service = rng.choice(service_objs)
+                # Random gap, then the booking, then the cleanup buffer
+                cursor += timedelta(minutes=rng.choice([0, 15, 30, 45]))
+                end = cursor + timedelta(minutes=service.duration_minutes)
+                if end > close:
+                    break
+                batch.append(Booking(
+                    center=center, service=service, date=date,
+                    start_time=cursor.time(), end_time=end.time(),
+                    customer_name='Bench', customer_id=f'C{rng.randrange(100000)}',
+                    status='pending' if rng.random() < pending_ratio else 'booked'
+                ))
+                cursor = end + timedelta(minutes=utils.BUFFER_MINUTES)
+            if len(batch) >= 5000:
+                Booking.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+    Booking.objects.bulk_create(batch)
+    total += len(batch)
+    # bulk_create skips the signals that keep DayAvailability current
+    day_summary.rebuild(today, today + timedelta(days=days - 1))
+    return {'centers': centers, 'services': services, 'days': days, 'bookings': total}
+
+
+def summarize(latencies, query_counts):
+    """Latency percentiles in milliseconds plus query counts"""
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        'iterations': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': percentile(50),
+        'p90_ms': percentile(90),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': ordered[-1] * 1000,
+        'queries_mean': statistics.fmean(query_counts),
+        'queries_max': max(query_counts),
+    }
+
+
+def measure(call, iterations, before=None):
+    """Run call() `iterations` times, timing each run and counting its queries"""
+    latencies, query_counts = [], []
+    for i in range(iterations):
+        if before:
+            before(i)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            call(i)
+            latencies.append(time.perf_counter() - started)
+        query_counts.append(len(queries))
+    return summarize(latencies, query_counts)
+
+
+def requeue_outbox():
+    """Make every outbox row due again, as if nothing had been sent"""
+    outbox.enqueue_missing()
+    BookingOutbox.objects.update(status='pending', next_attempt_at=timezone.now(), locked_until=None)
+
+
+def run_scenarios(iterations=200, send_iterations=3, stub_delay=0.0, rng=None):
+    """Time every hot path against the seeded data; returns {scenario: summary}"""
+    rng = rng or random.Random(7)
+    client = Client()
+    cache = caches['default']
+    centers = list(Center.objects.all())
+    services = list(Service.objects.all())
+    today = timezone.now().date()
+
+    def availability_args(i):
+        center = rng.choice(centers)
+        service = rng.choice(services)
+        date = today + timedelta(days=rng.randrange(1, 60))
+        return f'/api/availability/{center.id}/{date}/{service.id}/'
+
+    urls = [availability_args(i) for i in range(iterations)]
+    results = {}
+
+    results['availability_cold'] = measure(
+        lambda i: client.get(urls[i]), iterations, before=lambda i: cache.clear()
+    )
+    results['availability_warm'] = measure(lambda i: client.get(urls[i % 10]), iterations)
+    results['suggest_alternative_dates'] = measure(
+        lambda i: utils.suggest_alternative_dates(rng.choice(centers), rng.choice(services)),
+        iterations
+    )
+
+    results['earliest_slots'] = measure(
+        lambda i: client.get(f'/api/availability/earliest/{rng.choice(services).id}/', {'k': 10, 'days': 30}),
+        iterations
+    )
+
+    # Fresh days far beyond the seeded horizon, so every POST is accepted
+    post_service = min(services, key=lambda service: service.duration_minutes)
+
+    def post_booking(i):
+        start = datetime.combine(today + timedelta(days=400 + i // 8), utils.get_workday_start_end()[0])
+        start += timedelta(minutes=(i % 8) * (post_service.duration_minutes + utils.BUFFER_MINUTES))
+        end = start + timedelta(minutes=post_service.duration_minutes)
+        response = client.post('/api/bookings/', {
+            'center_id': centers[i % len(centers)].id,
+            'service_id': post_service.id,
+            'date': start.date().isoformat(),
+            'start_time': start.time().isoformat(),
+            'end_time': end.time().isoformat(),
+            'customer_name': 'Bench',
+        })
+        if response.status_code not in (201, 400):
+            raise RuntimeError(f'Unexpected booking response {response.status_code}')
+
+    results['booking_post'] = measure(post_booking, iterations)
+    results['center_list'] = measure(lambda i: client.get('/api/centers/'), iterations)
+    results['service_list'] = measure(lambda i: client.get('/api/services/'), iterations)
+
+    with StubBookingService(delay=stub_delay) as stub:
+        with override_settings(BOOKING_SERVICE_URL=stub.url):
+            # Each booking goes out once, so put the outbox back before every run
+            results['send_booking'] = measure(
+                lambda i: client.post('/api/sendbooking/'), send_iterations, before=lambda i: requeue_outbox()
+            )
+    results['send_booking']['pending_bookings'] = Booking.objects.filter(status='pending').count()
+    return results
+
+
+def render_scenarios(sizes=(10, 100, 1000), repeat=20):
+    """Per-response CPU ms of the default vs the fast rendering path, by item count
+
+    Uses whatever bookings exist (seed first). Rows are fetched once per size,
+    so only serialization and JSON encoding are timed.
+    """
+    default_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    opening = datetime.combine(timezone.now().date(), utils.get_workday_start_end()[0])
+    results = {}
+
+    def cpu_ms(call):
+        started = time.process_time()
+        for _ in range(repeat):
+            call()
+        return (time.process_time() - started) / repeat * 1000
+
+    for size in sizes:
+        bookings = list(Booking.objects.select_related('center', 'service').order_by('id')[:size])
+        rows = list(projections.booking_rows(Booking.objects.order_by('id'))[:size])
+        slots = [{
+            'start_time': (opening + timedelta(seconds=i)).time(),
+            'end_time': (opening + timedelta(seconds=i, minutes=60)).time(),
+            'gap_remaining_after': 120.0
+        } for i in range(size)]
+        results[f'bookings_{size}'] = {
+            'items': len(bookings),
+            'default_ms': cpu_ms(lambda: default_renderer.render(BookingSerializer(bookings, many=True).data)),
+            'fast_ms': cpu_ms(lambda: fast_renderer.render([projections.booking_dict(row) for row in rows])),
+        }
+        results[f'slots_{size}'] = {
+            'items': size,
+            'default_ms': cpu_ms(lambda: default_renderer.render({'slots': slots})),
+            'fast_ms': cpu_ms(lambda: fast_renderer.render({'slots': slots})),
+        }
+    for summary in results.values():
+        summary['speedup'] = summary['default_ms'] / summary['fast_ms'] if summary['fast_ms'] else None
+    return results
+
+
+def compare(current, baseline, threshold=0.2):
+    """Rows of (scenario, metric, baseline, current, change) with regressions flagged"""
+    rows = []
+    for name, summary in current.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'queries_mean'):
+            if metric not in previous or not previous[metric]:
+                continue
+            change = (summary[metric] - previous[metric]) / previous[metric]
+            rows.append((name, metric, previous[metric], summary[metric], change, change > threshold))
+    return rows
@@ -0,0 +1,207 @@
+# booking_engine.py (Serialized booking writes, one writer per center/day)
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from rest_framework import serializers
+
+from .models import Booking, BookingDayLock
+from .occupancy import DayOccupancy
+from . import availability_cache, live, outbox, utils
+
+# Bookings a new one must keep clear of (overlap and buffers); exact repeats
+# of any status are refused by unique_together
+CHECKED_STATUSES = ('pending',)
+
+
+def ensure_lock_rows(days):
+    """Create any missing (center, date) lock rows, before the booking transaction opens
+
+    A first writer that finds no row would otherwise insert it while holding the
+    gap lock its 0-row UPDATE took under MySQL's REPEATABLE READ; two such
+    writers block each other's INSERT and one dies with a deadlock. Run in
+    autocommit, this single INSERT ... IGNORE releases its locks at once, so
+    lock_day() below always finds its row.
+    """
+    BookingDayLock.objects.bulk_create(
+        [BookingDayLock(center_id=center_id, date=date) for center_id, date in days],
+        ignore_conflicts=True
+    )
+
+
+def lock_day(center_id, date):
+    """Hold the (center, date) writer lock until the surrounding transaction ends"""
+    # The UPDATE is deliberately the first statement: it takes the row lock
+    # (or SQLite's write lock) before anything is read, so writers for the same
+    # day queue up here while other centers and days are left alone
+    locked = BookingDayLock.objects.filter(center_id=center_id, date=date).update(
+        version=F('version') + 1
+    )
+    if locked:
+        return
+    # Only callers that skipped ensure_lock_rows() (signals for admin/shell
+    # writes) get here
+    try:
+        with transaction.atomic():
+            BookingDayLock.objects.create(center_id=center_id, date=date, version=1)
+    except IntegrityError:
+        # Another writer created the row first; wait for its lock instead
+        BookingDayLock.objects.filter(center_id=center_id, date=date).update(
+            version=F('version') + 1
+        )
+
+
+def check_slot(occupancy, start_time, end_time):
+    """Raise ValidationError if the slot clashes with the day's bookings"""
+    if not occupancy.is_free(start_time, end_time):
+        raise serializers.ValidationError("Slot overlaps with existing booking.")
+    if not occupancy.is_free(start_time, start_time, buffer_before=utils.BUFFER_MINUTES):
+        raise serializers.ValidationError("Too close to previous booking.")
+    if not occupancy.is_free(end_time, end_time, buffer_after=utils.BUFFER_MINUTES):
+        raise serializers.ValidationError("Too close to next booking.")
+
+
+def create_booking(center, service, date, start_time, end_time, **fields):
+    """Check the slot and insert the booking while holding the day lock
+
+    center and service must be model instances (as resolved by
+    BookingSerializer.validate). A booking costs five statements: the lock row
+    INSERT ... IGNORE, then in the transaction the lock UPDATE, the day's
+    bookings and the booking and outbox INSERTs.
+    """
+    booking = Booking(
+        center=center,
+        service=service,
+        date=date,
+        start_time=start_time,
+        end_time=end_time,
+        **fields
+    )
+    # Field, duration and choice checks run in memory; the FK and
+    # unique_together lookups full_clean() would add are covered by the
+    # instances we already hold and the bitmap check below
+    try:
+        booking.full_clean(exclude=['center', 'service'], validate_unique=False)
+    except DjangoValidationError as exc:
+        raise serializers.ValidationError(exc.messages)
+
+    ensure_lock_rows([(center.id, date)])
+    with transaction.atomic():
+        lock_day(center.id, date)
+        occupancy = DayOccupancy.for_day(center, date, statuses=CHECKED_STATUSES)
+        check_slot(occupancy, start_time, end_time)
+        booking._day_locked = True  # lock_day() bumped the version the summary is checked against
+        try:
+            booking.save(force_insert=True, clean=False)
+        except IntegrityError:
+            # unique_together caught an exact match (e.g. with a 'booked' row);
+            # leaving the atomic block rolls the transaction back
+            raise serializers.ValidationError("Slot overlaps with existing booking.")
+        booking._day_locked = False  # Later saves of this instance are not under the lock
+        # Queued in the same transaction, so an export exists iff the booking does
+        if booking.status == 'pending':
+            outbox.enqueue(booking)
+    return booking
+
+
+def _load_days(days):
+    """Occupancy bitmaps of CHECKED_STATUSES bookings plus every exact (start, end) taken, per day"""
+    occupancy = {day: DayOccupancy(day[1]) for day in days}
+    taken = {day: set() for day in days}
+    rows = Booking.objects.filter(
+        center_id__in={center_id for center_id, _ in days},
+        date__in={date for _, date in days}
+    ).values_list('center_id', 'date', 'start_time', 'end_time', 'status')
+    for center_id, date, start_time, end_time, status in rows:
+        day = (center_id, date)
+        if day not in occupancy:
+            continue  # other centers' days picked up by the IN () superset
+        taken[day].add((start_time, end_time))
+        if status in CHECKED_STATUSES:
+            occupancy[day].add(start_time, end_time)
+    return occupancy, taken
+
+
+def _assign_ids(bookings):
+    """Fill in primary keys on backends where bulk_create does not return them (MySQL)"""
+    ids = {
+        (center_id, date, start_time, end_time): pk
+        for pk, center_id, date, start_time, end_time in Booking.objects.filter(
+            center_id__in={booking.center_id for booking in bookings},
+            date__in={booking.date for booking in bookings}
+        ).values_list('id', 'center_id', 'date', 'start_time', 'end_time')
+    }
+    for booking in bookings:
+        booking.pk = ids[(booking.center_id, booking.date, booking.start_time, booking.end_time)]
+
+
+def create_bookings(items):
+    """Insert many bookings at once; returns one Booking or error list per item
+
+    Items are BookingSerializer validated_data dicts. They are grouped by
+    (center, date); every day is locked in a fixed order, all days' existing
+    bookings come from one query, and each day's items are swept in start
+    order against the bitmap, which also absorbs the items accepted before
+    them. Survivors go in with bulk_create in the same transaction.
+    """
+    outcomes = [None] * len(items)
+    by_day = defaultdict(list)
+    for index, data in enumerate(items):
+        booking = Booking(
+            center=data['center'],
+            service=data['service'],
+            date=data['date'],
+            start_time=data['start_time'],
+            end_time=data['end_time'],
+            customer_name=data['customer_name'],
+            customer_id=data.get('customer_id'),
+            vehicle_name=data.get('vehicle_name'),
+            status=data.get('status', 'pending')
+        )
+        try:
+            booking.full_clean(exclude=['center', 'service'], validate_unique=False)
+        except DjangoValidationError as exc:
+            outcomes[index] = exc.messages
+            continue
+        by_day[(booking.center_id, booking.date)].append((index, booking))
+
+    if not by_day:
+        return outcomes
+
+    accepted = []
+    ensure_lock_rows(sorted(by_day))
+    with transaction.atomic():
+        # A fixed lock order keeps two overlapping batches from deadlocking
+        for center_id, date in sorted(by_day):
+            lock_day(center_id, date)
+        occupancy, taken = _load_days(list(by_day))
+
+        for day, entries in by_day.items():
+            for index, booking in sorted(entries, key=lambda entry: (entry[1].start_time, entry[0])):
+                try:
+                    if (booking.start_time, booking.end_time) in taken[day]:
+                        raise serializers.ValidationError("Slot overlaps with existing booking.")
+                    check_slot(occupancy[day], booking.start_time, booking.end_time)
+                except serializers.ValidationError as exc:
+                    outcomes[index] = [str(message) for message in exc.detail]
+                    continue
+                occupancy[day].add(booking.start_time, booking.end_time)
+                taken[day].add((booking.start_time, booking.end_time))
+                accepted.append((index, booking))
+
+        bookings = [booking for _, booking in accepted]
+        Booking.objects.bulk_create(bookings)
+        if bookings and not connection.features.can_return_rows_from_bulk_insert:
+            _assign_ids(bookings)
+        outbox.enqueue_many([booking for booking in bookings if booking.status == 'pending'])
+
+    # bulk_create sends no post_save, so invalidate cached slots and tell the
+    # streams here; the summaries are outdated by the lock versions bumped above
+    written_days = {(booking.center_id, booking.date) for booking in bookings}
+    for center_id, date in written_days:
+        availability_cache.invalidate_day_on_commit(center_id, date)
+    live.publish_bulk_on_commit(bookings)
+    for index, booking in accepted:
+        outcomes[index] = booking
+    return outcomes
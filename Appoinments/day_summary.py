@@ -0,0 +1,117 @@
+# day_summary.py (Materialized per-day availability summary: DayAvailability rows)
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import BookingDayLock, Center, DayAvailability, Service
+from .occupancy import DayOccupancy, minute_of_day
+from . import routers, utils
+
+UPDATE_FIELDS = ['free_minutes', 'num_slots', 'earliest_start', 'version', 'updated_at']
+
+
+def duration_classes():
+    """Distinct service durations; one summary row per class and day"""
+    return sorted(set(Service.objects.values_list('duration_minutes', flat=True)))
+
+
+def lock_versions(center_id, start_date, end_date):
+    """{date: BookingDayLock.version} for a center's days; days never locked are absent (version 0)"""
+    return dict(BookingDayLock.objects.filter(
+        center_id=center_id, date__range=(start_date, end_date)
+    ).values_list('date', 'version'))
+
+
+def summarize(center_id, date, occupancy, durations, version=0):
+    """Unsaved DayAvailability rows for one day's occupancy bitmap, read at lock `version`"""
+    workday_start, workday_end = utils.get_workday_start_end()
+    free_minutes = occupancy.free_minutes(minute_of_day(workday_start), minute_of_day(workday_end))
+    rows = []
+    for duration in durations:
+        slots = utils.get_possible_slots(center_id, date, duration, occupancy)
+        rows.append(DayAvailability(
+            center_id=center_id,
+            date=date,
+            duration_minutes=duration,
+            free_minutes=free_minutes,
+            num_slots=len(slots),
+            earliest_start=slots[0]['start_time'] if slots else None,
+            version=version
+        ))
+    return rows
+
+
+def upsert(rows, batch_size=1000):
+    """Insert or overwrite summary rows in bulk"""
+    if not rows:
+        return
+    options = {'update_conflicts': True, 'update_fields': UPDATE_FIELDS}
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['center', 'duration_minutes', 'date']
+    DayAvailability.objects.bulk_create(rows, batch_size=batch_size, **options)
+
+
+def refresh_day(center_id, date, durations=None):
+    """Recompute one (center, date) for every duration class"""
+    durations = duration_classes() if durations is None else durations
+    if durations:
+        # The version is read before the bookings, so the rows are at least that current
+        version = lock_versions(center_id, date, date).get(date, 0)
+        upsert(summarize(center_id, date, DayOccupancy.for_day(center_id, date), durations, version))
+
+
+def rebuild(start_date, end_date, centers=None, durations=None):
+    """Recompute every summary row in [start_date, end_date]; returns the rows written"""
+    centers = Center.objects.all() if centers is None else centers
+    durations = duration_classes() if durations is None else durations
+    written = 0
+    for center in centers:
+        rows = []
+        versions = lock_versions(center.id, start_date, end_date)
+        for day, occupancy in DayOccupancy.for_range(center, start_date, end_date).items():
+            rows.extend(summarize(center.id, day, occupancy, durations, versions.get(day, 0)))
+        upsert(rows)
+        written += len(rows)
+    return written
+
+
+def get_summaries(center, duration_minutes, start_date, end_date):
+    """DayAvailability for each day in [start_date, end_date], recomputing missing and outdated days
+
+    Booking writes only bump the day's BookingDayLock.version (under the day
+    lock they already hold), so a stored row is used while its version still
+    matches. Recomputed rows carry the version read before their bookings; an
+    upsert that lands late is simply outdated again on the next read.
+    """
+    center_id = getattr(center, 'id', center)
+    lock_version = BookingDayLock.objects.filter(
+        center_id=OuterRef('center_id'), date=OuterRef('date')
+    ).values('version')
+    found = {
+        row.date: row
+        for row in DayAvailability.objects.filter(
+            center_id=center_id, duration_minutes=duration_minutes,
+            date__gte=start_date, date__lte=end_date
+        ).annotate(lock_version=Coalesce(Subquery(lock_version), Value(0)))
+        if row.version == row.lock_version
+    }
+    missing = [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+        if start_date + timedelta(days=offset) not in found
+    ]
+    if missing:
+        # One range query covers every gap; rows for the other classes fill on their own reads.
+        # The rows are stored, so they are computed from the primary
+        with routers.on_primary():
+            versions = lock_versions(center_id, missing[0], missing[-1])
+            occupancy_by_day = DayOccupancy.for_range(center_id, missing[0], missing[-1])
+        rows = []
+        for day in missing:
+            rows.extend(summarize(center_id, day, occupancy_by_day[day], [duration_minutes], versions.get(day, 0)))
+        upsert(rows)
+        found.update((row.date, row) for row in rows)
+    return [found[day] for day in sorted(found)]
@@ -0,0 +1,185 @@
+# dispatch.py (Concurrent delivery of booking payloads to the booking microservice)
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from asgiref.sync import sync_to_async
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from .metrics import registry
+
+try:
+    import httpx
+except ImportError:  # Optional; adispatch() falls back to dispatch() in a worker thread
+    httpx = None
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> {concurrency: httpx.AsyncClient}
+
+
+def dispatch_settings():
+    """Endpoint, concurrency limit, per-request timeout and batch deadline"""
+    return {
+        'url': getattr(settings, 'BOOKING_SERVICE_URL', 'https://httpbin.org/post'),
+        'concurrency': getattr(settings, 'BOOKING_DISPATCH_CONCURRENCY', 16),
+        'timeout': getattr(settings, 'BOOKING_DISPATCH_TIMEOUT', 10),
+        'deadline': getattr(settings, 'BOOKING_DISPATCH_DEADLINE', 120),
+    }
+
+
+def get_session(concurrency):
+    """Shared keep-alive session whose connection pool matches the concurrency limit"""
+    with _sessions_lock:
+        session = _sessions.get(concurrency)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency, pool_block=True)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[concurrency] = session
+        return session
+
+
+def post_payload(session, url, booking_id, payload, timeout):
+    """POST one payload and describe the outcome the way send_booking reports it"""
+    started = time.perf_counter()
+    result = _post(session, url, booking_id, payload, timeout)
+    outcome = 'ok' if result['status'] != 'error' else str(result.get('error_code', 'exception'))
+    registry.observe_downstream(urlsplit(url).netloc, outcome, time.perf_counter() - started)
+    return result
+
+
+def _post(session, url, booking_id, payload, timeout):
+    try:
+        response = session.post(url, json=payload, timeout=timeout)
+        if response.status_code in [200, 201]:
+            return {
+                "booking_id": booking_id,
+                "status": "pending",
+                "response": response.json()
+            }
+        return {
+            "booking_id": booking_id,
+            "status": "error",
+            "error_code": response.status_code,
+            "details": response.text
+        }
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return {
+            "booking_id": booking_id,
+            "status": "error",
+            "message": str(e)
+        }
+
+
+def dispatch(items, url=None, concurrency=None, timeout=None, deadline=None):
+    """Deliver (booking_id, payload) pairs concurrently; results keep input order
+
+    At most `concurrency` requests are in flight, each is bounded by `timeout`
+    seconds and nothing new is started once `deadline` seconds have passed.
+    """
+    config = dispatch_settings()
+    url = url or config['url']
+    concurrency = concurrency or config['concurrency']
+    timeout = timeout or config['timeout']
+    deadline = deadline or config['deadline']
+
+    session = get_session(concurrency)
+    give_up_at = time.monotonic() + deadline
+
+    def deliver(item):
+        booking_id, payload = item
+        remaining = give_up_at - time.monotonic()
+        if remaining <= 0:
+            return {
+                "booking_id": booking_id,
+                "status": "error",
+                "message": "Dispatch deadline exceeded"
+            }
+        return post_payload(session, url, booking_id, payload, min(timeout, remaining))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(deliver, items))
+
+
+def get_async_client(concurrency):
+    """Keep-alive httpx client for the running event loop, pooled to the concurrency limit"""
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(concurrency)
+    if client is None:
+        client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        ))
+        clients[concurrency] = client
+    return client
+
+
+async def apost_payload(client, url, booking_id, payload, timeout):
+    """post_payload() over an httpx.AsyncClient"""
+    started = time.perf_counter()
+    try:
+        response = await client.post(url, json=payload, timeout=timeout)
+        if response.status_code in [200, 201]:
+            result = {
+                "booking_id": booking_id,
+                "status": "pending",
+                "response": response.json()
+            }
+        else:
+            result = {
+                "booking_id": booking_id,
+                "status": "error",
+                "error_code": response.status_code,
+                "details": response.text
+            }
+    except (httpx.HTTPError, ValueError) as e:
+        result = {
+            "booking_id": booking_id,
+            "status": "error",
+            "message": str(e)
+        }
+    outcome = 'ok' if result['status'] != 'error' else str(result.get('error_code', 'exception'))
+    registry.observe_downstream(urlsplit(url).netloc, outcome, time.perf_counter() - started)
+    return result
+
+
+async def adispatch(items, url=None, concurrency=None, timeout=None, deadline=None):
+    """dispatch() for async views; same limits and result shape
+
+    With httpx installed the requests run on the event loop. Without it the
+    pooled requests-based dispatch() runs in a worker thread, which still
+    frees the event loop for other requests while the batch is in flight.
+    """
+    if httpx is None:
+        return await sync_to_async(dispatch, thread_sensitive=False)(items, url, concurrency, timeout, deadline)
+
+    config = dispatch_settings()
+    url = url or config['url']
+    concurrency = concurrency or config['concurrency']
+    timeout = timeout or config['timeout']
+    deadline = deadline or config['deadline']
+
+    client = get_async_client(concurrency)
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + deadline
+    slots = asyncio.Semaphore(concurrency)
+
+    async def deliver(item):
+        booking_id, payload = item
+        async with slots:
+            remaining = give_up_at - loop.time()
+            if remaining <= 0:
+                return {
+                    "booking_id": booking_id,
+                    "status": "error",
+                    "message": "Dispatch deadline exceeded"
+                }
+            return await apost_payload(client, url, booking_id, payload, min(timeout, remaining))
+
+    return list(await asyncio.gather(*(deliver(item) for item in items)))
@@ -0,0 +1,89 @@
+# export.py (Flat-memory NDJSON/CSV export of bookings)
+import csv
+import heapq
+
+from .models import Booking, BookingArchive
+from .renderers import dumps
+
+# values_list() projection: center/service names come from the join, not per-row queries
+EXPORT_FIELDS = [
+    'id', 'center_id', 'center__name', 'service_id', 'service__name', 'date',
+    'start_time', 'end_time', 'customer_name', 'customer_id', 'vehicle_name',
+    'status', 'created_at',
+]
+EXPORT_COLUMNS = [
+    'id', 'center_id', 'center', 'service_id', 'service', 'date',
+    'start_time', 'end_time', 'customer_name', 'customer_id', 'vehicle_name',
+    'status', 'created_at',
+]
+FORMATS = ('ndjson', 'csv')
+CHUNK_SIZE = 2000
+
+
+def filter_bookings(queryset=None, status=None, center_id=None, date_from=None, date_to=None, customer_id=None):
+    queryset = Booking.objects.all() if queryset is None else queryset
+    if status:
+        queryset = queryset.filter(status=status)
+    if center_id:
+        queryset = queryset.filter(center_id=center_id)
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    if customer_id:
+        queryset = queryset.filter(customer_id=customer_id)
+    return queryset
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Yield export rows as tuples, one primary-key range at a time
+
+    Keyset chunks (id > last id) keep memory flat on every backend; MySQL's
+    client buffers a whole result set even under .iterator(chunk_size=...).
+    """
+    queryset = queryset.order_by('id').values_list(*EXPORT_FIELDS)
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+def iter_all_rows(include_archived=True, chunk_size=CHUNK_SIZE, **filters):
+    """iter_rows() over the hot table and BookingArchive, merged into one id order"""
+    hot = iter_rows(filter_bookings(**filters), chunk_size)
+    if not include_archived:
+        return hot
+    archived = iter_rows(filter_bookings(BookingArchive.objects.all(), **filters), chunk_size)
+    return heapq.merge(archived, hot, key=lambda row: row[0])
+
+
+def _text(value):
+    if value is None or isinstance(value, (int, str)):
+        return value
+    return value.isoformat()
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield dumps(dict(zip(EXPORT_COLUMNS, map(_text, row)))).decode() + '\n'
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(['' if value is None else _text(value) for value in row])
+
+
+def render_lines(rows, export_format):
+    return csv_lines(rows) if export_format == 'csv' else ndjson_lines(rows)
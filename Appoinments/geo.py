@@ -0,0 +1,160 @@
+# geo.py (In-process grid index over center coordinates; no GIS extension needed)
+import heapq
+import math
+import threading
+import uuid
+from collections import defaultdict
+from itertools import islice, takewhile
+
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Center
+from .slot_search import DayWindows
+from . import routers, utils
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+CELL_DEGREES = 0.25  # ~28km of latitude per grid cell
+VERSION_KEY = 'geo:centers:version'
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Points bucketed into CELL_DEGREES squares, searched ring by ring outwards"""
+
+    def __init__(self, points, cell_degrees=CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells = defaultdict(list)
+        for point_id, lat, lon in points:
+            self.cells[self._cell(lat, lon)].append((point_id, lat, lon))
+        self.size = sum(len(bucket) for bucket in self.cells.values())
+        rows = [row for row, _ in self.cells] or [0]
+        cols = [col for _, col in self.cells] or [0]
+        self.extent = (min(rows), max(rows), min(cols), max(cols))
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def _ring(self, row, col, radius):
+        if radius == 0:
+            yield row, col
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield row - radius, c
+            yield row + radius, c
+        for r in range(row - radius + 1, row + radius):
+            yield r, col - radius
+            yield r, col + radius
+
+    def _outside_bound_km(self, lat, radius):
+        """Lower bound on the distance to any point beyond rings 0..radius"""
+        # Longitude degrees shrink towards the poles; use the widest latitude the next ring reaches
+        edge = min(90.0, abs(lat) + (radius + 1) * self.cell_degrees)
+        return radius * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(edge))
+
+    def iter_nearest(self, lat, lon):
+        """(distance_km, point_id) for every point, nearest first, expanding lazily
+
+        Once more cells have been visited than there are points (a sparse
+        index, or a query far from it, e.g. near a pole where the ring bound
+        stays near zero), the remaining points are checked directly instead.
+        Cells do not wrap at the antimeridian, which is fine for the regions
+        we serve.
+        """
+        if not self.size:
+            return
+        row, col = self._cell(lat, lon)
+        min_row, max_row, min_col, max_col = self.extent
+        last_radius = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        heap = []
+        visited = 0
+        for radius in range(last_radius + 1):
+            if visited > self.size:
+                for (cell_row, cell_col), bucket in self.cells.items():
+                    if max(abs(cell_row - row), abs(cell_col - col)) >= radius:
+                        for point_id, point_lat, point_lon in bucket:
+                            heapq.heappush(heap, (haversine_km(lat, lon, point_lat, point_lon), point_id))
+                break
+            for cell in self._ring(row, col, radius):
+                visited += 1
+                for point_id, point_lat, point_lon in self.cells.get(cell, ()):
+                    heapq.heappush(heap, (haversine_km(lat, lon, point_lat, point_lon), point_id))
+            bound = self._outside_bound_km(lat, radius)
+            while heap and heap[0][0] <= bound:
+                yield heapq.heappop(heap)
+        while heap:
+            yield heapq.heappop(heap)
+
+
+def nearest(lat, lon, m, max_km=None, duration_minutes=None, date=None):
+    """Up to m (distance_km, center_id, slots) nearest first; slots is None when unfiltered
+
+    With duration_minutes and date, centers without a free slot that day are
+    skipped. Candidates are checked in distance-ordered batches, one booking
+    query per batch, so a dense area rarely reads more than the first batch.
+    """
+    candidates = get_index().iter_nearest(lat, lon)
+    if max_km is not None:
+        # Nearest first, so the first one too far ends the search
+        candidates = takewhile(lambda candidate: candidate[0] <= max_km, candidates)
+    if duration_minutes is None:
+        return [(distance, center_id, None) for distance, center_id in islice(candidates, m)]
+
+    found = []
+    batch_size = max(2 * m, 8)
+    while len(found) < m:
+        batch = list(islice(candidates, batch_size))
+        if not batch:
+            break
+        windows = DayWindows([center_id for _, center_id in batch], date, window_days=1)
+        for distance, center_id in batch:
+            slots = utils.get_possible_slots(center_id, date, duration_minutes, windows.get(center_id, date))
+            if slots:
+                found.append((distance, center_id, slots))
+                if len(found) == m:
+                    break
+    return found
+
+
+def _cache():
+    return caches['default']
+
+
+def get_index():
+    """The process-wide index, rebuilt when another process or a signal bumped the version"""
+    global _index, _index_version
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    with _lock:
+        if _index is None or version != _index_version:
+            with routers.on_primary():
+                points = list(Center.objects.filter(
+                    latitude__isnull=False, longitude__isnull=False
+                ).values_list('id', 'latitude', 'longitude'))
+            _index = GridIndex(points)
+            _index_version = version
+        return _index
+
+
+def invalidate():
+    _cache().set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_on_commit():
+    invalidate()
+    transaction.on_commit(invalidate)
@@ -0,0 +1,114 @@
+# idempotency.py (Idempotency-Key handling for booking creation)
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.05
+
+
+def idempotency_settings():
+    return {
+        'alias': getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', 'default'),
+        'ttl': getattr(settings, 'IDEMPOTENCY_TTL', 24 * 3600),
+        'lock_seconds': getattr(settings, 'IDEMPOTENCY_LOCK_SECONDS', 30),
+        'wait_seconds': getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 5),
+    }
+
+
+def client_identity(request):
+    """Who sent the request: the authenticated user, else the client address
+
+    Not the body's customer_id: an anonymous client can put anything there.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'addr:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def _keys(request, key):
+    """Cache keys for a key as sent by this client, so clients choosing the same key stay apart"""
+    digest = hashlib.sha256(f'{request.path}\n{client_identity(request)}\n{key}'.encode()).hexdigest()
+    return f'idempotency:response:{digest}', f'idempotency:lock:{digest}'
+
+
+def fingerprint(data):
+    """Hash of the parsed body, so key order and whitespace do not matter"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _error(message, code, **headers):
+    return Response({'detail': message}, status=code, headers=headers or None)
+
+
+def _replay(stored, body_hash):
+    if stored['fingerprint'] != body_hash:
+        return _error('Idempotency-Key was already used with a different request body.',
+                      status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(stored['data'], status=stored['status'], headers={REPLAYED_HEADER: 'true'})
+
+
+def run(request, create):
+    """Call create() once per Idempotency-Key; retries get the stored 201 response back
+
+    Requests without the header go straight to create(). Only 201 responses are
+    stored: a rejected request changed nothing, so retrying it re-runs the
+    checks against the current schedule. A duplicate that arrives while the
+    first request is still running waits up to IDEMPOTENCY_WAIT_SECONDS instead
+    of running in parallel: it replays the first request's 201, or runs itself
+    once the first ended without one, or gives up with a 409.
+    """
+    key = request.META.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return create()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return _error(f'Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters.', status.HTTP_400_BAD_REQUEST)
+
+    config = idempotency_settings()
+    cache = caches[config['alias']]
+    response_key, lock_key = _keys(request, key)
+    body_hash = fingerprint(request.data)
+
+    stored = cache.get(response_key)
+    if stored is not None:
+        return _replay(stored, body_hash)
+
+    token = uuid.uuid4().hex
+    give_up_at = time.monotonic() + config['wait_seconds']
+    while not cache.add(lock_key, token, config['lock_seconds']):
+        # Another request holds the key: wait for its 201, or for it to end
+        # without one (rejected, failed) and take the key over
+        if time.monotonic() >= give_up_at:
+            return _error('A request with this Idempotency-Key is still in progress.',
+                          status.HTTP_409_CONFLICT, **{'Retry-After': '1'})
+        time.sleep(POLL_SECONDS)
+        stored = cache.get(response_key)
+        if stored is not None:
+            return _replay(stored, body_hash)
+
+    try:
+        # The holder may have stored its 201 and let go just before we claimed
+        stored = cache.get(response_key)
+        if stored is not None:
+            return _replay(stored, body_hash)
+        response = create()
+        if response.status_code == status.HTTP_201_CREATED:
+            cache.set(response_key, {
+                'fingerprint': body_hash,
+                'status': response.status_code,
+                'data': dict(response.data),
+            }, config['ttl'])
+        return response
+    finally:
+        # Past IDEMPOTENCY_LOCK_SECONDS the claim may belong to a later request
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
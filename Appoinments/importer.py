@@ -0,0 +1,322 @@
+# importer.py (Streaming NDJSON/CSV import of centers, services and bookings)
+import csv
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_time
+from rest_framework import serializers
+
+from .models import Booking, BookingArchive, Center, DayAvailability, Service
+from .occupancy import DayOccupancy
+from . import availability_cache, booking_engine, geo, live, reference_cache
+
+try:
+    from orjson import loads
+except ImportError:  # Optional, as in renderers.py
+    from json import loads
+
+FORMATS = ('ndjson', 'csv')
+KINDS = ('centers', 'services', 'bookings')
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+STATUSES = {value for value, _ in Booking.STATUS_CHOICES}
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_records(handle, file_format):
+    """(line number, dict) per record, one line in memory at a time"""
+    if file_format == 'csv':
+        reader = csv.DictReader(handle)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(handle, 1):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, record
+
+
+def _value(record, field, required=False):
+    value = record.get(field)
+    if value is None or value == '':
+        if required:
+            raise RowError(f"{field} is required.")
+        return None
+    return value
+
+
+def _text(record, model, field, required=False):
+    value = _value(record, field, required)
+    if value is None:
+        return None
+    value = str(value)
+    max_length = model._meta.get_field(field).max_length
+    if max_length and len(value) > max_length:
+        raise RowError(f"{field} is longer than {max_length} characters.")
+    return value
+
+
+def _parse(record, field, parse, required=False):
+    value = _value(record, field, required)
+    if value is None:
+        return None
+    try:
+        return parse(value)
+    except (TypeError, ValueError, ArithmeticError):
+        raise RowError(f"{field} has an invalid value: {value!r}.")
+
+
+def _strict(parse):
+    """dateparse helpers return None for malformed input; the builders want an error"""
+    def parse_or_raise(value):
+        parsed = parse(str(value))
+        if parsed is None:
+            raise ValueError(value)
+        return parsed
+    return parse_or_raise
+
+
+def build_center(record, context):
+    return Center(
+        id=_parse(record, 'id', int),
+        name=_text(record, Center, 'name', required=True),
+        location=_text(record, Center, 'location', required=True),
+        latitude=_parse(record, 'latitude', float),
+        longitude=_parse(record, 'longitude', float),
+    )
+
+
+def build_service(record, context):
+    category = _text(record, Service, 'category', required=True)
+    if category not in context['categories']:
+        raise RowError(f"Unknown category {category!r}.")
+    duration_minutes = _parse(record, 'duration_minutes', int, required=True)
+    if duration_minutes <= 0:
+        raise RowError("duration_minutes must be positive.")
+    return Service(
+        id=_parse(record, 'id', int),
+        name=_text(record, Service, 'name', required=True),
+        category=category,
+        duration_minutes=duration_minutes,
+        price=_parse(record, 'price', lambda value: Decimal(str(value)), required=True),
+    )
+
+
+def build_booking(record, context):
+    """Booking.clean()'s checks, against in-memory maps instead of per-row queries"""
+    center_id = _parse(record, 'center_id', int, required=True)
+    if center_id not in context['centers']:
+        raise RowError(f"Unknown center {center_id}.")
+    service_id = _parse(record, 'service_id', int, required=True)
+    duration = context['services'].get(service_id)
+    if duration is None:
+        raise RowError(f"Unknown service {service_id}.")
+
+    day = _parse(record, 'date', _strict(parse_date), required=True)
+    start_time = _parse(record, 'start_time', _strict(parse_time), required=True)
+    end_time = _parse(record, 'end_time', _strict(parse_time), required=True)
+    if end_time <= start_time:
+        raise RowError("End time must be after start time.")
+    minutes = (datetime.combine(day, end_time) - datetime.combine(day, start_time)) / timedelta(minutes=1)
+    if abs(minutes - duration) > 1:
+        raise RowError("Duration must match service duration.")
+    status = _value(record, 'status') or 'pending'
+    if status not in STATUSES:
+        raise RowError(f"Unknown status {status!r}.")
+
+    return Booking(
+        id=_parse(record, 'id', int),
+        center_id=center_id,
+        service_id=service_id,
+        date=day,
+        start_time=start_time,
+        end_time=end_time,
+        customer_name=_text(record, Booking, 'customer_name', required=True),
+        customer_id=_text(record, Booking, 'customer_id'),
+        vehicle_name=_text(record, Booking, 'vehicle_name'),
+        status=status,
+    )
+
+
+BUILDERS = {'centers': build_center, 'services': build_service, 'bookings': build_booking}
+MODELS = {'centers': Center, 'services': Service, 'bookings': Booking}
+
+
+def load_context(kind):
+    """Lookup maps the row builders validate against (one query each)"""
+    if kind == 'bookings':
+        return {
+            'centers': set(Center.objects.values_list('id', flat=True)),
+            'services': dict(Service.objects.values_list('id', 'duration_minutes')),
+        }
+    if kind == 'services':
+        return {'categories': {value for value, _ in Service.CATEGORY_CHOICES}}
+    return {}
+
+
+def _unique_key(obj):
+    return obj.center_id, obj.date, obj.start_time, obj.end_time
+
+
+def check_bookings(rows, skip_duplicates, error):
+    """Keep the (line number, booking) rows that fit the schedule; returns (kept, skipped)
+
+    Per center, the batch's days are loaded as occupancy bitmaps plus the exact
+    slots taken, and each row is checked as booking_engine checks a POST
+    (overlap and buffers against CHECKED_STATUSES, exact repeats of any
+    status), against the existing bookings and the rows kept before it. Ids of
+    archived bookings are refused: the hot and archive tables must not share
+    ids. With skip_duplicates, exact copies of existing bookings are skipped
+    rather than reported.
+    """
+    ids = {obj.id for _, obj in rows if obj.id is not None}
+    archived = set(BookingArchive.objects.filter(id__in=ids).values_list('id', flat=True)) if ids else set()
+    by_center = defaultdict(list)
+    for row in rows:
+        by_center[row[1].center_id].append(row)
+
+    kept, skipped = [], 0
+    for center_id, center_rows in by_center.items():
+        days = [obj.date for _, obj in center_rows]
+        occupancy = DayOccupancy.for_range(
+            center_id, min(days), max(days), statuses=booking_engine.CHECKED_STATUSES
+        )
+        existing = set(Booking.objects.filter(
+            center_id=center_id, date__range=(min(days), max(days))
+        ).values_list('date', 'start_time', 'end_time'))
+        for line_number, obj in sorted(center_rows, key=lambda row: (row[1].date, row[1].start_time)):
+            if obj.id in archived:
+                error(line_number, f"Booking {obj.id} is archived; import the hot rows only (export --hot-only).")
+                continue
+            if (obj.date, obj.start_time, obj.end_time) in existing:
+                if skip_duplicates:
+                    skipped += 1
+                else:
+                    error(line_number, "Slot overlaps with existing booking.")
+                continue
+            try:
+                booking_engine.check_slot(occupancy[obj.date], obj.start_time, obj.end_time)
+            except serializers.ValidationError as exc:
+                error(line_number, str(exc.detail[0]))
+                continue
+            occupancy[obj.date].add(obj.start_time, obj.end_time)
+            kept.append((line_number, obj))
+    return kept, skipped
+
+
+def _stored_count(kind, objs):
+    """Rows of the table a batch can land in; the difference around an insert is what it kept"""
+    if kind != 'bookings':
+        return MODELS[kind].objects.count()
+    days = [obj.date for obj in objs]
+    return Booking.objects.filter(
+        center_id__in={obj.center_id for obj in objs}, date__range=(min(days), max(days))
+    ).count()
+
+
+def import_records(kind, records, batch_size=BATCH_SIZE, skip_duplicates=False, dry_run=False, progress=None):
+    """Validate and bulk insert records chunk by chunk; returns counters and the first errors
+
+    Each chunk is inserted with bulk_create in its own transaction, so a
+    failed chunk leaves earlier ones in place. created_at is the import time
+    (auto_now_add). Nothing is queued in the outbox for imported bookings.
+    """
+    build = BUILDERS[kind]
+    model = MODELS[kind]
+    context = load_context(kind)
+    stats = {'read': 0, 'inserted': 0, 'skipped': 0, 'error_count': 0, 'errors': [], 'seconds': 0.0}
+    touched_days = set()
+    started = time.monotonic()
+
+    def error(line_number, message):
+        stats['error_count'] += 1
+        if len(stats['errors']) < MAX_REPORTED_ERRORS:
+            stats['errors'].append((line_number, message))
+
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        rows, seen = [], set()
+        for line_number, record in chunk:
+            stats['read'] += 1
+            if not isinstance(record, dict):
+                error(line_number, "Not a JSON object.")
+                continue
+            try:
+                obj = build(record, context)
+            except RowError as exc:
+                error(line_number, str(exc))
+                continue
+            if kind == 'bookings':
+                key = _unique_key(obj)
+                if key in seen:
+                    error(line_number, "Duplicate of an earlier row in the same batch.")
+                    continue
+                seen.add(key)
+            rows.append((line_number, obj))
+        if kind == 'bookings' and rows:
+            rows, skipped = check_bookings(rows, skip_duplicates, error)
+            stats['skipped'] += skipped
+        objs = [obj for _, obj in rows]
+
+        if objs and not dry_run:
+            try:
+                with transaction.atomic():
+                    if skip_duplicates:
+                        # ignore_conflicts does not say which rows it dropped
+                        before = _stored_count(kind, objs)
+                        model.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+                        inserted = _stored_count(kind, objs) - before
+                    else:
+                        model.objects.bulk_create(objs, batch_size=1000)
+                        inserted = len(objs)
+            except IntegrityError as exc:
+                error(chunk[0][0], f"Batch of {len(objs)} rows rejected ({exc}); use --skip-duplicates to keep the rest.")
+                objs, inserted = [], 0
+            stats['inserted'] += inserted
+            stats['skipped'] += len(objs) - inserted
+        if kind == 'bookings' and not dry_run:
+            touched_days.update((obj.center_id, obj.date) for obj in objs)
+            live.publish_bulk_on_commit(objs)  # Chunk committed above, so this goes out now
+        if progress:
+            progress(stats, time.monotonic() - started)
+
+    if not dry_run:
+        _after_import(kind, touched_days)
+    stats['seconds'] = time.monotonic() - started
+    return stats
+
+
+def _after_import(kind, touched_days):
+    """bulk_create sends no signals; do their cache and summary upkeep once"""
+    if kind == 'centers':
+        reference_cache.bump('centers')
+        geo.invalidate()
+    elif kind == 'services':
+        reference_cache.bump('services')
+        availability_cache.invalidate_all()
+    elif touched_days:
+        availability_cache.invalidate_all()
+        # Summaries of the touched days are recomputed lazily on their next read
+        dates = defaultdict(set)
+        for center_id, day in touched_days:
+            dates[center_id].add(day)
+        touched = Q()
+        for center_id, center_dates in dates.items():
+            touched |= Q(center_id=center_id, date__in=center_dates)
+        DayAvailability.objects.filter(touched).delete()
@@ -0,0 +1,241 @@
+# live.py (Availability change fan-out for the server-sent events stream)
+import asyncio
+import threading
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import date as date_type
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .occupancy import DayOccupancy
+from .renderers import dumps
+from . import day_summary, utils
+
+RESYNC = object()  # handed to a subscriber that fell behind instead of its missed messages
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def stream_settings():
+    return {
+        'broker': getattr(settings, 'AVAILABILITY_STREAM_BROKER', 'Appoinments.live.LocalBroker'),
+        'queue_size': getattr(settings, 'AVAILABILITY_STREAM_QUEUE_SIZE', 100),
+        'heartbeat': getattr(settings, 'AVAILABILITY_STREAM_HEARTBEAT', 15),
+        'max_seconds': getattr(settings, 'AVAILABILITY_STREAM_MAX_SECONDS', 300),
+    }
+
+
+class Subscription:
+    """One stream's bounded queue, fed from any thread and read on its event loop"""
+
+    def __init__(self, loop, queue_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(queue_size)
+        self.lagged = False
+
+    def put(self, message):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def get(self):
+        if self.lagged:
+            self.lagged = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return RESYNC
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """In-process pub/sub; each subscriber gets its own bounded queue
+
+    Only reaches streams served by this process. For several workers, point
+    AVAILABILITY_STREAM_BROKER at a class with the same three methods backed by
+    a shared broker (e.g. Redis pub/sub).
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.channels = {}  # channel -> set of Subscription
+
+    def has_subscribers(self, channel):
+        return bool(self.channels.get(channel))
+
+    def publish(self, channel, message):
+        """Safe to call from sync code on any thread"""
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.put, message)
+        return len(subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self.lock:
+            self.channels.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self.lock:
+                subscribers = self.channels.get(channel, set())
+                subscribers.discard(subscription)
+                if not subscribers:
+                    self.channels.pop(channel, None)
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            config = stream_settings()
+            _broker = import_string(config['broker'])(queue_size=config['queue_size'])
+        return _broker
+
+
+def reset_broker():
+    """Drop the broker so the next get_broker() reads the settings again"""
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def channel_name(center_id, date):
+    return f'availability:{center_id}:{date}'
+
+
+def _snapshot_key(center_id, date):
+    return f'availability:stream:{center_id}:{date}'
+
+
+def _cache():
+    return caches[getattr(settings, 'AVAILABILITY_CACHE_ALIAS', 'default')]
+
+
+def day_slots(center_id, date):
+    """{duration: [start HH:MM, ...]} for every duration class, from one occupancy query"""
+    occupancy = DayOccupancy.for_day(center_id, date)
+    return {
+        str(duration): [slot['start_time'].strftime('%H:%M')
+                        for slot in utils.get_possible_slots(center_id, date, duration, occupancy)]
+        for duration in day_summary.duration_classes()
+    }
+
+
+def _base_timeout():
+    # Outlives any stream; an expired base only makes the next change a full list
+    return 2 * stream_settings()['max_seconds']
+
+
+def snapshot(center_id, date):
+    """Current slots plus the version a stream holding them is at
+
+    The base the next change is diffed against is shared by every process (it
+    lives in the cache), so an unchanged day keeps its version and streams that
+    connected earlier stay in step.
+    """
+    slots = day_slots(center_id, date)
+    cache = _cache()
+    base = cache.get(_snapshot_key(center_id, date))
+    if base is None or base['slots'] != slots:
+        base = {'version': uuid.uuid4().hex, 'slots': slots}
+        cache.set(_snapshot_key(center_id, date), base, _base_timeout())
+    return {'center_id': center_id, 'date': str(date), 'version': base['version'], 'slots': slots}
+
+
+def diff(before, after):
+    """Per duration, the slot starts that appeared and disappeared; unchanged durations are left out"""
+    changes = {}
+    for duration in before.keys() | after.keys():
+        old, new = set(before.get(duration, ())), set(after.get(duration, ()))
+        if old != new:
+            changes[duration] = {'added': sorted(new - old), 'removed': sorted(old - new)}
+    return changes
+
+
+def publish_change(center_id, date, booking):
+    """Push a booking change and its slot diff to the day's subscribers, if this broker sees any"""
+    return _publish(center_id, date, booking=booking)
+
+
+def _publish(center_id, date, **event):
+    broker = get_broker()
+    channel = channel_name(center_id, date)
+    if not broker.has_subscribers(channel):
+        return False
+    cache = _cache()
+    before = cache.get(_snapshot_key(center_id, date))
+    after = {'version': uuid.uuid4().hex, 'slots': day_slots(center_id, date)}
+    cache.set(_snapshot_key(center_id, date), after, _base_timeout())
+    broker.publish(channel, {
+        'center_id': center_id,
+        'date': str(date),
+        **event,
+        # A diff applies to the state at `base`; streams at another version
+        # (e.g. another process moved the base on) are sent a snapshot instead.
+        # Without a base (evicted) the whole list is sent and replaces the client's
+        'base': before['version'] if before is not None else None,
+        'version': after['version'],
+        'slots': diff(before['slots'], after['slots']) if before is not None else after['slots'],
+        'full': before is None,
+    })
+    return True
+
+
+def _hhmm(value):
+    return value.strftime('%H:%M') if hasattr(value, 'strftime') else str(value)[:5]
+
+
+def booking_event(booking, change):
+    """The compact description of a booking change that goes out with the slot diff"""
+    return {
+        'id': booking.pk,
+        'change': change,
+        'start_time': _hhmm(booking.start_time),
+        'end_time': _hhmm(booking.end_time),
+        'status': booking.status,
+    }
+
+
+def publish_change_on_commit(days, booking):
+    days = {
+        (center_id, date_type.fromisoformat(date) if isinstance(date, str) else date)
+        for center_id, date in days
+    }
+
+    def publish():
+        for center_id, date in days:
+            publish_change(center_id, date, booking)
+
+    transaction.on_commit(publish)
+
+
+def publish_bulk_on_commit(bookings):
+    """One change per day for bookings written without signals (bulk endpoint, importer)
+
+    The day's events go out together under 'bookings', with a single diff.
+    """
+    events = defaultdict(list)
+    for booking in bookings:
+        events[(booking.center_id, booking.date)].append(booking_event(booking, 'created'))
+
+    def publish():
+        for (center_id, date), day_events in events.items():
+            _publish(center_id, date, bookings=day_events)
+
+    transaction.on_commit(publish)
+
+
+def sse(event, data):
+    """One text/event-stream frame"""
+    return f'event: {event}\ndata: {dumps(data).decode()}\n\n'
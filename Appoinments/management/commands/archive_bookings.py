@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.utils import timezone
+
+from Appoinments import archive
+
+
+class Command(BaseCommand):
+    help = "Move bookings dated before the cutoff into BookingArchive, one short transaction per batch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=lambda value: timezone.datetime.strptime(value, '%Y-%m-%d').date(),
+                            help='Cutoff date (default: today minus BOOKING_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be moved')
+
+    def handle(self, *args, **options):
+        cutoff = options['before'] or archive.default_cutoff()
+        if options['dry_run']:
+            self.stdout.write(f"{archive.archivable(cutoff).count()} bookings dated before {cutoff} to archive")
+            return
+
+        started = time.monotonic()
+        moved = batches = 0
+        while True:
+            if options['max_batches'] is not None and batches >= options['max_batches']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Stopped after {batches} batches ({moved} moved); run again to continue"
+                ))
+                return
+            try:
+                count = archive.archive_batch(cutoff, options['batch_size'])
+            except IntegrityError as exc:
+                raise CommandError(
+                    f"Batch rolled back after {moved} moved: a booking id already exists in BookingArchive ({exc})"
+                )
+            if not count:
+                break
+            moved += count
+            batches += 1
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"Batch {batches}: {moved} moved ({moved / max(elapsed, 1e-6):.0f} rows/s)")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        locks, summaries = archive.purge_day_state(cutoff)
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved} bookings before {cutoff} in {time.monotonic() - started:.1f}s; "
+            f"purged {locks} day locks and {summaries} summaries"
+        ))
@@ -0,0 +1,128 @@
+import json
+import platform
+import random
+import subprocess
+import time
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from Appoinments import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic data and measure latency percentiles and query counts of the hot "
+        "paths. Run with --settings=Book_Appoinment.settings_bench; it replaces all app data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--centers', type=int, default=20)
+        parser.add_argument('--services', type=int, default=5)
+        parser.add_argument('--months', type=int, default=3)
+        parser.add_argument('--bookings-per-day', type=int, default=8)
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--send-iterations', type=int, default=3)
+        parser.add_argument('--stub-delay', type=float, default=0.0,
+                            help='Seconds the stand-in booking microservice waits per request')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse the data already in the database')
+        parser.add_argument('--output', help='Write results to this JSON file')
+        parser.add_argument('--compare', help='Baseline JSON file from an earlier run')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Relative slowdown that counts as a regression (default 20%%)')
+        parser.add_argument('--fail-on-regression', action='store_true')
+        parser.add_argument('--render', action='store_true',
+                            help='Also compare default vs fast JSON rendering at 10/100/1000 items')
+        parser.add_argument('--force', action='store_true',
+                            help='Run against a database other than settings_bench (its data is replaced)')
+
+    def handle(self, *args, **options):
+        # Seeding wipes the app tables and the scenarios POST bookings
+        if not (options['force'] or benchmarks.is_bench_database()):
+            raise CommandError(
+                "The benchmark replaces all app data; run it with "
+                "--settings=Book_Appoinment.settings_bench (or pass --force)"
+            )
+        call_command('migrate', verbosity=0)
+        rng = random.Random(options['seed'])
+
+        dataset = None
+        if not options['skip_seed']:
+            started = time.monotonic()
+            dataset = benchmarks.seed(
+                centers=options['centers'],
+                services=options['services'],
+                months=options['months'],
+                bookings_per_day=options['bookings_per_day'],
+                rng=rng,
+                force=options['force']
+            )
+            self.stdout.write(f"Seeded {dataset['bookings']} bookings in {time.monotonic() - started:.1f}s")
+
+        results = benchmarks.run_scenarios(
+            iterations=options['iterations'],
+            send_iterations=options['send_iterations'],
+            stub_delay=options['stub_delay'],
+            rng=rng
+        )
+
+        self.stdout.write(f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}")
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<28}{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}"
+                f"{summary['p99_ms']:>10.2f}{summary['queries_mean']:>10.1f}"
+            )
+
+        render = None
+        if options['render']:
+            render = benchmarks.render_scenarios()
+            self.stdout.write(f"{'rendering':<28}{'default ms':>12}{'fast ms':>10}{'speedup':>10}")
+            for name, summary in render.items():
+                self.stdout.write(
+                    f"{name:<28}{summary['default_ms']:>12.3f}{summary['fast_ms']:>10.3f}{summary['speedup']:>9.1f}x"
+                )
+
+        report = {
+            'meta': {
+                'commit': self._commit(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'options': {key: options[key] for key in (
+                    'centers', 'services', 'months', 'bookings_per_day', 'iterations', 'seed'
+                )},
+                'dataset': dataset,
+            },
+            'results': results,
+            'render': render,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if options['compare']:
+            self._compare(results, options)
+
+    def _compare(self, results, options):
+        with open(options['compare']) as handle:
+            baseline = json.load(handle)['results']
+        regressions = 0
+        for name, metric, before, after, change, regressed in benchmarks.compare(
+            results, baseline, options['threshold']
+        ):
+            regressions += regressed
+            flag = '  REGRESSION' if regressed else ''
+            self.stdout.write(f"{name:<28}{metric:<14}{before:>10.2f} -> {after:>10.2f} ({change:+.0%}){flag}")
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{regressions} metric(s) regressed by more than {options['threshold']:.0%}")
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Appoinments import export
+
+
+class Command(BaseCommand):
+    help = "Stream bookings to NDJSON or CSV with flat memory use"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=export.FORMATS, default='ndjson')
+        parser.add_argument('--output', default='-', help="File to write ('-' for stdout)")
+        parser.add_argument('--status')
+        parser.add_argument('--center', type=int, dest='center_id')
+        parser.add_argument('--date-from')
+        parser.add_argument('--date-to')
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+        parser.add_argument('--hot-only', action='store_true', help='Skip archived bookings')
+
+    def handle(self, *args, **options):
+        rows = export.iter_all_rows(
+            include_archived=not options['hot_only'],
+            chunk_size=options['chunk_size'],
+            status=options['status'],
+            center_id=options['center_id'],
+            date_from=options['date_from'],
+            date_to=options['date_to']
+        )
+
+        started = time.monotonic()
+        if options['output'] == '-':
+            count = self._write(rows, options['format'], lambda line: self.stdout.write(line, ending=''))
+        else:
+            with open(options['output'], 'w', newline='') as out:
+                count = self._write(rows, options['format'], out.write)
+
+        self.stderr.write(f"Exported {count} bookings in {time.monotonic() - started:.1f}s")
+
+    def _write(self, rows, export_format, write):
+        count = 0
+        for line in export.render_lines(rows, export_format):
+            write(line)
+            count += 1
+        return count - 1 if export_format == 'csv' else count  # CSV header
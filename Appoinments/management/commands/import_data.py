@@ -0,0 +1,58 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Appoinments import importer
+
+
+class Command(BaseCommand):
+    help = "Stream centers, services or bookings from NDJSON/CSV into the database in batched bulk inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=importer.KINDS)
+        parser.add_argument('path', help="File to read, or '-' for stdin (export_bookings --hot-only output is accepted)")
+        parser.add_argument('--format', choices=importer.FORMATS, default=None,
+                            help='Default: from the file extension (.csv, otherwise ndjson)')
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE, help='Rows per transaction')
+        parser.add_argument('--skip-duplicates', action='store_true',
+                            help='Skip rows that exactly match existing ones instead of reporting them')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only')
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        def progress(stats, elapsed):
+            self.stdout.write(
+                f"{stats['read']} read, {stats['inserted']} inserted, {stats['error_count']} errors "
+                f"({stats['read'] / max(elapsed, 1e-6):.0f} rows/s)"
+            )
+
+        try:
+            handle = sys.stdin if path == '-' else open(path, newline='', encoding=options['encoding'])
+        except OSError as exc:
+            raise CommandError(str(exc))
+        try:
+            stats = importer.import_records(
+                options['kind'], importer.read_records(handle, file_format),
+                batch_size=options['batch_size'], skip_duplicates=options['skip_duplicates'],
+                dry_run=options['dry_run'], progress=progress
+            )
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+        for line_number, message in stats['errors']:
+            self.stderr.write(f"line {line_number}: {message}")
+        if stats['error_count'] > len(stats['errors']):
+            self.stderr.write(f"... {stats['error_count'] - len(stats['errors'])} more errors not shown")
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        count = stats['read'] - stats['error_count'] if options['dry_run'] else stats['inserted']
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} of {stats['read']} {options['kind']} in {stats['seconds']:.1f}s "
+            f"({stats['read'] / max(stats['seconds'], 1e-6):.0f} rows/s), {stats['skipped']} duplicates skipped, "
+            f"{stats['error_count']} errors"
+        ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Appoinments import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued booking exports to the booking microservice (run several for more throughput)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--lease', type=int, default=300, help='Seconds a claimed batch stays leased')
+        parser.add_argument('--max-attempts', type=int, default=outbox.MAX_ATTEMPTS)
+        parser.add_argument('--concurrency', type=int, default=None, help='Requests in flight per batch')
+        parser.add_argument('--idle-sleep', type=float, default=5.0, help='Seconds to wait when nothing is due')
+        parser.add_argument('--once', action='store_true', help='Exit once nothing is due instead of polling')
+
+    def handle(self, *args, **options):
+        total_claimed = total_sent = 0
+        while True:
+            claimed, sent = outbox.process_batch(
+                batch_size=options['batch_size'],
+                lease_seconds=options['lease'],
+                max_attempts=options['max_attempts'],
+                concurrency=options['concurrency']
+            )
+            total_claimed += claimed
+            total_sent += sent
+            if claimed:
+                self.stdout.write(f"Delivered {sent}/{claimed} bookings")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['idle_sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {total_sent} sent, {total_claimed - total_sent} to retry or failed"
+        ))
@@ -0,0 +1,63 @@
+import io
+import pstats
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Appoinments import profiling
+
+
+class Command(BaseCommand):
+    help = "List captured request profiles or summarize one (hot functions and SQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('stem', nargs='?', help='Capture to summarize (as printed by the listing)')
+        parser.add_argument('--view', help='Only list captures of this URL name')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--sort', default='cumulative', help='pstats sort key (cumulative, tottime, ...)')
+
+    def handle(self, *args, **options):
+        directory = profiling.profiling_settings()['directory']
+        if options['stem']:
+            self._summarize(Path(directory), options['stem'], options)
+            return
+
+        captures = profiling.list_profiles(directory)
+        if options['view']:
+            captures = [item for item in captures if item[1].get('view') == options['view']]
+        if not captures:
+            self.stdout.write(f"No profiles in {directory}")
+            return
+        self.stdout.write(f"{'capture':<48}{'status':>7}{'total ms':>10}{'sql':>6}{'sql ms':>9}  path")
+        for stem, meta in captures[:options['limit']]:
+            self.stdout.write(
+                f"{stem:<48}{meta['status']:>7}{meta['duration_ms']:>10.1f}"
+                f"{meta['sql_count']:>6}{meta['sql_ms']:>9.1f}  {meta['path']}"
+            )
+
+    def _summarize(self, directory, stem, options):
+        json_path = directory / f'{stem}.json'
+        prof_path = directory / f'{stem}.prof'
+        if not json_path.exists() or not prof_path.exists():
+            raise CommandError(f"No capture named {stem} in {directory}")
+
+        meta = profiling.load_profile(directory, stem)
+        self.stdout.write(
+            f"{meta['method']} {meta['path']} -> {meta['status']} in {meta['duration_ms']:.1f}ms; "
+            f"{meta['sql_count']} queries, {meta['sql_ms']:.1f}ms in SQL"
+        )
+
+        # Group identical statements so N+1 patterns stand out
+        grouped = defaultdict(lambda: [0, 0.0])
+        for statement in meta['sql']:
+            grouped[statement['sql']][0] += 1
+            grouped[statement['sql']][1] += statement['ms']
+        self.stdout.write("\nSQL by total time:")
+        for sql, (count, ms) in sorted(grouped.items(), key=lambda item: -item[1][1])[:10]:
+            self.stdout.write(f"{ms:>9.2f}ms {count:>4}x  {sql[:160]}")
+
+        out = io.StringIO()
+        stats = pstats.Stats(str(prof_path), stream=out)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write("\n" + out.getvalue())
@@ -0,0 +1,34 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Appoinments import day_summary
+from Appoinments.models import Center, DayAvailability
+
+
+class Command(BaseCommand):
+    help = "Recompute the DayAvailability summary for every center and service duration"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Days to cover, starting at --start-date')
+        parser.add_argument('--start-date', type=lambda value: timezone.datetime.strptime(value, '%Y-%m-%d').date())
+        parser.add_argument('--center', type=int, action='append', dest='center_ids', help='Repeatable')
+        parser.add_argument('--purge-past', action='store_true', help='Delete summary rows before --start-date')
+
+    def handle(self, *args, **options):
+        start_date = options['start_date'] or timezone.now().date()
+        end_date = start_date + timedelta(days=options['days'] - 1)
+        centers = Center.objects.order_by('id')
+        if options['center_ids']:
+            centers = centers.filter(id__in=options['center_ids'])
+
+        started = time.monotonic()
+        if options['purge_past']:
+            purged, _ = DayAvailability.objects.filter(date__lt=start_date).delete()
+            self.stdout.write(f"Purged {purged} past rows")
+        written = day_summary.rebuild(start_date, end_date, centers=centers)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} rows for {start_date}..{end_date} in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,124 @@
+# metrics.py (In-process request/DB/cache/downstream metrics in Prometheus text format)
+import logging
+import random
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+from . import availability_cache
+
+logger = logging.getLogger('Appoinments.requests')
+
+# Upper bounds in seconds, Prometheus-style (le="...")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(labels, le=bound)} {cumulative}'
+        yield f'{name}_sum{_labels(labels)} {self.total}'
+        yield f'{name}_count{_labels(labels)} {self.count}'
+
+
+def _labels(labels, **extra):
+    items = list(labels) + [(key, value) for key, value in extra.items()]
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in items) + '}'
+
+
+class Registry:
+    """Thread-safe store for everything /api/metrics reports (per process)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)                                 # (view, status) -> count
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # view -> seconds
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))    # view -> queries/request
+        self.db_time = defaultdict(float)                                # view -> seconds
+        self.downstream = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # (host, outcome) -> seconds
+
+    def observe_request(self, view, status_code, seconds, query_count=None, db_seconds=None):
+        """query_count/db_seconds are None when they were not measured"""
+        with self.lock:
+            self.requests[(view, status_code)] += 1
+            self.latency[view].observe(seconds)
+            if query_count is not None:
+                self.queries[view].observe(query_count)
+                self.db_time[view] += db_seconds
+
+    def observe_downstream(self, host, outcome, seconds):
+        with self.lock:
+            self.downstream[(host, outcome)].observe(seconds)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines.append('# TYPE booking_http_requests_total counter')
+            for (view, status_code), count in sorted(self.requests.items()):
+                lines.append(f'booking_http_requests_total{_labels([("view", view), ("status", status_code)])} {count}')
+
+            lines.append('# TYPE booking_http_request_duration_seconds histogram')
+            for view, histogram in sorted(self.latency.items()):
+                lines.extend(histogram.lines('booking_http_request_duration_seconds', [('view', view)]))
+
+            lines.append('# TYPE booking_db_queries_per_request histogram')
+            for view, histogram in sorted(self.queries.items()):
+                lines.extend(histogram.lines('booking_db_queries_per_request', [('view', view)]))
+
+            lines.append('# TYPE booking_db_time_seconds_total counter')
+            for view, seconds in sorted(self.db_time.items()):
+                lines.append(f'booking_db_time_seconds_total{_labels([("view", view)])} {seconds}')
+
+            lines.append('# TYPE booking_downstream_request_duration_seconds histogram')
+            for (host, outcome), histogram in sorted(self.downstream.items()):
+                lines.extend(histogram.lines(
+                    'booking_downstream_request_duration_seconds', [('host', host), ('outcome', outcome)]
+                ))
+
+        cache_stats = availability_cache.stats()
+        lines.append('# TYPE booking_availability_cache_total counter')
+        for result in ('hits', 'misses', 'invalidations'):
+            lines.append(f'booking_availability_cache_total{_labels([("result", result)])} {cache_stats[result]}')
+        lines.append('# TYPE booking_availability_cache_hit_ratio gauge')
+        lines.append(f'booking_availability_cache_hit_ratio {cache_stats["hit_rate"]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def log_sampled(event, **fields):
+    """Log an event as key=value pairs for a BOOKING_LOG_SAMPLE_RATE fraction of calls"""
+    rate = getattr(settings, 'BOOKING_LOG_SAMPLE_RATE', 0.01)
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return False
+    if not logger.isEnabledFor(logging.INFO):
+        return False
+    logger.info(
+        '%s %s', event, ' '.join(f'{key}={value}' for key, value in fields.items()),
+        extra={'event': event, 'fields': fields}
+    )
+    return True
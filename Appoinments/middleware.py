@@ -0,0 +1,153 @@
+# middleware.py (Request instrumentation)
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import profiling, routers
+from .metrics import registry
+
+
+class QueryTimer:
+    """connection.execute_wrapper hook counting queries and their wall time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+_request_timer = ContextVar('request_query_timer', default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection; feeds the current request's QueryTimer
+
+    The timer lives in a context variable, which sync_to_async copies into the
+    thread running a sync view or async ORM call, so queries are counted for the
+    request that made them under WSGI and ASGI alike.
+    """
+    timer = _request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_hook(sender=None, connection=None, **kwargs):
+    """connection_created receiver"""
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.url_name if match and match.url_name else 'unmatched'
+
+
+class MetricsMiddleware:
+    """Record latency, DB query count and DB time per URL name
+
+    Async-capable so ASGI requests stay on the event loop; queries are counted
+    by record_queries wherever the request's ORM work runs.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self._observe(request, response, time.perf_counter() - started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        self._observe(request, response, time.perf_counter() - started, timer)
+        return response
+
+    def _observe(self, request, response, elapsed, timer):
+        registry.observe_request(_view_name(request), response.status_code, elapsed, timer.count, timer.duration)
+
+
+class ProfilingMiddleware:
+    """cProfile + SQL trace a request sent with X-Profile: <PROFILING_TOKEN>, or a sampled one
+
+    cProfile follows one thread, so requests served async pass through unprofiled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+        config = profiling.profiling_settings()
+        if not profiling.should_profile(request, config):
+            return self.get_response(request)
+        return profiling.capture(request, self.get_response, config)
+
+
+class ReplicaRoutingMiddleware:
+    """Serve DATABASE_REPLICA_VIEWS reads from a replica; pin clients to the primary after a write"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = routers.replica_settings()
+        alias = routers.replica_for(request, config)
+        with routers.reads_from(alias):
+            response = self.get_response(request)
+        return self._finish(request, response, alias, config)
+
+    async def __acall__(self, request):
+        config = routers.replica_settings()
+        alias = routers.replica_for(request, config)
+        with routers.reads_from(alias):
+            response = await self.get_response(request)
+        return self._finish(request, response, alias, config)
+
+    def _finish(self, request, response, alias, config):
+        if alias and response.streaming and not response.is_async:
+            # Streamed bodies (exports) query while the server iterates them
+            response.streaming_content = _read_while_streaming(alias, response.streaming_content)
+        return routers.pin_after_write(request, response, config)
+
+
+def _read_while_streaming(alias, content):
+    with routers.reads_from(alias):
+        yield from content
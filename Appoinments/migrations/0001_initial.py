@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Center',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('location', models.CharField(max_length=200)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Service',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('category', models.CharField(choices=[('service', 'Service'), ('modification', 'Modification')], max_length=20)),
+                ('duration_minutes', models.PositiveIntegerField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('customer_name', models.CharField(max_length=100)),
+                ('customer_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('vehicle_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(choices=[('booked', 'Booked'), ('pending', 'Pending')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('center', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Appoinments.center')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Appoinments.service')),
+            ],
+            options={
+                'unique_together': {('center', 'date', 'start_time', 'end_time')},
+            },
+        ),
+    ]
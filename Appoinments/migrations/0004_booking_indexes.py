@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Appoinments', '0003_booking_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['center', 'date', 'status', 'start_time', 'end_time'], name='booking_day_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer_id'], name='booking_customer_idx'),
+        ),
+    ]
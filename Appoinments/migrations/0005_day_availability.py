@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Appoinments', '0004_booking_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('duration_minutes', models.PositiveIntegerField()),
+                ('free_minutes', models.PositiveIntegerField()),
+                ('num_slots', models.PositiveIntegerField()),
+                ('earliest_start', models.TimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('center', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Appoinments.center')),
+            ],
+            options={
+                'unique_together': {('center', 'duration_minutes', 'date')},
+            },
+        ),
+    ]
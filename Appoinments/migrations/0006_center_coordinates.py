@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Appoinments', '0005_day_availability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='center',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='center',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
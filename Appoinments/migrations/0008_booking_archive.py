@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Appoinments', '0007_booking_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('customer_name', models.CharField(max_length=100)),
+                ('customer_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('vehicle_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(choices=[('booked', 'Booked'), ('pending', 'Pending')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('center', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Appoinments.center')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Appoinments.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'start_time'], name='archive_list_idx'), models.Index(fields=['center', 'date', 'start_time'], name='archive_center_list_idx'), models.Index(fields=['customer_id'], name='archive_customer_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Appoinments', '0008_booking_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dayavailability',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
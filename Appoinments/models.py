@@ -7,6 +7,8 @@ from django.core.exceptions import ValidationError
 class Center(models.Model):
     name = models.CharField(max_length=100)
     location = models.CharField(max_length=200)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
 
     def __str__(self):
         return self.name
@@ -42,6 +44,24 @@ class Booking(models.Model):
 
     class Meta:
         unique_together = ['center', 'date', 'start_time', 'end_time']  # Prevent overlaps
+        indexes = [
+            # Covers the day/range occupancy reads (availability, booking
+            # validation): WHERE center_id = ? AND date [= ? | BETWEEN] AND
+            # status IN (...) selecting only start_time/end_time.
+            # MySQL EXPLAIN: type=ref (range for BETWEEN), key=booking_day_status_idx,
+            # Extra="Using where; Using index" (no table rows are read).
+            models.Index(
+                fields=['center', 'date', 'status', 'start_time', 'end_time'],
+                name='booking_day_status_idx'
+            ),
+            # Customer lookups. MySQL EXPLAIN: type=ref, key=booking_customer_idx
+            models.Index(fields=['customer_id'], name='booking_customer_idx'),
+            # Keyset listing, ORDER BY date, start_time, id (InnoDB appends the
+            # PK to every secondary index). MySQL EXPLAIN: type=range,
+            # key=booking_list_idx / booking_center_list_idx, no filesort.
+            models.Index(fields=['date', 'start_time'], name='booking_list_idx'),
+            models.Index(fields=['center', 'date', 'start_time'], name='booking_center_list_idx'),
+        ]
 
     def clean(self):
         # Ensure end_time > start_time
@@ -53,9 +73,100 @@ class Booking(models.Model):
         if abs(duration - self.service.duration_minutes) > 1:  # Allow 1min tolerance
             raise ValidationError('Duration must match service duration.')
 
-    def save(self, *args, **kwargs):
-        self.full_clean()
+    def save(self, *args, clean=True, **kwargs):
+        # booking_engine validates in memory under its day lock and passes clean=False
+        if clean:
+            self.full_clean()
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.customer_name} - {self.service} at {self.center} on {self.date}"
\ No newline at end of file
+        return f"{self.customer_name} - {self.service} at {self.center} on {self.date}"
+
+class BookingDayLock(models.Model):
+    """One row per (center, date); booking writers lock it to serialize per day"""
+    center = models.ForeignKey(Center, on_delete=models.CASCADE)
+    date = models.DateField()
+    version = models.PositiveBigIntegerField(default=0)  # Bumped by every locked write
+
+    class Meta:
+        unique_together = ['center', 'date']
+
+    def __str__(self):
+        return f"Lock {self.center_id} on {self.date} (v{self.version})"
+
+
+class BookingOutbox(models.Model):
+    """Export of a booking to the booking microservice, written with the booking itself"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='outbox')
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(blank=True, null=True)  # Lease held by a worker
+    lease_token = models.CharField(max_length=32, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    sent_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Outbox {self.booking_id} ({self.status})"
+
+
+class DayAvailability(models.Model):
+    """Availability summary of one center/day for one service duration
+
+    Current while `version` equals the day's BookingDayLock.version; readers
+    recompute rows the lock has moved past (see day_summary.get_summaries).
+    """
+    center = models.ForeignKey(Center, on_delete=models.CASCADE)
+    date = models.DateField()
+    duration_minutes = models.PositiveIntegerField()  # Service duration class
+    free_minutes = models.PositiveIntegerField()  # Unbooked minutes in the workday
+    num_slots = models.PositiveIntegerField()
+    earliest_start = models.TimeField(blank=True, null=True)
+    version = models.PositiveBigIntegerField(default=0)  # BookingDayLock.version it was computed at
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Also the index for "center + duration over a date range" scans
+        unique_together = ['center', 'duration_minutes', 'date']
+
+    def __str__(self):
+        return f"{self.center_id} {self.date} ({self.duration_minutes}min): {self.num_slots} slots"
+
+
+class BookingArchive(models.Model):
+    """Bookings moved out of the hot table by `manage.py archive_bookings`; ids are kept"""
+    id = models.BigIntegerField(primary_key=True)  # Booking.id of the original row
+    center = models.ForeignKey(Center, on_delete=models.CASCADE)
+    service = models.ForeignKey(Service, on_delete=models.CASCADE)
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    customer_name = models.CharField(max_length=100)
+    customer_id = models.CharField(max_length=100, blank=True, null=True)
+    vehicle_name = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Same listing/lookup access paths as the hot table
+            models.Index(fields=['date', 'start_time'], name='archive_list_idx'),
+            models.Index(fields=['center', 'date', 'start_time'], name='archive_center_list_idx'),
+            models.Index(fields=['customer_id'], name='archive_customer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_name} - {self.service} at {self.center} on {self.date} (archived)"
@@ -0,0 +1,121 @@
+# occupancy.py (Minute-resolution occupancy bitmaps for availability)
+from datetime import time, timedelta
+from .models import Booking
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def minute_of_day(value, ceil=False):
+    """Convert a time to minutes since midnight (optionally rounding seconds up)"""
+    minutes = value.hour * 60 + value.minute
+    if ceil and (value.second or value.microsecond):
+        minutes += 1
+    return minutes
+
+
+def minute_to_time(minutes):
+    """Convert minutes since midnight back to a time"""
+    return time(minutes // 60, minutes % 60)
+
+
+def _mask(start, end):
+    """Bit mask covering minutes [start, end)"""
+    start = max(start, 0)
+    end = min(end, MINUTES_PER_DAY)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def _lowest_bit(value):
+    """Index of the lowest set bit (value must be non-zero)"""
+    return (value & -value).bit_length() - 1
+
+
+class DayOccupancy:
+    """Occupied minutes of one center's day, one bit per minute (bit 0 = 00:00)"""
+
+    __slots__ = ('date', 'bits')
+
+    def __init__(self, date, bits=0):
+        self.date = date
+        self.bits = bits
+
+    @classmethod
+    def from_intervals(cls, date, intervals):
+        occupancy = cls(date)
+        for start_time, end_time in intervals:
+            occupancy.add(start_time, end_time)
+        return occupancy
+
+    @classmethod
+    def for_day(cls, center, date, statuses=('booked',)):
+        """Build the day's bitmap from a single query"""
+        rows = Booking.objects.filter(
+            center=center,
+            date=date,
+            status__in=statuses
+        ).values_list('start_time', 'end_time')
+        return cls.from_intervals(date, rows)
+
+    @classmethod
+    async def afor_day(cls, center, date, statuses=('booked',)):
+        """for_day() through the async ORM"""
+        rows = Booking.objects.filter(
+            center=center,
+            date=date,
+            status__in=statuses
+        ).values_list('start_time', 'end_time')
+        return cls.from_intervals(date, [row async for row in rows])
+
+    @classmethod
+    def for_range(cls, center, start_date, end_date, statuses=('booked',)):
+        """Build a bitmap for every day in [start_date, end_date] from a single query"""
+        days = {}
+        day = start_date
+        while day <= end_date:
+            days[day] = cls(day)
+            day += timedelta(days=1)
+
+        rows = Booking.objects.filter(
+            center=center,
+            date__range=(start_date, end_date),
+            status__in=statuses
+        ).values_list('date', 'start_time', 'end_time')
+        for date, start_time, end_time in rows:
+            days[date].add(start_time, end_time)
+        return days
+
+    def add(self, start_time, end_time):
+        """Mark [start_time, end_time) as occupied"""
+        self.bits |= _mask(minute_of_day(start_time), minute_of_day(end_time, ceil=True))
+
+    def is_free(self, start_time, end_time, buffer_before=0, buffer_after=0):
+        """True if [start_time - buffer_before, end_time + buffer_after) has no occupied minute"""
+        start = minute_of_day(start_time) - buffer_before
+        end = minute_of_day(end_time, ceil=True) + buffer_after
+        return not self.bits & _mask(start, end)
+
+    def free_minutes(self, window_start, window_end):
+        """Number of unoccupied minutes inside [window_start, window_end)"""
+        window = _mask(window_start, window_end)
+        return window.bit_count() - (self.bits & window).bit_count()
+
+    def free_runs(self, window_start, window_end):
+        """Yield (start, end) minute ranges that are free inside [window_start, window_end)"""
+        free = ~self.bits & _mask(window_start, window_end)
+        while free:
+            run_start = _lowest_bit(free)
+            # The run ends at the first occupied (or out of window) minute after run_start
+            rest = ~free & ~((1 << run_start) - 1)
+            run_end = _lowest_bit(rest)
+            yield run_start, run_end
+            free &= ~_mask(run_start, run_end)
+
+    def free_intervals(self, duration_minutes, window_start, window_end):
+        """List of (first_start, last_start) minutes for every gap that fits the duration"""
+        return [
+            (run_start, run_end - duration_minutes)
+            for run_start, run_end in self.free_runs(window_start, window_end)
+            if run_end - run_start >= duration_minutes
+        ]
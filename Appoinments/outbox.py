@@ -0,0 +1,150 @@
+# outbox.py (Durable booking export: claim due outbox rows, deliver, record the outcome)
+import logging
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .dispatch import adispatch, dispatch, dispatch_settings
+from .models import Booking, BookingOutbox
+from .serializers import BookingResponseSerializer
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+MAX_ATTEMPTS = 10
+SEND_NOW_BATCH_SIZE = 500  # Rows one /api/sendbooking/ call delivers
+
+logger = logging.getLogger('Appoinments.outbox')
+
+
+def enqueue(booking):
+    """Queue a booking for export; call inside the transaction that created it"""
+    return BookingOutbox.objects.create(
+        booking=booking,
+        payload=BookingResponseSerializer(booking).to_dict()
+    )
+
+
+def enqueue_many(bookings):
+    """enqueue() for bookings created with bulk_create (they must have primary keys)"""
+    return BookingOutbox.objects.bulk_create([
+        BookingOutbox(booking=booking, payload=BookingResponseSerializer(booking).to_dict())
+        for booking in bookings
+    ])
+
+
+def enqueue_missing():
+    """Queue pending bookings that have no outbox row (made before the outbox existed, or imported)"""
+    bookings = list(
+        Booking.objects.filter(status='pending', outbox__isnull=True).select_related('center', 'service')
+    )
+    if bookings:
+        enqueue_many(bookings)
+    return len(bookings)
+
+
+def backoff(attempts):
+    """Delay before retry number `attempts` (1, 2, ...): 30s, 60s, 120s ... capped at 1h"""
+    return timedelta(seconds=min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1)))
+
+
+def claim_batch(batch_size=100, lease_seconds=300):
+    """Lease up to batch_size due rows to this worker
+
+    SELECT ... FOR UPDATE SKIP LOCKED lets concurrent workers take disjoint
+    batches without waiting on each other (backends without it, like SQLite,
+    just skip the FOR UPDATE). The conditional UPDATE and lease token make the
+    claim safe either way: a row only belongs to the worker whose token it has.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    unleased = Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    with transaction.atomic():
+        ids = list(
+            BookingOutbox.objects.select_for_update(skip_locked=True)
+            .filter(unleased, status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        BookingOutbox.objects.filter(unleased, id__in=ids).update(
+            locked_until=now + timedelta(seconds=lease_seconds),
+            lease_token=token
+        )
+    return list(BookingOutbox.objects.filter(lease_token=token, status='pending').order_by('id'))
+
+
+def record_results(rows, results, max_attempts=MAX_ATTEMPTS):
+    """Mark delivered rows sent and schedule (or give up on) the rest; returns how many were marked sent
+
+    Every update is conditional on the lease token the rows were claimed with.
+    A row whose lease expired and was claimed again belongs to that other
+    worker now, so its outcome is left for that worker to record.
+    """
+    now = timezone.now()
+    lost = 0
+    sent_rows = [row for row, result in zip(rows, results) if result['status'] != 'error']
+    sent = 0
+    if sent_rows:
+        sent = BookingOutbox.objects.filter(
+            id__in=[row.id for row in sent_rows], lease_token=sent_rows[0].lease_token
+        ).update(
+            status='sent',
+            sent_at=now,
+            attempts=F('attempts') + 1,
+            locked_until=None,
+            last_error=''
+        )
+        lost += len(sent_rows) - sent
+
+    for row, result in zip(rows, results):
+        if result['status'] != 'error':
+            continue
+        attempts = row.attempts + 1
+        lost += 1 - BookingOutbox.objects.filter(id=row.id, lease_token=row.lease_token).update(
+            status='failed' if attempts >= max_attempts else 'pending',
+            attempts=attempts,
+            next_attempt_at=now + backoff(attempts),
+            locked_until=None,
+            last_error=str(result.get('details') or result.get('message') or result.get('error_code'))
+        )
+    if lost:
+        logger.warning('outbox.lease_lost rows=%s (raise --lease above the batch delivery time)', lost)
+    return sent
+
+
+def _capped(dispatch_options, lease_seconds):
+    # Start nothing after the lease runs out; another worker may own the rows by then
+    return dict(dispatch_options, deadline=min(
+        dispatch_options.get('deadline') or dispatch_settings()['deadline'], lease_seconds
+    ))
+
+
+def deliver_batch(batch_size=100, lease_seconds=300, max_attempts=MAX_ATTEMPTS, **dispatch_options):
+    """Claim, deliver and record one batch; returns (dispatch results, how many were marked sent)"""
+    rows = claim_batch(batch_size, lease_seconds)
+    if not rows:
+        return [], 0
+    results = dispatch([(row.booking_id, row.payload) for row in rows], **_capped(dispatch_options, lease_seconds))
+    return results, record_results(rows, results, max_attempts)
+
+
+async def adeliver_batch(batch_size=100, lease_seconds=300, max_attempts=MAX_ATTEMPTS, **dispatch_options):
+    """deliver_batch() with the deliveries awaited on the event loop"""
+    rows = await sync_to_async(claim_batch)(batch_size, lease_seconds)
+    if not rows:
+        return [], 0
+    results = await adispatch(
+        [(row.booking_id, row.payload) for row in rows], **_capped(dispatch_options, lease_seconds)
+    )
+    return results, await sync_to_async(record_results)(rows, results, max_attempts)
+
+
+def process_batch(batch_size=100, lease_seconds=300, max_attempts=MAX_ATTEMPTS, **dispatch_options):
+    """Claim, deliver and record one batch; returns (claimed, sent)"""
+    results, sent = deliver_batch(batch_size, lease_seconds, max_attempts, **dispatch_options)
+    return len(results), sent
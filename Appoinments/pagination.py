@@ -0,0 +1,66 @@
+# pagination.py (Keyset cursors over (date, start_time, id))
+import base64
+import heapq
+import json
+from datetime import date, time
+from itertools import islice
+
+from django.db.models import Q
+
+ORDERING = ('date', 'start_time', 'id')
+
+
+def instance_key(booking):
+    return booking.date, booking.start_time, booking.id
+
+
+def encode_cursor(key):
+    day, start, booking_id = key
+    raw = json.dumps([day.isoformat(), start.isoformat(), booking_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """(date, start_time, id) from an opaque cursor; ValueError if it was tampered with"""
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+        day, start, booking_id = json.loads(raw)
+        return date.fromisoformat(day), time.fromisoformat(start), int(booking_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def after(cursor):
+    """Rows strictly after the cursor in ORDERING"""
+    day, start, booking_id = cursor
+    return (
+        Q(date__gt=day)
+        | Q(date=day, start_time__gt=start)
+        | Q(date=day, start_time=start, id__gt=booking_id)
+    )
+
+
+def keyset_page(queryset, cursor=None, limit=50, key=instance_key):
+    """(rows, next_cursor); the cost is the same at page 1 and page 10,000
+
+    key() reads (date, start_time, id) from a row, for values_list() querysets.
+    """
+    return keyset_page_across([queryset], cursor, limit, key)
+
+
+def keyset_page_across(querysets, cursor=None, limit=50, key=instance_key):
+    """keyset_page() over several tables with disjoint ids (hot + archived bookings)
+
+    Each table contributes at most limit + 1 rows after the cursor, one
+    query each; the merged page is the first limit + 1 of those.
+    """
+    streams = []
+    for queryset in querysets:
+        queryset = queryset.order_by(*ORDERING)
+        if cursor is not None:
+            queryset = queryset.filter(after(cursor))
+        streams.append(list(queryset[:limit + 1]))
+    rows = list(islice(heapq.merge(*streams, key=key), limit + 1))
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(key(rows[limit - 1]))
+    return rows, None
@@ -0,0 +1,140 @@
+# profiling.py (Opt-in cProfile + SQL trace capture for individual requests)
+import cProfile
+import hmac
+import json
+import os
+import random
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'  # X-Profile: <PROFILING_TOKEN>
+
+
+def profiling_settings():
+    return {
+        'token': getattr(settings, 'PROFILING_TOKEN', ''),
+        'sample_rate': getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0),
+        'directory': Path(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles')),
+        'max_files': getattr(settings, 'PROFILING_MAX_FILES', 200),
+        'views': getattr(settings, 'PROFILING_VIEWS', None),  # None = any URL name
+    }
+
+
+class SQLTrace:
+    """connection.execute_wrapper hook keeping every statement with its timing"""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append({
+                'alias': self.alias,
+                'sql': sql,
+                'params': repr(params)[:500],
+                'many': many,
+                'ms': (time.perf_counter() - started) * 1000,
+            })
+
+
+def should_profile(request, config):
+    """Header with the right token, or a sampled request to one of the profiled views"""
+    token = request.META.get(PROFILE_HEADER)
+    if token and config['token'] and hmac.compare_digest(token, config['token']):
+        return True
+    if not (config['sample_rate'] > 0 and random.random() < config['sample_rate']):
+        return False
+    if config['views'] is None:
+        return True
+    try:
+        return resolve(request.path_info).url_name in config['views']
+    except Resolver404:
+        return False
+
+
+def capture(request, get_response, config):
+    """Run the request under cProfile and an SQL trace, then store both"""
+    profiler = cProfile.Profile()
+    traces = []
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            trace = SQLTrace(connection.alias)
+            traces.append(trace)
+            stack.enter_context(connection.execute_wrapper(trace))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    elapsed = time.perf_counter() - started
+
+    match = getattr(request, 'resolver_match', None)
+    statements = [statement for trace in traces for statement in trace.statements]
+    store(profiler, {
+        'view': match.url_name if match and match.url_name else 'unmatched',
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'duration_ms': elapsed * 1000,
+        'sql_count': len(statements),
+        'sql_ms': sum(statement['ms'] for statement in statements),
+        'sql': statements,
+    }, config)
+    return response
+
+
+def store(profiler, meta, config):
+    """Write <stamp>-<view>.prof (pstats) and .json (request + SQL trace), then trim"""
+    directory = config['directory']
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{meta['view']}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(directory / f'{stem}.prof')
+    meta['captured_at'] = time.time()
+    with open(directory / f'{stem}.json', 'w') as handle:
+        json.dump(meta, handle, indent=1, default=str)
+    enforce_retention(directory, config['max_files'])
+    return stem
+
+
+def list_profiles(directory):
+    """(stem, meta) for every capture, newest first"""
+    captures = []
+    for path in Path(directory).glob('*.json'):
+        try:
+            with open(path) as handle:
+                captures.append((path.stem, json.load(handle)))
+        except (OSError, ValueError):
+            continue
+    captures.sort(key=lambda item: item[1].get('captured_at', 0), reverse=True)
+    return captures
+
+
+def load_profile(directory, stem):
+    with open(Path(directory) / f'{stem}.json') as handle:
+        return json.load(handle)
+
+
+def enforce_retention(directory, max_files):
+    """Keep only the newest max_files captures"""
+    stems = sorted(
+        {path.stem for path in Path(directory).glob('*.json')},
+        key=lambda stem: os.path.getmtime(Path(directory) / f'{stem}.json'),
+        reverse=True
+    )
+    for stem in stems[max_files:]:
+        for suffix in ('.json', '.prof'):
+            try:
+                os.remove(Path(directory) / f'{stem}{suffix}')
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,36 @@
+# projections.py (values() projections shaped like the serializers, without field machinery)
+from .serializers import CenterSerializer, ServiceSerializer
+
+CENTER_FIELDS = CenterSerializer.Meta.fields
+SERVICE_FIELDS = ServiceSerializer.Meta.fields
+BOOKING_FIELDS = [
+    'id', 'date', 'start_time', 'end_time', 'customer_name', 'customer_id', 'vehicle_name', 'status'
+]
+# One joined SELECT; no model instances are built
+BOOKING_VALUES = (
+    BOOKING_FIELDS
+    + [f'center__{field}' for field in CENTER_FIELDS]
+    + [f'service__{field}' for field in SERVICE_FIELDS]
+)
+
+
+def booking_rows(queryset):
+    return queryset.values_list(*BOOKING_VALUES)
+
+
+def booking_dict(row):
+    """A booking_rows() tuple as BookingSerializer would render it"""
+    booking = dict(zip(BOOKING_FIELDS, row))
+    offset = len(BOOKING_FIELDS)
+    booking['center'] = dict(zip(CENTER_FIELDS, row[offset:offset + len(CENTER_FIELDS)]))
+    offset += len(CENTER_FIELDS)
+    service = dict(zip(SERVICE_FIELDS, row[offset:]))
+    if service['price'] is not None:
+        service['price'] = str(service['price'])  # DecimalField renders as a string
+    booking['service'] = service
+    return booking
+
+
+def booking_key(row):
+    """(date, start_time, id) of a booking_rows() tuple, for keyset cursors"""
+    return row[1], row[2], row[0]
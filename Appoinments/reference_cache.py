@@ -0,0 +1,95 @@
+# reference_cache.py (Versioned cache for the center/service lists plus conditional-GET validators)
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import routers
+
+
+def _cache():
+    return caches[getattr(settings, 'REFERENCE_CACHE_ALIAS', 'default')]
+
+
+def _version_key(kind):
+    return f'reference:{kind}:version'
+
+
+def _new_version(previous=None):
+    """A fresh token, with a Last-Modified past the previous version's where the clock allows
+
+    Last-Modified has one-second resolution, so a change in the same second
+    as a client's copy moves to the next second and still fails that copy's
+    If-Modified-Since. It never runs more than a second ahead of the clock
+    (later than Date, caches would ignore it); bursts of changes within one
+    second rely on the ETag.
+    """
+    now = int(time.time())
+    last_modified = now
+    if previous is not None:
+        last_modified = min(max(now, previous[1] + 1), now + 1)
+    return uuid.uuid4().hex, last_modified
+
+
+def current_version(kind):
+    """(token, last_modified) for a kind, creating it if never set or evicted"""
+    cache = _cache()
+    version = cache.get(_version_key(kind))
+    if version is None:
+        cache.add(_version_key(kind), _new_version(), None)
+        version = cache.get(_version_key(kind))
+    return version
+
+
+def bump(kind):
+    cache = _cache()
+    cache.set(_version_key(kind), _new_version(cache.get(_version_key(kind))), None)
+
+
+def bump_on_commit(kind):
+    """A new token now and a full bump() once the current transaction commits
+
+    Only the commit moves Last-Modified, so each change advances it once.
+    """
+    cache = _cache()
+    version = cache.get(_version_key(kind))
+    if version is not None:
+        cache.set(_version_key(kind), (uuid.uuid4().hex, version[1]), None)
+    transaction.on_commit(lambda: bump(kind))
+
+
+def get_items(kind, token, load):
+    """Serialized rows for the given version; load() runs only on a miss"""
+    cache = _cache()
+    key = f'reference:{kind}:items:{token}'
+    items = cache.get(key)
+    if items is None:
+        with routers.on_primary():
+            items = load()
+        cache.set(key, items, getattr(settings, 'REFERENCE_CACHE_TIMEOUT', 3600))
+    return items
+
+
+def etag(token, variant):
+    """Strong validator for one representation (fields/limit/offset) of a version"""
+    digest = hashlib.sha1(repr(variant).encode()).hexdigest()[:12]
+    return f'"{token}-{digest}"'
+
+
+def not_modified(request, tag, last_modified):
+    """True when the client's copy is current (If-None-Match wins over If-Modified-Since)"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        # Weak comparison, as GET allows; a compressing proxy may have added W/
+        candidates = [value.strip().removeprefix('W/') for value in if_none_match.split(',')]
+        return '*' in candidates or tag in candidates
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and last_modified <= since
+
+
+def validator_headers(tag, last_modified):
+    return {'ETag': tag, 'Last-Modified': http_date(last_modified), 'Cache-Control': 'no-cache'}
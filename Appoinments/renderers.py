@@ -0,0 +1,48 @@
+# renderers.py (JSON rendering for the hot read endpoints, via orjson when installed)
+import json
+
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional; the stdlib encoder is the fallback
+    orjson = None
+
+_fallback = JSONEncoder()
+
+
+def _default(obj):
+    # Decimal, UUID, lazy strings, querysets... exactly as DRF would encode them
+    return _fallback.default(obj)
+
+
+if orjson is not None:
+    # Dates and times go to DRF too: it cuts microseconds to milliseconds,
+    # orjson would keep them, and responses must not depend on orjson
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(data):
+        """Compact JSON as bytes"""
+        return orjson.dumps(data, default=_default, option=_OPTIONS)
+else:
+    def dumps(data):
+        """Compact JSON as bytes"""
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by dumps()
+
+    Output matches JSONRenderer, with or without orjson installed. Indented output (Accept: application/json; indent=N) still goes through DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+FAST_RENDERERS = [FastJSONRenderer, BrowsableAPIRenderer]
@@ -0,0 +1,116 @@
+# routers.py (Send read-only requests to weighted read replicas, everything else to 'default')
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.urls import Resolver404, resolve
+
+PIN_COOKIE = 'db_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+_unhealthy = {}  # alias -> time.monotonic() after which it is tried again
+
+
+def replica_settings():
+    return {
+        'weights': getattr(settings, 'DATABASE_REPLICAS', {}),
+        'retry': getattr(settings, 'DATABASE_REPLICA_RETRY_SECONDS', 30),
+        'pin_seconds': getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5),
+        'views': getattr(settings, 'DATABASE_REPLICA_VIEWS', ()),
+    }
+
+
+def healthy(alias, retry_seconds):
+    """Connect (or reuse the connection); a failure benches the alias for retry_seconds"""
+    if _unhealthy.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _unhealthy[alias] = time.monotonic() + retry_seconds
+        return False
+    _unhealthy.pop(alias, None)
+    return True
+
+
+def choose_replica(weights, retry_seconds, rng=random):
+    """Weighted pick among healthy replicas; None when all are down"""
+    candidates = {alias: weight for alias, weight in weights.items() if weight > 0}
+    while candidates:
+        alias = rng.choices(list(candidates), weights=list(candidates.values()))[0]
+        if healthy(alias, retry_seconds):
+            return alias
+        del candidates[alias]
+    return None
+
+
+@contextmanager
+def reads_from(alias):
+    """Route ORM reads in this block (and tasks/threads started from it) to alias"""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def on_primary():
+    """Read from 'default' in this block, even inside a replica-routed request
+
+    For results that outlive the request (cached slot lists, summary rows,
+    reference lists, the geo index): filled from a lagging replica, they would
+    keep serving the lag after the write that bumped their version.
+    """
+    return reads_from(None)
+
+
+def replica_for(request, config):
+    """The replica this request may read from, or None for the primary"""
+    if not config['weights'] or request.method not in SAFE_METHODS:
+        return None
+    if is_pinned(request):
+        return None
+    try:
+        url_name = resolve(request.path_info).url_name
+    except Resolver404:
+        return None
+    if url_name not in config['views']:
+        return None
+    return choose_replica(config['weights'], config['retry'])
+
+
+def is_pinned(request):
+    """True for a client that wrote recently (read-your-writes)"""
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def pin_after_write(request, response, config):
+    if config['weights'] and config['pin_seconds'] and request.method not in SAFE_METHODS \
+            and response.status_code < 400:
+        response.set_cookie(
+            PIN_COOKIE, str(time.time() + config['pin_seconds']),
+            max_age=config['pin_seconds'], httponly=True, samesite='Lax'
+        )
+    return response
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # Reads inside a write transaction (e.g. booking validation) stay on the primary
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Replicas hold the same rows as the primary
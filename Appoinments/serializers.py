@@ -4,17 +4,31 @@ from django.utils import timezone
 from django.db import models
 from .models import Booking, Center, Service
 from Appoinments import utils  # Make sure this imports your utils
+from . import pagination
 
 class CenterSerializer(serializers.ModelSerializer):
     class Meta:
         model = Center
-        fields = ['id', 'name', 'location']
+        fields = ['id', 'name', 'location', 'latitude', 'longitude']
 
 class ServiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Service
         fields = ['id', 'name', 'category', 'duration_minutes', 'price']
 
+class ReferenceListQuerySerializer(serializers.Serializer):
+    """fields/limit/offset for the center and service lists; context['fields'] lists what may be picked"""
+    fields = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, required=False)
+    offset = serializers.IntegerField(min_value=0, required=False)
+
+    def validate_fields(self, value):
+        fields = tuple(part.strip() for part in value.split(',') if part.strip())
+        unknown = [field for field in fields if field not in self.context['fields']]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown field(s): {', '.join(unknown)}")
+        return fields
+
 class BookingSerializer(serializers.ModelSerializer):
     center = CenterSerializer(read_only=True)
     service = ServiceSerializer(read_only=True)
@@ -27,14 +41,31 @@ class BookingSerializer(serializers.ModelSerializer):
                   'customer_name','customer_id', 'vehicle_name', 'status', 'center_id', 'service_id']
 
     def validate(self, data):  # data is passed as parameter here
-        # Check availability
-        center = Center.objects.get(id=data['center_id'])
-        service = Service.objects.get(id=data['service_id'])
+        # Resolve the objects once; BookingView and booking_engine reuse them
+        # from validated_data instead of fetching them again. Bulk callers
+        # pass pre-loaded {id: object} maps in the context instead.
+        centers = self.context.get('centers')
+        if centers is not None:
+            center = centers.get(data['center_id'])
+        else:
+            center = Center.objects.filter(id=data['center_id']).first()
+        if center is None:
+            raise serializers.ValidationError({'center_id': "Unknown center."})
+        services = self.context.get('services')
+        if services is not None:
+            service = services.get(data['service_id'])
+        else:
+            service = Service.objects.filter(id=data['service_id']).first()
+        if service is None:
+            raise serializers.ValidationError({'service_id': "Unknown service."})
+        data['center'] = center
+        data['service'] = service
+
         date = data['date']
         start_time = data['start_time']
         end_time = data['end_time']
 
-        # Compute if slot overlaps
+        # Compute slot duration
         proposed_start = timezone.datetime.combine(date, start_time)
         proposed_end = timezone.datetime.combine(date, end_time)
         duration = (proposed_end - proposed_start).total_seconds() / 60
@@ -42,47 +73,100 @@ class BookingSerializer(serializers.ModelSerializer):
         if abs(duration - service.duration_minutes) > 1:
             raise serializers.ValidationError("Duration must match service.")
 
-        # Check overlaps - CORRECTED SYNTAX
-        overlapping = Booking.objects.filter(
-            center=center,
-            date=date,
-            status='pending'
-        ).filter(
-            models.Q(start_time__lt=end_time, end_time__gt=start_time) |
-            models.Q(start_time__lt=start_time, end_time__gt=end_time)
-        ).exists()
-
-        if overlapping:
-            raise serializers.ValidationError("Slot overlaps with existing booking.")
-
         # Check workday bounds - make sure util has get_workday_start_end function
         workday_start, workday_end = utils.get_workday_start_end()  # Fixed from utils to util
         if start_time < workday_start or end_time > workday_end:
             raise serializers.ValidationError("Outside workday hours.")
 
-        # Check buffer with neighbors
-        prev_bookings = Booking.objects.filter(
-            center=center, date=date, status='pending', end_time__lte=start_time
-        ).order_by('-end_time')[:1]
-        
-        if prev_bookings:
-            prev_end = prev_bookings[0].end_time
-            if (timezone.datetime.combine(date, start_time) - 
-                timezone.datetime.combine(date, prev_end)).total_seconds() / 60 < utils.BUFFER_MINUTES:  # Fixed from utils to util
-                raise serializers.ValidationError("Too close to previous booking.")
-
-        next_bookings = Booking.objects.filter(
-            center=center, date=date, status='pending', start_time__gte=end_time
-        ).order_by('start_time')[:1]
-        
-        if next_bookings:
-            next_start = next_bookings[0].start_time
-            if (timezone.datetime.combine(date, next_start) - 
-                timezone.datetime.combine(date, end_time)).total_seconds() / 60 < utils.BUFFER_MINUTES:  # Fixed from utils to util
-                raise serializers.ValidationError("Too close to next booking.")
-
+        # Overlap and neighbour-buffer checks need the day's bookings; they run
+        # once, in memory, inside booking_engine.create_booking under the day lock
         return data
     
+class AvailabilityMatrixQuerySerializer(serializers.Serializer):
+    MAX_DAYS = 31
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    service_ids = serializers.CharField()
+
+    def validate_service_ids(self, value):
+        try:
+            ids = [int(part) for part in value.split(',') if part.strip()]
+        except ValueError:
+            raise serializers.ValidationError("Expected a comma separated list of service ids.")
+        if not ids:
+            raise serializers.ValidationError("At least one service id is required.")
+        return ids
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError("end_date must not be before start_date.")
+        if (data['end_date'] - data['start_date']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"Date range is limited to {self.MAX_DAYS} days.")
+        return data
+
+class EarliestSlotQuerySerializer(serializers.Serializer):
+    MAX_DAYS = 90
+    MAX_RESULTS = 50
+
+    centers = serializers.CharField(required=False)
+    k = serializers.IntegerField(min_value=1, max_value=MAX_RESULTS, default=5)
+    days = serializers.IntegerField(min_value=1, max_value=MAX_DAYS, default=14)
+    start_date = serializers.DateField(required=False)
+
+    def validate_centers(self, value):
+        try:
+            return [int(part) for part in value.split(',') if part.strip()]
+        except ValueError:
+            raise serializers.ValidationError("Expected a comma separated list of center ids.")
+
+class NearestCenterQuerySerializer(serializers.Serializer):
+    MAX_RESULTS = 50
+
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    m = serializers.IntegerField(min_value=1, max_value=MAX_RESULTS, default=10)
+    max_km = serializers.FloatField(min_value=0, required=False)
+    service_id = serializers.IntegerField(required=False)
+    date = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if ('service_id' in data) != ('date' in data):
+            raise serializers.ValidationError("service_id and date must be given together.")
+        return data
+
+class AvailabilityHeatmapQuerySerializer(serializers.Serializer):
+    MAX_DAYS = 90
+
+    start_date = serializers.DateField(required=False)
+    days = serializers.IntegerField(min_value=1, max_value=MAX_DAYS, default=30)
+
+class BookingExportQuerySerializer(serializers.Serializer):
+    format = serializers.ChoiceField(choices=['ndjson', 'csv'], default='ndjson')
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES, required=False)
+    center_id = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    include_archived = serializers.BooleanField(default=True)
+
+class BookingListQuerySerializer(serializers.Serializer):
+    MAX_LIMIT = 200
+
+    center_id = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES, required=False)
+    customer_id = serializers.CharField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=50)
+    include_archived = serializers.BooleanField(default=True)
+
+    def validate_cursor(self, value):
+        try:
+            return pagination.decode_cursor(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
 class BookingResponseSerializer:
     def __init__(self, booking):
         self.booking = booking
@@ -0,0 +1,105 @@
+# signals.py (Model signal handlers, connected in AppoinmentsConfig.ready)
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import availability_cache, booking_engine, geo, live, reference_cache
+from .models import Booking, Center, Service
+
+_booking_signals_muted = ContextVar('booking_signals_muted', default=False)
+
+
+@contextmanager
+def booking_signals_muted():
+    """Skip the per-booking cache/summary upkeep, e.g. when archiving past days"""
+    token = _booking_signals_muted.set(True)
+    try:
+        yield
+    finally:
+        _booking_signals_muted.reset(token)
+
+
+@receiver(pre_save, sender=Booking)
+def remember_previous_booking_day(sender, instance, **kwargs):
+    """Keep the old (center, date) of an edited booking so it is invalidated too"""
+    instance._previous_day = None
+    if instance.pk:
+        instance._previous_day = Booking.objects.filter(pk=instance.pk).values_list(
+            'center_id', 'date'
+        ).first()
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_day(sender, instance, **kwargs):
+    if _booking_signals_muted.get():
+        return
+    availability_cache.invalidate_day_on_commit(instance.center_id, instance.date)
+    previous = getattr(instance, '_previous_day', None)
+    if previous and previous != (instance.center_id, instance.date):
+        availability_cache.invalidate_day_on_commit(*previous)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def outdate_booking_day_summary(sender, instance, origin=None, **kwargs):
+    """Bump the day lock version for writes made outside booking_engine (admin, shell)
+
+    DayAvailability rows computed at an older version are recomputed on their
+    next read. booking_engine already bumped it under the lock it holds.
+    """
+    if _booking_signals_muted.get() or getattr(instance, '_day_locked', False):
+        return
+    if isinstance(origin, Center):
+        return  # Its day locks and summaries are deleted along with it
+    days = {(instance.center_id, instance.date)}
+    previous = getattr(instance, '_previous_day', None)
+    if previous:
+        days.add(previous)
+    for center_id, date in sorted(days, key=str):
+        booking_engine.lock_day(center_id, date)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def publish_booking_change(sender, instance, signal, created=False, **kwargs):
+    if _booking_signals_muted.get():
+        return
+    days = {(instance.center_id, instance.date)}
+    previous = getattr(instance, '_previous_day', None)
+    if previous:
+        days.add(previous)
+    change = 'deleted' if signal is post_delete else 'created' if created else 'updated'
+    live.publish_change_on_commit(days, live.booking_event(instance, change))
+
+
+@receiver(pre_save, sender=Service)
+def remember_previous_duration(sender, instance, **kwargs):
+    instance._duration_changed = False
+    if instance.pk:
+        previous = Service.objects.filter(pk=instance.pk).values_list('duration_minutes', flat=True).first()
+        instance._duration_changed = previous is not None and previous != instance.duration_minutes
+
+
+@receiver(post_save, sender=Service)
+def invalidate_on_duration_change(sender, instance, **kwargs):
+    if getattr(instance, '_duration_changed', False):
+        availability_cache.invalidate_all()
+        transaction.on_commit(availability_cache.invalidate_all)
+
+
+@receiver(post_save, sender=Center)
+@receiver(post_delete, sender=Center)
+def rebuild_center_index(sender, instance, **kwargs):
+    geo.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Center)
+@receiver(post_delete, sender=Center)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_reference_lists(sender, instance, **kwargs):
+    reference_cache.bump_on_commit('centers' if sender is Center else 'services')
@@ -0,0 +1,105 @@
+# slot_search.py (Earliest slots for a service across many centers)
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Booking
+from .occupancy import DayOccupancy
+from . import utils
+
+WINDOW_DAYS = 7  # Days of bookings loaded per query
+
+
+class DayWindows:
+    """Occupancy bitmaps for many centers, loaded one date window at a time
+
+    The first request for a day outside the loaded window fetches the next
+    WINDOW_DAYS for every center with a single query, so a search that is
+    satisfied early never reads the rest of the horizon.
+    """
+
+    def __init__(self, center_ids, end_date, window_days=WINDOW_DAYS):
+        self.center_ids = list(center_ids)
+        self.end_date = end_date
+        self.window_days = window_days
+        self.days = {}
+        self.queries = 0
+
+    def get(self, center_id, day):
+        if day not in self.days:
+            self._load(day)
+        return self.days[day].get(center_id) or DayOccupancy(day)
+
+    def _load(self, first_day):
+        last_day = min(first_day + timedelta(days=self.window_days - 1), self.end_date)
+        day = first_day
+        while day <= last_day:
+            self.days[day] = {}
+            day += timedelta(days=1)
+
+        rows = Booking.objects.filter(
+            center_id__in=self.center_ids,
+            date__range=(first_day, last_day),
+            status='booked'
+        ).values_list('center_id', 'date', 'start_time', 'end_time')
+        intervals = defaultdict(list)
+        for center_id, date, start_time, end_time in rows:
+            intervals[(center_id, date)].append((start_time, end_time))
+        for (center_id, date), day_intervals in intervals.items():
+            self.days[date][center_id] = DayOccupancy.from_intervals(date, day_intervals)
+        self.queries += 1
+
+
+def day_slots(center_ids, duration_minutes, day, windows, not_before=None):
+    """(start_time, center_id, slot) for every center on one day"""
+    for center_id in center_ids:
+        for slot in utils.get_possible_slots(center_id, day, duration_minutes, windows.get(center_id, day)):
+            if not_before and (day, slot['start_time']) <= not_before:
+                continue
+            yield slot['start_time'], center_id, slot
+
+
+def earliest_slots(center_ids, duration_minutes, k, start_date, days, not_before=None):
+    """The k earliest slots over all centers, as (date, center_id, slot)
+
+    Days are scanned in order for all centers at once, keeping the earliest
+    slots of each, and the scan stops on the first day that fills k. A fully
+    booked center therefore costs no more days than a free one. Ties on time
+    go to the lower center id.
+    """
+    end_date = start_date + timedelta(days=days - 1)
+    windows = DayWindows(center_ids, end_date)
+    center_ids = sorted(center_ids)
+    found = []
+    day = start_date
+    while day <= end_date and len(found) < k:
+        candidates = day_slots(center_ids, duration_minutes, day, windows, not_before)
+        found.extend(
+            (day, center_id, slot)
+            for _, center_id, slot in heapq.nsmallest(k - len(found), candidates, key=lambda item: item[:2])
+        )
+        day += timedelta(days=1)
+    return found
+
+
+def search(centers, service, k=5, days=14, start_date=None):
+    """Earliest k slots for `service` at `centers` from start_date (default today)"""
+    today = timezone.localdate()
+    start_date = start_date or today
+    # Nothing that has already started today
+    not_before = (today, timezone.localtime().time()) if start_date <= today else None
+    names = {center.id: center.name for center in centers}
+    return [
+        {
+            'center_id': center_id,
+            'center_name': names[center_id],
+            'date': day,
+            'start_time': slot['start_time'],
+            'end_time': slot['end_time'],
+        }
+        for day, center_id, slot in earliest_slots(
+            list(names), service.duration_minutes, k, start_date, days, not_before
+        )
+    ]
@@ -0,0 +1,102 @@
+# stub_service.py (Local stand-in for the booking microservice, for tests and benchmarks)
+"""
+Echoes POSTed JSON back the way httpbin.org/post does ({"json": ...}).
+
+    python -m Appoinments.stub_service --port 8001 --delay 0.05
+
+then set BOOKING_SERVICE_URL = 'http://127.0.0.1:8001/post'.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so pooled clients reuse connections
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        stub = self.server.stub
+        if stub.delay:
+            time.sleep(stub.delay)
+
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError:
+            payload = None
+        with stub.lock:
+            stub.received.append(payload)
+            stub.connections.add(self.client_address)
+
+        data = json.dumps({'json': payload, 'url': self.path}).encode()
+        self.send_response(stub.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # socketserver's 5 drops bursts of concurrent connects (1s SYN retry)
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up (timeouts, deadlines) are expected, not errors
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubBookingService:
+    """Threaded HTTP server on 127.0.0.1; use as a context manager"""
+
+    def __init__(self, port=0, delay=0.0, status=200):
+        self.delay = delay
+        self.status = status
+        self.received = []
+        self.connections = set()  # distinct client sockets seen
+        self.lock = threading.Lock()
+        self.server = _Server(('127.0.0.1', port), _Handler)
+        self.server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/post'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before answering')
+    parser.add_argument('--status', type=int, default=200)
+    args = parser.parse_args()
+    stub = StubBookingService(port=args.port, delay=args.delay, status=args.status)
+    print(f'Stub booking service listening on {stub.url}')
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -1,3 +1,1497 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import pstats
+import random
+import shutil
+import tempfile
+import threading
+from datetime import date, time, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from time import monotonic
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import Booking, BookingArchive, BookingDayLock, BookingOutbox, Center, DayAvailability, Service
+from .dispatch import adispatch, dispatch
+from . import dispatch as dispatch_module
+from .metrics import log_sampled, registry
+from .middleware import MetricsMiddleware, ProfilingMiddleware
+from .occupancy import DayOccupancy
+from .renderers import FastJSONRenderer
+from .serializers import BookingSerializer
+from .stub_service import StubBookingService
+from . import archive, availability_cache, benchmarks, booking_engine, day_summary, export, geo, idempotency, importer, live, outbox, pagination, profiling, projections, routers, slot_search, utils
+
+
+class BookingTestMixin:
+    """Shared fixtures: one center, a 60min service and a fixed weekday"""
+
+    day = date(2030, 1, 7)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.center = Center.objects.create(name='Main', location='Colombo')
+        cls.service = Service.objects.create(
+            name='Oil change', category='service', duration_minutes=60, price='50.00'
+        )
+
+    def setUp(self):
+        super().setUp()
+        # Primary keys are reused after each test's rollback, so cached slot
+        # lists from an earlier test could otherwise look current
+        caches['default'].clear()
+
+    def book(self, start, end, status='booked', day=None, center=None):
+        return Booking.objects.create(
+            center=center or self.center,
+            service=self.service,
+            date=day or self.day,
+            start_time=start,
+            end_time=end,
+            customer_name='Test',
+            status=status,
+        )
+
+
+class DayOccupancyTests(TestCase):
+    def test_free_runs_between_intervals(self):
+        occupancy = DayOccupancy.from_intervals(date(2030, 1, 7), [
+            (time(10, 0), time(11, 0)),
+            (time(13, 30), time(14, 0)),
+        ])
+        self.assertEqual(list(occupancy.free_runs(540, 1080)), [(540, 600), (660, 810), (840, 1080)])
+
+    def test_free_intervals_skip_short_gaps(self):
+        occupancy = DayOccupancy.from_intervals(date(2030, 1, 7), [
+            (time(9, 30), time(10, 0)),
+        ])
+        self.assertEqual(occupancy.free_intervals(60, 540, 1080), [(600, 1020)])
+
+    def test_is_free_with_buffers(self):
+        occupancy = DayOccupancy.from_intervals(date(2030, 1, 7), [
+            (time(10, 0), time(11, 0)),
+        ])
+        self.assertTrue(occupancy.is_free(time(11, 0), time(12, 0)))
+        self.assertFalse(occupancy.is_free(time(10, 30), time(11, 30)))
+        self.assertTrue(occupancy.is_free(time(11, 15), time(12, 15), buffer_before=15))
+        self.assertFalse(occupancy.is_free(time(11, 10), time(12, 10), buffer_before=15))
+        self.assertFalse(occupancy.is_free(time(8, 50), time(9, 50), buffer_after=15))
+
+
+class AvailabilityTests(BookingTestMixin, TestCase):
+    def test_free_intervals_single_query(self):
+        self.book(time(10, 0), time(11, 0))
+        self.book(time(14, 0), time(15, 0))
+        with self.assertNumQueries(1):
+            gaps = utils.get_free_intervals(self.center, self.day, 60)
+        self.assertEqual(gaps, [
+            (datetime(2030, 1, 7, 9, 0), datetime(2030, 1, 7, 9, 0)),
+            (datetime(2030, 1, 7, 11, 0), datetime(2030, 1, 7, 13, 0)),
+            (datetime(2030, 1, 7, 15, 0), datetime(2030, 1, 7, 17, 0)),
+        ])
+
+    def test_slots_ignore_pending_bookings(self):
+        self.book(time(9, 0), time(10, 0), status='pending')
+        slots = utils.get_possible_slots(self.center, self.day, 60)
+        self.assertEqual(slots[0]['start_time'], time(9, 0))
+        self.assertEqual(len(slots), 9)
+
+
+class BookingViewTests(BookingTestMixin, TestCase):
+    def payload(self, start, end):
+        return {
+            'center_id': self.center.id,
+            'service_id': self.service.id,
+            'date': self.day.isoformat(),
+            'start_time': start,
+            'end_time': end,
+            'customer_name': 'Test',
+        }
+
+    def errors_for(self, start, end):
+        response = self.client.post('/api/bookings/', self.payload(start, end))
+        if response.status_code == 201:
+            return []
+        return response.json().get('non_field_errors', [])
+
+    def test_overlap_and_buffers(self):
+        self.book(time(11, 0), time(12, 0), status='pending')
+        self.assertEqual(self.errors_for('11:30', '12:30'), ['Slot overlaps with existing booking.'])
+        self.assertEqual(self.errors_for('12:10', '13:10'), ['Too close to previous booking.'])
+        self.assertEqual(self.errors_for('09:50', '10:50'), ['Too close to next booking.'])
+        self.assertEqual(self.errors_for('12:15', '13:15'), [])
+
+    def test_outside_workday(self):
+        self.assertEqual(self.errors_for('17:30', '18:30'), ['Outside workday hours.'])
+
+    def test_unknown_center(self):
+        payload = self.payload('10:00', '11:00')
+        payload['center_id'] = 999
+        response = self.client.post('/api/bookings/', payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('center_id', response.json())
+
+    def test_validation_reuses_resolved_objects(self):
+        serializer = BookingSerializer(data=self.payload('10:00', '11:00'))
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['center'], self.center)
+        self.assertEqual(serializer.validated_data['service'], self.service)
+
+    def test_post_query_count_is_constant(self):
+        # Lock row already exists after the first booking of the day
+        self.client.post('/api/bookings/', self.payload('09:00', '10:00'))
+        # center + service, lock row INSERT ... IGNORE, savepoint, lock UPDATE,
+        # day bookings, booking and outbox INSERTs, release
+        with self.assertNumQueries(9):
+            response = self.client.post('/api/bookings/', self.payload('11:00', '12:00'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['center']['id'], self.center.id)
+        # Filling up the same day leaves the count alone
+        for hour in (12, 14):
+            self.book(time(hour, 30), time(hour + 1, 30), status='pending')
+        with self.assertNumQueries(9):
+            response = self.client.post('/api/bookings/', self.payload('17:00', '18:00'))
+        self.assertEqual(response.status_code, 201)
+
+    def test_rejected_post_query_count(self):
+        self.client.post('/api/bookings/', self.payload('09:00', '10:00'))
+        # Lookups, lock row, lock and day bookings, then a savepoint rollback
+        with self.assertNumQueries(8):
+            response = self.client.post('/api/bookings/', self.payload('09:30', '10:30'))
+        self.assertEqual(response.status_code, 400)
+
+
+class IdempotencyTests(BookingTestMixin, TestCase):
+    def post(self, key, start='09:00', end='10:00', **extra):
+        return self.client.post('/api/bookings/', {
+            'center_id': self.center.id, 'service_id': self.service.id, 'date': self.day.isoformat(),
+            'start_time': start, 'end_time': end, 'customer_name': 'Retry',
+        }, content_type='application/json', headers={'Idempotency-Key': key}, **extra)
+
+    def request(self, key, data=None):
+        """Stand-in for the request the test client sends"""
+        return mock.Mock(path='/api/bookings/', user=AnonymousUser(), data=data or {},
+                         META={'HTTP_IDEMPOTENCY_KEY': key, 'REMOTE_ADDR': '127.0.0.1'})
+
+    def test_retry_replays_created_response_without_queries(self):
+        first = self.post('abc')
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(0):
+            retry = self.post('abc')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+
+        self.assertEqual(self.post('abc', '11:00', '12:00').status_code, 422)
+        # Another key is a new request, rejected here because the slot is taken
+        self.assertEqual(self.post('def').status_code, 400)
+        self.assertEqual(self.post('x' * 300).status_code, 400)
+
+    def test_duplicate_in_flight_waits_for_first_result(self):
+        cache = caches['default']
+        response_key, lock_key = idempotency._keys(self.request('slow'), 'slow')
+        cache.add(lock_key, 'claimed', 30)
+
+        with self.settings(IDEMPOTENCY_WAIT_SECONDS=0):
+            busy = self.post('slow')
+        self.assertEqual((busy.status_code, busy.headers['Retry-After']), (409, '1'))
+
+        body_hash = idempotency.fingerprint({
+            'center_id': self.center.id, 'service_id': self.service.id, 'date': self.day.isoformat(),
+            'start_time': '09:00', 'end_time': '10:00', 'customer_name': 'Retry',
+        })
+        finish = threading.Timer(0.1, cache.set, (response_key, {
+            'fingerprint': body_hash, 'status': 201, 'data': {'id': 42},
+        }))
+        finish.start()
+        self.addCleanup(finish.cancel)
+        response = self.post('slow')
+        self.assertEqual((response.status_code, response.json()), (201, {'id': 42}))
+        self.assertFalse(Booking.objects.exists())
+
+    def test_expired_claim_taken_by_another_request_is_kept(self):
+        cache = caches['default']
+        request = self.request('late')
+        _, lock_key = idempotency._keys(request, 'late')
+
+        def create():
+            cache.set(lock_key, 'next request', 30)  # Our claim expired and was taken over
+            return Response(status=400)
+        idempotency.run(request, create)
+        self.assertEqual(cache.get(lock_key), 'next request')
+
+    def test_duplicate_runs_itself_when_first_ends_without_201(self):
+        _, lock_key = idempotency._keys(self.request('rejected'), 'rejected')
+        caches['default'].add(lock_key, 'first request', 30)
+        # The first request is turned away (no 201 stored) and lets go of the key
+        finish = threading.Timer(0.1, caches['default'].delete, (lock_key,))
+        finish.start()
+        self.addCleanup(finish.cancel)
+        started = monotonic()
+        response = self.post('rejected')
+        self.assertEqual(response.status_code, 201)
+        self.assertLess(monotonic() - started, 2)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_keys_are_scoped_per_client(self):
+        self.assertEqual(self.post('shared', REMOTE_ADDR='10.0.0.1').status_code, 201)
+        other = self.post('shared', '11:00', '12:00', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', other.headers)
+        self.assertEqual(Booking.objects.count(), 2)
+
+
+class AvailabilityMatrixTests(BookingTestMixin, TestCase):
+    def test_week_for_two_services_in_three_queries(self):
+        quick = Service.objects.create(name='Wash', category='service', duration_minutes=30, price='10.00')
+        self.book(time(9, 0), time(10, 0))
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/availability/{self.center.id}/', {
+                'start_date': '2030-01-07',
+                'end_date': '2030-01-13',
+                'service_ids': f'{self.service.id},{quick.id}',
+            })
+        self.assertEqual(response.status_code, 200)
+        days = response.json()['days']
+        self.assertEqual(len(days), 7)
+        self.assertEqual(days[0]['services'][str(self.service.id)]['slots'][0]['start_time'], '10:00:00')
+        self.assertEqual(days[1]['services'][str(self.service.id)]['slots'][0]['start_time'], '09:00:00')
+        self.assertTrue(days[0]['services'][str(quick.id)]['available'])
+
+    def test_rejects_long_ranges_and_unknown_services(self):
+        url = f'/api/availability/{self.center.id}/'
+        response = self.client.get(url, {
+            'start_date': '2030-01-01', 'end_date': '2030-03-01', 'service_ids': str(self.service.id)
+        })
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {
+            'start_date': '2030-01-07', 'end_date': '2030-01-07', 'service_ids': '999'
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_suggestions_read_the_summary_table(self):
+        # Cold: summary read, the gaps' lock versions and occupancy, one upsert
+        with self.assertNumQueries(4):
+            suggestions = utils.suggest_alternative_dates(self.center, self.service)
+        self.assertEqual(len(suggestions), 3)
+        self.assertEqual(DayAvailability.objects.filter(center=self.center).count(), 30)
+        with self.assertNumQueries(1):
+            self.assertEqual(utils.suggest_alternative_dates(self.center, self.service), suggestions)
+
+
+class DayAvailabilityTests(BookingTestMixin, TestCase):
+    def summary(self, day=None):
+        return DayAvailability.objects.get(
+            center=self.center, date=day or self.day, duration_minutes=self.service.duration_minutes
+        )
+
+    def current(self):
+        return day_summary.get_summaries(self.center, 60, self.day, self.day)[0]
+
+    def test_booking_writes_outdate_the_summary(self):
+        self.assertEqual(self.current().free_minutes, 9 * 60)
+        booking = booking_engine.create_booking(
+            center=self.center, service=self.service, date=self.day, start_time=time(9, 0),
+            end_time=time(10, 0), customer_name='Test', status='booked'
+        )
+        # The write only bumped the day lock; the stored row is recomputed on read
+        self.assertEqual(self.summary().free_minutes, 9 * 60)
+        summary = self.current()
+        self.assertEqual(summary.free_minutes, 8 * 60)
+        slots = utils.get_possible_slots(self.center, self.day, 60)
+        self.assertEqual((summary.num_slots, summary.earliest_start), (len(slots), slots[0]['start_time']))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.current().free_minutes, 8 * 60)
+
+        # Writes outside the engine (admin, shell) bump the version through the signal
+        booking.delete()
+        summary = self.current()
+        self.assertEqual(summary.free_minutes, 9 * 60)
+        self.assertEqual(summary.earliest_start, time(9, 0))
+        self.assertEqual(summary.version, BookingDayLock.objects.get(center=self.center, date=self.day).version)
+
+    def test_post_does_no_summary_work_after_commit(self):
+        payload = {
+            'center_id': self.center.id, 'service_id': self.service.id, 'date': self.day.isoformat(),
+            'start_time': '11:00', 'end_time': '12:00', 'customer_name': 'Test',
+        }
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.post('/api/bookings/', payload).status_code, 201)
+        self.assertFalse([query for query in queries.captured_queries if 'dayavailability' in query['sql']])
+
+    def test_late_upsert_of_an_older_snapshot_is_not_served(self):
+        self.current()
+        stale = day_summary.summarize(self.center.id, self.day, DayOccupancy(self.day), [60])
+        self.book(time(9, 0), time(10, 0))
+        day_summary.upsert(stale)  # a refresh that read the day before the write lands last
+        self.assertEqual(self.current().free_minutes, 8 * 60)
+
+    def test_bulk_bookings_outdate_the_summary(self):
+        self.current()
+        booking_engine.create_bookings([
+            {'center': self.center, 'service': self.service, 'date': self.day,
+             'start_time': time(9, 0), 'end_time': time(10, 0),
+             'customer_name': 'Bulk', 'status': 'booked'},
+        ])
+        self.assertEqual(self.current().free_minutes, 8 * 60)
+
+    def block_day(self):
+        # bulk_create skips both the duration check and the summary signals
+        Booking.objects.bulk_create([Booking(
+            center=self.center, service=self.service, date=self.day,
+            start_time=time(9, 0), end_time=time(18, 0), customer_name='Seed', status='booked'
+        )])
+
+    def test_rebuild_command(self):
+        self.block_day()
+        out = StringIO()
+        call_command('rebuild_day_availability', '--start-date', '2030-01-06', '--days', '3', stdout=out)
+        self.assertIn('Rebuilt 3 rows', out.getvalue())
+        summary = self.summary()
+        self.assertEqual((summary.free_minutes, summary.num_slots, summary.earliest_start), (0, 0, None))
+
+    def test_heatmap_endpoint(self):
+        self.block_day()
+        url = f'/api/availability/{self.center.id}/heatmap/{self.service.id}/'
+        response = self.client.get(url, {'start_date': '2030-01-06', 'days': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([day['num_slots'] for day in response.json()['days']], [9, 0, 9])
+        with self.assertNumQueries(3):  # center, service, summary rows
+            self.client.get(url, {'start_date': '2030-01-06', 'days': 3})
+        self.assertEqual(self.client.get(url, {'days': 91}).status_code, 400)
+
+
+class SlotSearchTests(BookingTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.others = [Center.objects.create(name=f'Branch {i}', location='Kandy') for i in range(2)]
+        blocks = [
+            (cls.center, cls.day, time(9, 0), time(18, 0)),
+            (cls.others[0], cls.day, time(9, 0), time(12, 0)),
+            (cls.others[1], cls.day, time(10, 0), time(16, 0)),
+            (cls.others[1], cls.day + timedelta(days=1), time(9, 0), time(11, 0)),
+        ]
+        Booking.objects.bulk_create([
+            Booking(center=center, service=cls.service, date=day, start_time=start, end_time=end,
+                    customer_name='Seed', status='booked')
+            for center, day, start, end in blocks
+        ])
+
+    def test_matches_per_center_slot_lists(self):
+        centers = [self.center] + self.others
+        expected = sorted(
+            (day, slot['start_time'], center.id)
+            for center in centers
+            for day in (self.day, self.day + timedelta(days=1))
+            for slot in utils.get_possible_slots(center, day, 60)
+        )[:12]
+        found = slot_search.earliest_slots([c.id for c in centers], 60, 12, self.day, 2)
+        self.assertEqual([(day, slot['start_time'], center_id) for day, center_id, slot in found], expected)
+
+    def test_stops_after_first_window(self):
+        center_ids = [self.center.id] + [center.id for center in self.others]
+        with self.assertNumQueries(1):
+            found = slot_search.earliest_slots(center_ids, 60, 3, self.day, 90)
+        self.assertEqual({day for day, _, _ in found}, {self.day})
+
+    def test_fully_booked_center_does_not_scan_the_horizon(self):
+        full = Center.objects.create(name='Full', location='Kandy')
+        Booking.objects.bulk_create([
+            Booking(center=full, service=self.service, date=self.day + timedelta(days=offset),
+                    start_time=time(9, 0), end_time=time(18, 0), customer_name='Seed', status='booked')
+            for offset in range(90)
+        ])
+        with self.assertNumQueries(1):
+            found = slot_search.earliest_slots([full.id, self.others[0].id], 60, 3, self.day, 90)
+        self.assertEqual({center_id for _, center_id, _ in found}, {self.others[0].id})
+
+    def test_endpoint(self):
+        url = f'/api/availability/earliest/{self.service.id}/'
+        response = self.client.get(url, {'start_date': '2030-01-07', 'k': 2, 'centers': str(self.center.id)})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 2)
+        self.assertEqual({result['date'] for result in results}, {'2030-01-08'})
+        self.assertEqual(self.client.get(url, {'centers': '999'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'k': 0}).status_code, 400)
+
+
+class GeoTests(BookingTestMixin, TestCase):
+    def test_grid_matches_brute_force(self):
+        rng = random.Random(3)
+        points = [(i, rng.uniform(5, 10), rng.uniform(79, 82)) for i in range(300)]
+        points += [(300, 51.5, -0.1), (301, -33.9, 151.2)]
+        index = geo.GridIndex(points)
+        for lat, lon in [(6.9, 79.9), (9.7, 80.0), (40.0, 0.0)]:
+            expected = sorted((geo.haversine_km(lat, lon, p_lat, p_lon), i) for i, p_lat, p_lon in points)
+            self.assertEqual(list(index.iter_nearest(lat, lon)), expected)
+
+    def test_polar_query_does_not_scan_to_the_extent(self):
+        class CountingIndex(geo.GridIndex):
+            visits = 0
+
+            def _ring(self, row, col, radius):
+                for cell in super()._ring(row, col, radius):
+                    self.visits += 1
+                    yield cell
+
+        points = [(1, 6.9, 79.9), (2, 9.7, 80.0), (3, 7.3, 80.6)]
+        index = CountingIndex(points)
+        expected = sorted((geo.haversine_km(-89.9, -179.9, p_lat, p_lon), i) for i, p_lat, p_lon in points)
+        self.assertEqual(list(index.iter_nearest(-89.9, -179.9)), expected)
+        self.assertLess(index.visits, 20)
+
+    def test_max_km_stops_the_search(self):
+        def candidates():
+            yield 1.0, 1
+            yield 60.0, 2
+            raise AssertionError('read past max_km')
+        index = mock.Mock(iter_nearest=mock.Mock(return_value=candidates()))
+        with mock.patch.object(geo, 'get_index', return_value=index):
+            self.assertEqual(geo.nearest(6.9, 79.9, 5, max_km=50), [(1.0, 1, None)])
+
+    def test_nearest_endpoint_with_availability(self):
+        Center.objects.filter(id=self.center.id).update(latitude=6.93, longitude=79.85)
+        near = Center.objects.create(name='Near', location='Dehiwala', latitude=6.85, longitude=79.86)
+        Center.objects.create(name='Far', location='Jaffna', latitude=9.66, longitude=80.02)
+        Center.objects.create(name='Unmapped', location='Unknown')
+        Booking.objects.bulk_create([Booking(
+            center=near, service=self.service, date=self.day,
+            start_time=time(9, 0), end_time=time(18, 0), customer_name='Seed', status='booked'
+        )])
+
+        response = self.client.get('/api/centers/nearest/', {'lat': 6.84, 'lon': 79.87, 'm': 2})
+        self.assertEqual([c['name'] for c in response.json()['results']], ['Near', 'Main'])
+
+        response = self.client.get('/api/centers/nearest/', {
+            'lat': 6.84, 'lon': 79.87, 'm': 2, 'service_id': self.service.id, 'date': '2030-01-07'
+        })
+        results = response.json()['results']
+        self.assertEqual([c['name'] for c in results], ['Main', 'Far'])
+        self.assertEqual(results[0]['earliest_start'], '09:00:00')
+
+        response = self.client.get('/api/centers/nearest/', {'lat': 6.84, 'lon': 79.87, 'max_km': 50})
+        self.assertEqual([c['name'] for c in response.json()['results']], ['Near', 'Main'])
+        self.assertEqual(self.client.get('/api/centers/nearest/', {'lat': 6.84}).status_code, 400)
+
+    def test_index_follows_center_changes(self):
+        center = Center.objects.create(name='Moved', location='X', latitude=0.0, longitude=0.0)
+        self.assertEqual(geo.nearest(0.0, 0.0, 1)[0][1], center.id)
+        center.latitude = center.longitude = None
+        center.save()
+        self.assertEqual(geo.nearest(0.0, 0.0, 1), [])
+
+
+class ReferenceListTests(BookingTestMixin, TestCase):
+    def test_cached_with_conditional_get(self):
+        first = self.client.get('/api/centers/')
+        self.assertEqual(first.json()[0]['name'], 'Main')
+        with self.assertNumQueries(0):
+            again = self.client.get('/api/centers/')
+        self.assertEqual(again.json(), first.json())
+        self.assertIn('Last-Modified', again)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/centers/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get('/api/centers/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        Center.objects.create(name='Second', location='Galle')
+        response = self.client.get('/api/centers/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_change_in_the_same_second_fails_if_modified_since(self):
+        with mock.patch('Appoinments.reference_cache.time.time', return_value=1893456000.2):
+            first = self.client.get('/api/centers/')
+            with self.captureOnCommitCallbacks(execute=True):
+                Center.objects.create(name='Second', location='Galle')
+            response = self.client.get('/api/centers/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_burst_of_changes_keeps_last_modified_near_the_clock(self):
+        with mock.patch('Appoinments.reference_cache.time.time', return_value=1893456000.2):
+            self.client.get('/api/centers/')
+            for i in range(20):
+                with self.captureOnCommitCallbacks(execute=True):
+                    Center.objects.create(name=f'Burst {i}', location='Galle')
+            response = self.client.get('/api/centers/')
+        self.assertLessEqual(parse_http_date(response['Last-Modified']), 1893456001)
+
+    def test_service_change_invalidates(self):
+        self.client.get('/api/services/')
+        self.service.name = 'Full service'
+        self.service.save()
+        self.assertEqual(self.client.get('/api/services/').json()[0]['name'], 'Full service')
+
+    def test_fields_and_pagination(self):
+        second = Center.objects.create(name='Second', location='Galle')
+        response = self.client.get('/api/centers/', {'fields': 'id,name', 'limit': 1, 'offset': 1})
+        self.assertEqual(response.json(), {'count': 2, 'results': [{'id': second.id, 'name': 'Second'}]})
+        self.assertNotEqual(response['ETag'], self.client.get('/api/centers/')['ETag'])
+        self.assertEqual(self.client.get('/api/centers/', {'fields': 'secret'}).status_code, 400)
+
+
+class BookingListTests(BookingTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Booking.objects.bulk_create([
+            Booking(center=cls.center, service=cls.service, date=cls.day + timedelta(days=offset),
+                    start_time=time(hour, 0), end_time=time(hour + 1, 0), customer_name='List',
+                    customer_id=f'C{hour % 2}', status='booked' if offset else 'pending')
+            for offset in range(3) for hour in (15, 9, 12)
+        ])
+
+    def walk(self, **params):
+        seen, cursor = [], None
+        while True:
+            if cursor:
+                params['cursor'] = cursor
+            body = self.client.get('/api/bookings/', params).json()
+            seen.extend((row['date'], row['start_time']) for row in body['results'])
+            cursor = body['next_cursor']
+            if not cursor:
+                return seen
+
+    def test_pages_follow_keyset_order(self):
+        seen = self.walk(limit=2)
+        self.assertEqual(len(seen), 9)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_filters(self):
+        self.assertEqual(len(self.walk(status='pending')), 3)
+        self.assertEqual(len(self.walk(customer_id='C1', date_from='2030-01-08')), 4)
+        self.assertEqual(len(self.walk(center_id=self.center.id, date_to='2030-01-07', limit=1)), 3)
+
+    def test_constant_queries_per_page(self):
+        first = self.client.get('/api/bookings/', {'limit': 2}).json()
+        with self.assertNumQueries(2):  # One keyset read per table (hot + archive)
+            response = self.client.get('/api/bookings/', {'limit': 2, 'cursor': first['next_cursor']})
+        self.assertEqual(response.json()['results'][0]['center']['name'], 'Main')
+        self.assertEqual(self.client.get('/api/bookings/', {'cursor': 'nope'}).status_code, 400)
+
+
+class RenderingTests(BookingTestMixin, TestCase):
+    def test_projection_matches_serializer(self):
+        self.book(time(9, 0), time(10, 0))
+        expected = json.loads(JSONRenderer().render(
+            BookingSerializer(Booking.objects.select_related('center', 'service'), many=True).data
+        ))
+        rows = projections.booking_rows(Booking.objects.all())
+        rendered = FastJSONRenderer().render([projections.booking_dict(row) for row in rows])
+        self.assertEqual(json.loads(rendered), expected)
+
+    def test_fast_renderer_matches_default(self):
+        data = {
+            'slots': utils.get_possible_slots(self.center, self.day, 60),
+            'services': {self.service.id: [Decimal('50.00'), date(2030, 1, 7)]},
+        }
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_fast_renderer_times_match_default(self):
+        data = {
+            'at': datetime(2030, 1, 7, 9, 30, 15, 123456, tzinfo=timezone.get_fixed_timezone(0)),
+            'start': time(9, 30, 15, 654321),
+            'day': date(2030, 1, 7),
+        }
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+    def test_render_benchmark(self):
+        self.book(time(9, 0), time(10, 0))
+        results = benchmarks.render_scenarios(sizes=(10,), repeat=1)
+        self.assertEqual(set(results), {'bookings_10', 'slots_10'})
+        self.assertEqual(results['bookings_10']['items'], 1)
+
+
+class AsyncViewTests(BookingTestMixin, TestCase):
+    async def test_availability_matches_sync_view(self):
+        await Booking.objects.abulk_create([Booking(
+            center=self.center, service=self.service, date=self.day,
+            start_time=time(9, 0), end_time=time(12, 0), customer_name='Seed', status='booked'
+        )])
+        path = f'/api/availability/{self.center.id}/2030-01-07/{self.service.id}/'
+        response = await self.async_client.get(f'/api/async{path[4:]}')
+        self.assertEqual(response.status_code, 200)
+        await caches['default'].aclear()
+        self.assertEqual(response.json(), (await sync_to_async(self.client.get)(path)).json())
+
+        missing = await self.async_client.get(f'/api/async/availability/999/2030-01-07/{self.service.id}/')
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_concurrent_requests(self):
+        responses = await asyncio.gather(*(
+            self.async_client.get(f'/api/async/availability/{self.center.id}/2030-01-{day:02d}/{self.service.id}/')
+            for day in range(7, 17)
+        ))
+        self.assertEqual({response.status_code for response in responses}, {200})
+
+    async def test_send_booking(self):
+        await sync_to_async(self.book)(time(9, 0), time(10, 0), status='pending')
+        with StubBookingService() as stub:
+            with self.settings(BOOKING_SERVICE_URL=stub.url):
+                response = await self.async_client.post('/api/async/sendbooking/')
+        body = response.json()
+        self.assertEqual(body['status'], 'completed')
+        self.assertEqual([result['status'] for result in body['results']], ['pending'])
+        self.assertEqual(len(stub.received), 1)
+
+    def test_middleware_stays_async(self):
+        async def view(request):
+            return None
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(view)))
+        self.assertTrue(iscoroutinefunction(ProfilingMiddleware(view)))
+
+
+class AvailabilityStreamTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        live.reset_broker()
+        self.addCleanup(live.reset_broker)
+
+    async def test_broker_fans_out_across_threads_and_resyncs_laggards(self):
+        broker = live.LocalBroker(queue_size=2)
+        async with broker.subscribe('day') as first, broker.subscribe('day') as second:
+            await asyncio.to_thread(broker.publish, 'day', {'n': 1})
+            self.assertEqual(await asyncio.wait_for(first.get(), 1), {'n': 1})
+            for n in (2, 3):
+                broker.publish('day', {'n': n})
+            await asyncio.sleep(0)
+            self.assertEqual([await first.get(), await first.get()], [{'n': 2}, {'n': 3}])
+            # second's queue was full when 3 arrived, so it is told to start over
+            self.assertIs(await second.get(), live.RESYNC)
+        self.assertFalse(broker.has_subscribers('day'))
+
+    async def test_booking_change_pushes_slot_diff(self):
+        broker = live.get_broker()
+        async with broker.subscribe(live.channel_name(self.center.id, self.day)) as subscription:
+            snapshot = await sync_to_async(live.snapshot)(self.center.id, self.day)
+            # Another stream connecting to the unchanged day shares the version
+            self.assertEqual((await sync_to_async(live.snapshot)(self.center.id, self.day))['version'],
+                             snapshot['version'])
+
+            def create():
+                with self.captureOnCommitCallbacks(execute=True):
+                    return self.book(time(9, 0), time(10, 0))
+            booking = await sync_to_async(create)()
+            message = await asyncio.wait_for(subscription.get(), 1)
+        self.assertEqual(message['booking'], {
+            'id': booking.id, 'change': 'created', 'start_time': '09:00', 'end_time': '10:00', 'status': 'booked',
+        })
+        self.assertFalse(message['full'])
+        self.assertEqual(message['base'], snapshot['version'])
+        self.assertEqual(message['slots'], {'60': {'added': [], 'removed': ['09:00']}})
+
+        # Nobody listening: nothing is computed or sent
+        self.assertFalse(await sync_to_async(live.publish_change)(self.center.id, self.day, {}))
+
+    async def test_bulk_bookings_push_one_change_per_day(self):
+        broker = live.get_broker()
+        async with broker.subscribe(live.channel_name(self.center.id, self.day)) as subscription:
+            await sync_to_async(live.snapshot)(self.center.id, self.day)
+
+            def post():
+                items = [{
+                    'center_id': self.center.id, 'service_id': self.service.id, 'date': self.day.isoformat(),
+                    'start_time': start, 'end_time': end, 'customer_name': 'Fleet', 'status': 'booked',
+                } for start, end in (('09:00', '10:00'), ('13:00', '14:00'))]
+                with self.captureOnCommitCallbacks(execute=True):
+                    return self.client.post('/api/bookings/bulk/', {'bookings': items}, content_type='application/json')
+            response = await sync_to_async(post)()
+            self.assertEqual(response.status_code, 201)
+            message = await asyncio.wait_for(subscription.get(), 1)
+        self.assertEqual([event['start_time'] for event in message['bookings']], ['09:00', '13:00'])
+        self.assertEqual(message['slots']['60']['removed'], ['09:00', '13:00'])
+
+    async def test_stream_sends_snapshot_then_changes(self):
+        with self.settings(AVAILABILITY_STREAM_HEARTBEAT=0.05, AVAILABILITY_STREAM_MAX_SECONDS=1):
+            response = await self.async_client.get(f'/api/stream/availability/{self.center.id}/2030-01-07/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = response.streaming_content
+        self.assertEqual(await anext(frames), b'retry: 3000\n\n')
+        snapshot = (await asyncio.wait_for(anext(frames), 5)).decode()
+        self.assertTrue(snapshot.startswith('event: snapshot\n'))
+        self.assertIn('"09:00"', snapshot)
+
+        booking = await sync_to_async(self.book)(time(9, 0), time(10, 0))
+        await sync_to_async(live.publish_change)(self.center.id, self.day, live.booking_event(booking, 'created'))
+        change = (await asyncio.wait_for(anext(frames), 5)).decode()
+        while change.startswith(':'):
+            change = (await asyncio.wait_for(anext(frames), 5)).decode()
+        self.assertEqual(json.loads(change.split('data: ', 1)[1])['slots']['60']['removed'], ['09:00'])
+
+        # A change published elsewhere moved the shared base without reaching this stream
+        key = f'availability:stream:{self.center.id}:{self.day}'
+        await caches['default'].aset(key, dict(await caches['default'].aget(key), version='elsewhere'))
+        booking = await sync_to_async(self.book)(time(13, 0), time(14, 0))
+        await sync_to_async(live.publish_change)(self.center.id, self.day, live.booking_event(booking, 'created'))
+        rest = [frame.decode() async for frame in frames]
+        self.assertFalse([frame for frame in rest if frame.startswith('event: change')])
+        resync = [json.loads(frame.split('data: ', 1)[1]) for frame in rest if frame.startswith('event: snapshot')]
+        self.assertNotIn('13:00', resync[0]['slots']['60'])
+        self.assertIn(': keepalive\n\n', rest)
+        # The stream ended after AVAILABILITY_STREAM_MAX_SECONDS and let go of its queue
+        self.assertFalse(live.get_broker().has_subscribers(live.channel_name(self.center.id, self.day)))
+
+        bad = await self.async_client.get(f'/api/stream/availability/{self.center.id}/someday/')
+        self.assertEqual(bad.status_code, 400)
+
+
+class AvailabilityCacheTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        availability_cache.reset_stats()
+
+    def test_hit_after_miss(self):
+        first = availability_cache.get_cached_slots(self.center, self.day, 60)
+        with self.assertNumQueries(0):
+            second = availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.assertEqual(first, second)
+        stats = availability_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_booking_save_and_delete_invalidate_day(self):
+        availability_cache.get_cached_slots(self.center, self.day, 60)
+        booking = self.book(time(9, 0), time(10, 0))
+        slots = availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.assertEqual(slots[0]['start_time'], time(10, 0))
+        booking.delete()
+        slots = availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.assertEqual(slots[0]['start_time'], time(9, 0))
+        self.assertEqual(availability_cache.stats()['misses'], 3)
+
+    def test_other_days_stay_cached(self):
+        availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.book(time(9, 0), time(10, 0), day=date(2030, 1, 8))
+        availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.assertEqual(availability_cache.stats()['hits'], 1)
+
+    def test_service_duration_change_invalidates_everything(self):
+        availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.service.duration_minutes = 45
+        self.service.save()
+        availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.assertEqual(availability_cache.stats()['misses'], 2)
+
+
+class BookingEngineTests(BookingTestMixin, TestCase):
+    def create(self, start, end):
+        return booking_engine.create_booking(
+            center=self.center, service=self.service, date=self.day,
+            start_time=start, end_time=end, customer_name='Test'
+        )
+
+    def test_lock_row_created_once_and_versioned(self):
+        self.create(time(9, 0), time(10, 0))
+        self.create(time(11, 0), time(12, 0))
+        lock = BookingDayLock.objects.get(center=self.center, date=self.day)
+        self.assertEqual(lock.version, 2)
+
+    def test_lock_row_inserted_before_the_transaction(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.create(time(9, 0), time(10, 0))
+        statements = [query['sql'] for query in queries.captured_queries]
+        insert = next(i for i, sql in enumerate(statements) if sql.startswith('INSERT') and 'bookingdaylock' in sql)
+        savepoint = next(i for i, sql in enumerate(statements) if sql.startswith('SAVEPOINT'))
+        self.assertLess(insert, savepoint)
+        # The locked write itself only ever updates the row
+        self.assertFalse(any(sql.startswith('INSERT') and 'bookingdaylock' in sql for sql in statements[savepoint:]))
+
+    def test_rejects_conflict_under_lock(self):
+        self.create(time(9, 0), time(10, 0))
+        with self.assertRaisesMessage(serializers.ValidationError, 'Too close to previous booking.'):
+            self.create(time(10, 5), time(11, 5))
+
+    def test_exact_match_with_booked_row(self):
+        self.book(time(9, 0), time(10, 0), status='booked')
+        with self.assertRaisesMessage(serializers.ValidationError, 'Slot overlaps with existing booking.'):
+            self.create(time(9, 0), time(10, 0))
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Parallel writers hammering the same day must never double-book"""
+
+    THREADS = 8
+
+    def setUp(self):
+        self.center = Center.objects.create(name='Main', location='Colombo')
+        self.service = Service.objects.create(
+            name='Oil change', category='service', duration_minutes=60, price='50.00'
+        )
+        self.day = date(2030, 1, 7)
+
+    def test_no_double_booking(self):
+        # Overlapping 60min candidates every 15 minutes across the day
+        candidates = [
+            (datetime(2030, 1, 7, 9, 0) + timedelta(minutes=15 * i)) for i in range(33)
+        ]
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def writer(seed):
+            order = candidates[:]
+            random.Random(seed).shuffle(order)
+            barrier.wait()
+            try:
+                for start in order:
+                    try:
+                        booking_engine.create_booking(
+                            center=self.center, service=self.service, date=self.day,
+                            start_time=start.time(),
+                            end_time=(start + timedelta(minutes=60)).time(),
+                            customer_name=f'Writer {seed}'
+                        )
+                    except serializers.ValidationError:
+                        pass
+            except Exception as exc:  # pragma: no cover - surfaced below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        bookings = list(Booking.objects.filter(center=self.center, date=self.day).order_by('start_time'))
+        self.assertGreater(len(bookings), 0)
+        for previous, current in zip(bookings, bookings[1:]):
+            gap = (datetime.combine(self.day, current.start_time) -
+                   datetime.combine(self.day, previous.end_time)).total_seconds() / 60
+            self.assertGreaterEqual(gap, utils.BUFFER_MINUTES)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """'replica' mirrors the test database through its own SQLite connection"""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        caches['default'].clear()
+        routers._unhealthy.clear()
+        self.center = Center.objects.create(name='Main', location='Colombo')
+        self.service = Service.objects.create(
+            name='Oil change', category='service', duration_minutes=60, price='50.00'
+        )
+        self.replicas = self.settings(DATABASE_REPLICAS={'replica': 1})
+        self.replicas.enable()
+        self.addCleanup(self.replicas.disable)
+
+    def queries(self, path, method='get', **data):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(path, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response, len(primary), len(replica)
+
+    def test_read_only_views_use_the_replica(self):
+        _, primary, replica = self.queries('/api/bookings/export/')
+        self.assertEqual((primary, replica), (0, 2))  # Hot table and archive
+
+    def test_cached_results_are_filled_from_the_primary(self):
+        # A lagging replica must not be cached under the freshly bumped version
+        response, primary, replica = self.queries('/api/centers/')
+        self.assertEqual(response.json()[0]['name'], 'Main')
+        self.assertEqual((primary, replica), (1, 0))
+        # Center and service lookups on the replica, the day's occupancy on the primary
+        _, primary, replica = self.queries(f'/api/availability/{self.center.id}/2030-01-07/{self.service.id}/')
+        self.assertEqual((primary, replica), (1, 2))
+        _, primary, _ = self.queries(f'/api/availability/{self.center.id}/heatmap/{self.service.id}/',
+                                     start_date='2030-01-07', days=3)
+        self.assertGreater(primary, 0)
+
+    def test_writes_stay_on_primary_and_pin_the_client(self):
+        response, _, replica = self.queries('/api/bookings/', method='post', **{
+            'center_id': self.center.id, 'service_id': self.service.id, 'date': '2030-01-07',
+            'start_time': '09:00', 'end_time': '10:00', 'customer_name': 'Pinned',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(replica, 0)
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+        _, _, replica = self.queries(f'/api/availability/{self.center.id}/2030-01-07/{self.service.id}/')
+        self.assertEqual(replica, 0)
+        self.client.cookies.clear()
+        _, _, replica = self.queries(f'/api/availability/{self.center.id}/2030-01-08/{self.service.id}/')
+        self.assertGreater(replica, 0)
+
+    def test_reads_inside_a_transaction_use_the_primary(self):
+        with routers.reads_from('replica'):
+            self.assertEqual(routers.ReplicaRouter().db_for_read(Center), 'replica')
+            with transaction.atomic():
+                self.assertEqual(routers.ReplicaRouter().db_for_read(Booking), 'default')
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        with CaptureQueriesContext(connections['default']) as primary:
+            with mock.patch.object(connections['replica'], 'ensure_connection', side_effect=OperationalError):
+                self.assertEqual(self.client.get('/api/centers/').status_code, 200)
+        self.assertEqual(len(primary), 1)
+        self.assertIn('replica', routers._unhealthy)
+
+    def test_weighted_choice_skips_zero_weight(self):
+        choices = {routers.choose_replica({'replica': 1, 'default': 0}, 30) for _ in range(20)}
+        self.assertEqual(choices, {'replica'})
+
+
+class SendBookingTests(BookingTestMixin, TestCase):
+    def test_dispatches_concurrently_over_pooled_connections(self):
+        for hour in range(9, 17):
+            self.book(time(hour, 0), time(hour + 1, 0), status='pending')
+
+        with StubBookingService(delay=0.2) as stub:
+            with self.settings(BOOKING_SERVICE_URL=stub.url, BOOKING_DISPATCH_CONCURRENCY=8):
+                started = monotonic()
+                # Queue the bookings with no outbox row (select + insert), claim
+                # (savepoint, select, update, release, fetch), mark sent
+                with self.assertNumQueries(8):
+                    response = self.client.post('/api/sendbooking/')
+                elapsed = monotonic() - started
+
+        body = response.json()
+        self.assertEqual(body['status'], 'completed')
+        self.assertEqual([r['status'] for r in body['results']], ['pending'] * 8)
+        self.assertEqual(body['results'][0]['response']['json']['center'], 'Main')
+        self.assertEqual(len(stub.received), 8)
+        # Eight 200ms round trips in parallel, not back to back
+        self.assertLess(elapsed, 1.0)
+
+    def test_shares_the_outbox_with_process_outbox(self):
+        queued = booking_engine.create_booking(
+            center=self.center, service=self.service, date=self.day,
+            start_time=time(9, 0), end_time=time(10, 0), customer_name='Queued'
+        )
+        self.book(time(11, 0), time(12, 0), status='pending')  # no outbox row
+        with StubBookingService() as stub:
+            with self.settings(BOOKING_SERVICE_URL=stub.url):
+                self.assertEqual(outbox.process_batch(), (1, 1))
+                first = self.client.post('/api/sendbooking/').json()
+                again = self.client.post('/api/sendbooking/').json()
+        self.assertEqual([result['booking_id'] for result in first['results']],
+                         [BookingOutbox.objects.exclude(booking=queued).get().booking_id])
+        self.assertEqual(again['status'], 'empty')
+        self.assertEqual(len(stub.received), 2)
+
+    def test_reuses_connections_and_reports_errors(self):
+        items = [(i, {'n': i}) for i in range(20)]
+        with StubBookingService() as stub:
+            results = dispatch(items, url=stub.url, concurrency=2)
+        self.assertEqual([r['booking_id'] for r in results], list(range(20)))
+        self.assertLessEqual(len(stub.connections), 2)
+
+        with StubBookingService(status=503) as stub:
+            results = dispatch(items[:1], url=stub.url, concurrency=1)
+        self.assertEqual(results[0]['error_code'], 503)
+
+    def test_deadline_stops_new_requests(self):
+        items = [(i, {'n': i}) for i in range(4)]
+        with StubBookingService(delay=0.3) as stub:
+            results = dispatch(items, url=stub.url, concurrency=1, deadline=0.2)
+        self.assertEqual(results[-1]['message'], 'Dispatch deadline exceeded')
+
+
+@skipUnless(dispatch_module.httpx, 'httpx is optional (requirements.txt)')
+class AsyncDispatchTests(TestCase):
+    async def test_dispatches_on_the_event_loop(self):
+        items = [(i, {'n': i}) for i in range(8)]
+        with StubBookingService(delay=0.2) as stub:
+            started = monotonic()
+            results = await adispatch(items, url=stub.url, concurrency=8)
+            elapsed = monotonic() - started
+            client = dispatch_module.get_async_client(8)
+        self.assertEqual([r['booking_id'] for r in results], list(range(8)))
+        self.assertEqual({r['status'] for r in results}, {'pending'})
+        self.assertEqual(len(stub.received), 8)
+        self.assertIsInstance(client, dispatch_module.httpx.AsyncClient)
+        self.assertLess(elapsed, 1.0)
+        await client.aclose()
+
+    async def test_reports_errors_and_deadline(self):
+        with StubBookingService(status=503) as stub:
+            results = await adispatch([(1, {})], url=stub.url, concurrency=1)
+        self.assertEqual(results[0]['error_code'], 503)
+
+        with StubBookingService(delay=0.3) as stub:
+            results = await adispatch([(i, {}) for i in range(4)], url=stub.url, concurrency=1, deadline=0.2)
+        self.assertEqual(results[-1]['message'], 'Dispatch deadline exceeded')
+
+
+class OutboxTests(BookingTestMixin, TestCase):
+    def create(self, start, end, status='pending'):
+        return booking_engine.create_booking(
+            center=self.center, service=self.service, date=self.day,
+            start_time=start, end_time=end, customer_name='Test', status=status
+        )
+
+    def test_booking_and_outbox_written_together(self):
+        booking = self.create(time(9, 0), time(10, 0))
+        self.create(time(11, 0), time(12, 0), status='booked')
+        entry = BookingOutbox.objects.get()
+        self.assertEqual(entry.booking, booking)
+        self.assertEqual(entry.payload['center'], 'Main')
+
+    def test_worker_sends_each_booking_once(self):
+        self.create(time(9, 0), time(10, 0))
+        self.create(time(11, 0), time(12, 0))
+        with StubBookingService() as stub:
+            with self.settings(BOOKING_SERVICE_URL=stub.url):
+                call_command('process_outbox', once=True, stdout=StringIO())
+                call_command('process_outbox', once=True, stdout=StringIO())
+        self.assertEqual(len(stub.received), 2)
+        self.assertEqual(set(BookingOutbox.objects.values_list('status', flat=True)), {'sent'})
+
+    def test_failures_back_off_and_give_up(self):
+        self.create(time(9, 0), time(10, 0))
+        with StubBookingService(status=500) as stub:
+            claimed, sent = outbox.process_batch(url=stub.url, max_attempts=2)
+            self.assertEqual((claimed, sent), (1, 0))
+            entry = BookingOutbox.objects.get()
+            self.assertEqual((entry.status, entry.attempts), ('pending', 1))
+            self.assertGreater(entry.next_attempt_at, timezone.now())
+            # Not due yet, so nothing is claimed
+            self.assertEqual(outbox.process_batch(url=stub.url), (0, 0))
+
+            BookingOutbox.objects.update(next_attempt_at=timezone.now())
+            outbox.process_batch(url=stub.url, max_attempts=2)
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('failed', 2))
+        self.assertEqual(outbox.backoff(1).total_seconds(), 30)
+        self.assertEqual(outbox.backoff(3).total_seconds(), 120)
+
+    def test_leased_rows_are_not_claimed_twice(self):
+        self.create(time(9, 0), time(10, 0))
+        self.assertEqual(len(outbox.claim_batch()), 1)
+        self.assertEqual(outbox.claim_batch(), [])
+
+    def test_expired_lease_results_are_not_recorded(self):
+        self.create(time(9, 0), time(10, 0))
+        stale = outbox.claim_batch(lease_seconds=300)
+        BookingOutbox.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        current = outbox.claim_batch(lease_seconds=300)
+        self.assertEqual(len(current), 1)
+
+        with self.assertLogs('Appoinments.outbox', 'WARNING'):
+            self.assertEqual(outbox.record_results(stale, [{'status': 'pending'}]), 0)
+            outbox.record_results(stale, [{'status': 'error', 'message': 'late'}])
+        entry = BookingOutbox.objects.get()
+        self.assertEqual((entry.status, entry.attempts, entry.lease_token), ('pending', 0, current[0].lease_token))
+        self.assertEqual(outbox.record_results(current, [{'status': 'pending'}]), 1)
+        self.assertEqual(BookingOutbox.objects.get().status, 'sent')
+
+
+class ExportTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for hour in range(9, 14):
+            self.book(time(hour, 0), time(hour + 1, 0), status='pending' if hour % 2 else 'booked')
+
+    def test_ndjson_stream_in_keyset_chunks(self):
+        rows = export.iter_rows(export.filter_bookings(), chunk_size=2)
+        with self.assertNumQueries(3):
+            lines = list(export.ndjson_lines(rows))
+        self.assertEqual(len(lines), 5)
+        first = json.loads(lines[0])
+        self.assertEqual((first['center'], first['service'], first['start_time']), ('Main', 'Oil change', '09:00:00'))
+
+    def test_endpoint_filters_and_csv(self):
+        response = self.client.get('/api/bookings/export/', {'status': 'pending'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+
+        response = self.client.get('/api/bookings/export/', {'format': 'csv'})
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], export.EXPORT_COLUMNS)
+        self.assertEqual(len(rows), 6)
+
+        self.assertEqual(self.client.get('/api/bookings/export/', {'format': 'xml'}).status_code, 400)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command('export_bookings', format='csv', status='booked', stdout=out, stderr=StringIO())
+        self.assertEqual(len(out.getvalue().splitlines()), 3)  # header + 2 booked
+
+
+class ArchiveTests(BookingTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Booking.objects.bulk_create([
+            Booking(center=cls.center, service=cls.service, date=cls.day + timedelta(days=offset),
+                    start_time=time(hour, 0), end_time=time(hour + 1, 0), customer_name='Old',
+                    customer_id='C1', status='booked')
+            for offset in range(4) for hour in (9, 13)
+        ])
+        pending = Booking.objects.get(date=cls.day, start_time=time(9, 0))
+        outbox.enqueue(pending)
+
+    def test_batches_move_rows_and_resume(self):
+        cutoff = self.day + timedelta(days=2)
+        out = StringIO()
+        call_command('archive_bookings', '--before', str(cutoff), '--batch-size', '2', '--max-batches', '1',
+                     stdout=out)
+        self.assertIn('run again to continue', out.getvalue())
+        self.assertEqual(BookingArchive.objects.count(), 2)
+
+        call_command('archive_bookings', '--before', str(cutoff), '--batch-size', '2', stdout=out)
+        # The booking still queued in the outbox stays hot until it has been sent
+        self.assertEqual(BookingArchive.objects.count(), 3)
+        self.assertEqual(Booking.objects.filter(date__lt=cutoff).count(), 1)
+        self.assertEqual(archive.archive_batch(cutoff), 0)
+        archived = BookingArchive.objects.order_by('id').first()
+        self.assertEqual((archived.customer_name, archived.status), ('Old', 'booked'))
+
+    def test_id_collision_keeps_the_booking(self):
+        victim = Booking.objects.filter(date=self.day + timedelta(days=1)).order_by('id').first()
+        BookingArchive.objects.create(
+            id=victim.id, center=self.center, service=self.service, date=self.day, start_time=time(9, 0),
+            end_time=time(10, 0), customer_name='Other', created_at=timezone.now()
+        )
+        with self.assertRaisesMessage(CommandError, 'rolled back'):
+            call_command('archive_bookings', '--before', str(self.day + timedelta(days=2)), stdout=StringIO())
+        self.assertTrue(Booking.objects.filter(id=victim.id).exists())
+        self.assertEqual(BookingArchive.objects.get(id=victim.id).customer_name, 'Other')
+
+    def test_listing_and_export_read_both_tables(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive_batch(self.day + timedelta(days=2))
+        body = self.client.get('/api/bookings/', {'limit': 100}).json()
+        self.assertEqual(len(body['results']), 8)
+        self.assertEqual(len(self.client.get('/api/bookings/', {'include_archived': 'false'}).json()['results']), 5)
+        # No per-booking summary refresh was queued for the archived days
+        self.assertFalse(DayAvailability.objects.exists())
+
+        ids = [row[0] for row in export.iter_all_rows()]
+        self.assertEqual(ids, sorted(
+            list(Booking.objects.values_list('id', flat=True))
+            + list(BookingArchive.objects.values_list('id', flat=True))
+        ))
+        self.assertEqual(len(ids), 8)
+        self.assertEqual(len(list(export.iter_all_rows(include_archived=False))), 5)
+
+
+class ImportTests(BookingTestMixin, TestCase):
+    def write(self, name, text):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = Path(directory) / name
+        path.write_text(text)
+        return str(path)
+
+    def row(self, start, end, **extra):
+        return dict({
+            'center_id': self.center.id, 'service_id': self.service.id, 'date': self.day.isoformat(),
+            'start_time': start, 'end_time': end, 'customer_name': 'Legacy', 'status': 'booked',
+        }, **extra)
+
+    def test_ndjson_bookings_in_batches_with_row_errors(self):
+        rows = [self.row(f'{hour}:00', f'{hour + 1}:00') for hour in (9, 11, 13)] + [
+            self.row('15:00', '15:30'),                     # wrong duration
+            self.row('16:00', '17:00', center_id=999),
+            self.row('16:00', '17:00', status='unknown'),
+        ]
+        path = self.write('bookings.ndjson', '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n')
+        availability_cache.get_cached_slots(self.center, self.day, 60)
+        out, err = StringIO(), StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_data', 'bookings', path, '--batch-size', '2', stdout=out, stderr=err)
+        self.assertIn('Imported 3 of 7 bookings', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertIn('line 4: Duration must match service duration.', err.getvalue())
+        self.assertIn('line 7: Not a JSON object.', err.getvalue())
+        self.assertEqual(Booking.objects.filter(customer_name='Legacy').count(), 3)
+        # Lookups are loaded once, not per row
+        self.assertEqual(sum('"Appoinments_service"' in query['sql'] for query in queries.captured_queries), 1)
+        # bulk_create sends no signals, so the import drops the cached slots itself
+        slots = availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.assertNotIn(time(9, 0), [slot['start_time'] for slot in slots])
+
+    def test_export_output_round_trips_as_csv(self):
+        self.book(time(9, 0), time(10, 0))
+        self.book(time(11, 0), time(12, 0), status='pending')
+        exported = ''.join(export.csv_lines(export.iter_rows(export.filter_bookings())))
+        Booking.objects.all().delete()
+        stats = importer.import_records('bookings', importer.read_records(StringIO(exported), 'csv'))
+        self.assertEqual((stats['inserted'], stats['error_count']), (2, 0))
+        self.assertEqual(list(Booking.objects.order_by('start_time').values_list('status', flat=True)),
+                         ['booked', 'pending'])
+
+        # Rows clashing with existing bookings are rejected unless they are exact copies being skipped
+        stats = importer.import_records('bookings', importer.read_records(StringIO(exported), 'csv'))
+        self.assertEqual((stats['inserted'], stats['error_count']), (0, 2))
+        Booking.objects.filter(status='pending').delete()
+        stats = importer.import_records('bookings', importer.read_records(StringIO(exported), 'csv'),
+                                        skip_duplicates=True)
+        self.assertEqual((stats['inserted'], stats['skipped'], stats['error_count']), (1, 1, 0))
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_schedule_and_archived_ids_are_checked(self):
+        self.book(time(9, 0), time(10, 0), status='pending')
+        archived = BookingArchive.objects.create(
+            id=500, center=self.center, service=self.service, date=self.day, start_time=time(15, 0),
+            end_time=time(16, 0), customer_name='Old', created_at=timezone.now()
+        )
+        rows = [
+            self.row('09:30', '10:30'),                 # overlaps the existing booking
+            self.row('10:10', '11:10'),                 # inside its buffer
+            self.row('13:00', '14:00'),
+            self.row('13:30', '14:30'),                 # overlaps the row above
+            self.row('15:00', '16:00', id=archived.id),
+        ]
+        stats = importer.import_records('bookings', ((n, row) for n, row in enumerate(rows, 1)))
+        self.assertEqual(stats['inserted'], 1)
+        self.assertEqual([message for _, message in sorted(stats['errors'])], [
+            'Slot overlaps with existing booking.', 'Too close to previous booking.',
+            'Slot overlaps with existing booking.', f'Booking {archived.id} is archived; '
+            'import the hot rows only (export --hot-only).',
+        ])
+        self.assertFalse(Booking.objects.filter(id=archived.id).exists())
+
+    def test_rows_the_api_accepts_are_imported(self):
+        self.book(time(9, 0), time(10, 0), status='booked')
+        payload = self.row('09:30', '10:30')
+        del payload['status']
+        response = self.client.post('/api/bookings/', payload)
+        self.assertEqual(response.status_code, 201)
+        exported = ''.join(export.csv_lines(export.iter_rows(export.filter_bookings())))
+        Booking.objects.filter(id=response.json()['id']).delete()
+        stats = importer.import_records('bookings', importer.read_records(StringIO(exported), 'csv'),
+                                        skip_duplicates=True)
+        self.assertEqual((stats['inserted'], stats['skipped'], stats['error_count']), (1, 1, 0))
+
+    def test_only_touched_day_summaries_are_dropped(self):
+        later = self.day + timedelta(days=1)
+        for day in (self.day, later):
+            day_summary.refresh_day(self.center.id, day)
+        importer.import_records('bookings', [(1, self.row('13:00', '14:00'))])
+        self.assertEqual(list(DayAvailability.objects.values_list('date', flat=True).distinct()), [later])
+
+    def test_centers_and_services_csv(self):
+        path = self.write('centers.csv', 'name,location,latitude,longitude\nNorth,Kandy,7.29,80.63\n,Galle,,\n')
+        call_command('import_data', 'centers', path, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Center.objects.get(name='North').latitude, 7.29)
+        self.assertEqual(Center.objects.count(), 2)
+
+        stats = importer.import_records('services', importer.read_records(StringIO(
+            'name,category,duration_minutes,price\nWash,service,30,9.50\nPaint,other,30,1\nTint,service,30,x\n'
+        ), 'csv'), dry_run=True)
+        self.assertEqual((stats['read'], stats['inserted'], stats['error_count']), (3, 0, 2))
+        self.assertFalse(Service.objects.filter(name='Wash').exists())
+
+
+class BulkBookingTests(BookingTestMixin, TestCase):
+    def item(self, start, end, day=None, center=None):
+        return {
+            'center_id': (center or self.center).id,
+            'service_id': self.service.id,
+            'date': (day or self.day).isoformat(),
+            'start_time': start,
+            'end_time': end,
+            'customer_name': 'Fleet',
+        }
+
+    def post(self, items):
+        return self.client.post('/api/bookings/bulk/', {'bookings': items}, content_type='application/json')
+
+    def test_conflicts_within_batch_and_with_existing(self):
+        self.book(time(9, 0), time(10, 0), status='pending')
+        other = Center.objects.create(name='North', location='Kandy')
+        response = self.post([
+            self.item('12:00', '13:00'),                 # too close to the 11:00 item
+            self.item('09:30', '10:30'),                 # overlaps existing
+            self.item('11:00', '12:00'),
+            self.item('13:15', '14:15'),
+            self.item('09:00', '10:00', center=other),
+            self.item('09:00', '09:30'),                 # wrong duration
+        ])
+        self.assertEqual(response.status_code, 207)
+        statuses = [result['status'] for result in response.json()['results']]
+        # Each day is swept in start order, so the 11:00 item wins over 12:00
+        self.assertEqual(statuses, ['error', 'error', 'created', 'created', 'created', 'error'])
+        errors = response.json()['results'][0]['errors']['non_field_errors']
+        self.assertEqual(errors, ['Too close to previous booking.'])
+        self.assertEqual(BookingOutbox.objects.count(), 3)
+
+    def test_query_count_independent_of_batch_size(self):
+        days = [self.day + timedelta(days=offset) for offset in range(2)]
+        small = [self.item('09:00', '10:00', day=day) for day in days]
+        large = [self.item(f'{hour}:00', f'{hour + 1}:00', day=day)
+                 for day in [d + timedelta(days=7) for d in days] for hour in (9, 11, 13, 15)]
+        with CaptureQueriesContext(connection) as small_queries:
+            self.assertEqual(self.post(small).status_code, 201)
+        with CaptureQueriesContext(connection) as large_queries:
+            self.assertEqual(self.post(large).status_code, 201)
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertEqual(Booking.objects.count(), 10)
+
+    def test_invalidates_cached_slots(self):
+        availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.post([dict(self.item('09:00', '10:00'), status='booked')])
+        slots = availability_cache.get_cached_slots(self.center, self.day, 60)
+        self.assertEqual(slots[0]['start_time'], time(10, 0))
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_run_small(self):
+        dataset = benchmarks.seed(centers=2, services=2, months=2, bookings_per_day=3, force=True)
+        self.assertEqual(Center.objects.count(), 2)
+        self.assertEqual(Booking.objects.count(), dataset['bookings'])
+
+        results = benchmarks.run_scenarios(iterations=3, send_iterations=1)
+        self.assertEqual(results['availability_cold']['iterations'], 3)
+        self.assertEqual(results['suggest_alternative_dates']['queries_max'], 1)
+        self.assertGreater(results['send_booking']['pending_bookings'], 0)
+
+    def test_refuses_other_databases(self):
+        Center.objects.create(name='Keep', location='Colombo')
+        with self.assertRaises(RuntimeError):
+            benchmarks.seed(centers=1, services=1, months=1)
+        with self.assertRaisesMessage(CommandError, 'settings_bench'):
+            call_command('benchmark', '--skip-seed', stdout=StringIO())
+        self.assertTrue(Center.objects.filter(name='Keep').exists())
+        with mock.patch.dict(settings.DATABASES['default'], NAME=settings.BASE_DIR / 'bench.sqlite3'):
+            self.assertTrue(benchmarks.is_bench_database())
+
+    def test_compare_flags_regressions(self):
+        baseline = {'booking_post': {'p50_ms': 10.0, 'p95_ms': 20.0, 'queries_mean': 8.0}}
+        current = {'booking_post': {'p50_ms': 13.0, 'p95_ms': 21.0, 'queries_mean': 8.0}}
+        flagged = [row[1] for row in benchmarks.compare(current, baseline) if row[-1]]
+        self.assertEqual(flagged, ['p50_ms'])
+
+
+class MetricsTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def test_requests_recorded_per_url_name(self):
+        self.client.get(f'/api/availability/{self.center.id}/2030-01-07/{self.service.id}/')
+        self.client.get('/api/centers/')
+        body = self.client.get('/api/metrics').content.decode()
+        self.assertIn('booking_http_requests_total{view="availability",status="200"} 1', body)
+        self.assertIn('booking_http_requests_total{view="centers",status="200"} 1', body)
+        self.assertIn('booking_http_request_duration_seconds_count{view="availability"} 1', body)
+        self.assertIn('booking_db_queries_per_request_sum{view="centers"} 1', body)
+        self.assertIn('booking_availability_cache_hit_ratio', body)
+
+    async def test_sync_views_keep_query_metrics_under_asgi(self):
+        await self.async_client.get('/api/centers/')
+        body = registry.render()
+        self.assertIn('booking_http_requests_total{view="centers",status="200"} 1', body)
+        self.assertIn('booking_db_queries_per_request_sum{view="centers"} 1', body)
+
+    def test_downstream_calls_recorded(self):
+        with StubBookingService(status=503) as stub:
+            dispatch([(1, {})], url=stub.url)
+        host = stub.url.split('/')[2]
+        self.assertIn(
+            f'booking_downstream_request_duration_seconds_count{{host="{host}",outcome="503"}} 1',
+            registry.render()
+        )
+
+    def test_sampled_logging(self):
+        with self.settings(BOOKING_LOG_SAMPLE_RATE=1), self.assertLogs('Appoinments.requests') as logs:
+            self.assertTrue(log_sampled('booking.created', booking_id=7))
+        self.assertEqual(logs.records[0].fields, {'booking_id': 7})
+        with self.settings(BOOKING_LOG_SAMPLE_RATE=0):
+            self.assertFalse(log_sampled('booking.created', booking_id=7))
+
+
+class ProfilingTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def profiled(self, **overrides):
+        options = dict(PROFILING_TOKEN='secret', PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0)
+        options.update(overrides)
+        return self.settings(**options)
+
+    def test_header_triggers_capture_with_sql_trace(self):
+        url = f'/api/availability/{self.center.id}/2030-01-07/{self.service.id}/'
+        with self.profiled():
+            self.client.get(url, HTTP_X_PROFILE='secret')  # cold cache: slots computed
+            self.client.get(url, HTTP_X_PROFILE='wrong')
+            self.client.get(url)
+        captures = profiling.list_profiles(self.directory)
+        self.assertEqual(len(captures), 1)
+        stem, meta = captures[0]
+        self.assertEqual(meta['view'], 'availability')
+        self.assertEqual(meta['sql_count'], len(meta['sql']))
+        self.assertTrue((self.directory / f'{stem}.prof').exists())
+
+        out = StringIO()
+        with self.profiled():
+            call_command('profiles', stem, stdout=out)
+        self.assertIn('SQL by total time', out.getvalue())
+        # The saved profile covers the slot computation (keys are (file, line, function))
+        functions = {function for _, _, function in pstats.Stats(str(self.directory / f'{stem}.prof')).stats}
+        self.assertIn('get_free_intervals', functions)
+
+    def test_sampling_respects_views_and_retention(self):
+        with self.profiled(PROFILING_SAMPLE_RATE=1, PROFILING_MAX_FILES=2, PROFILING_VIEWS=['centers']):
+            for _ in range(3):
+                self.client.get('/api/centers/')
+            self.client.get('/api/services/')
+            out = StringIO()
+            call_command('profiles', stdout=out)
+        self.assertEqual(len(profiling.list_profiles(self.directory)), 2)
+        self.assertEqual(len(list(self.directory.glob('*.prof'))), 2)
+        self.assertIn('/api/centers/', out.getvalue())
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class BookingIndexTests(BookingTestMixin, TestCase):
+    """The hot Booking reads must be answered from booking_day_status_idx
+
+    MySQL shows the same plans (see the comments on Booking.Meta.indexes):
+    key=booking_day_status_idx with "Using index" for the occupancy reads and
+    key=booking_customer_idx for customer lookups.
+    """
+
+    def test_day_occupancy_read_is_index_only(self):
+        queryset = Booking.objects.filter(
+            center=self.center, date=self.day, status__in=('booked',)
+        ).values_list('start_time', 'end_time')
+        self.assertIn('COVERING INDEX booking_day_status_idx', queryset.explain())
+
+    def test_range_read_is_index_only(self):
+        queryset = Booking.objects.filter(
+            center=self.center, date__range=(self.day, self.day + timedelta(days=6)), status__in=('booked',)
+        ).values_list('date', 'start_time', 'end_time')
+        self.assertIn('COVERING INDEX booking_day_status_idx', queryset.explain())
+
+    def test_customer_lookup_uses_index(self):
+        self.assertIn('booking_customer_idx', Booking.objects.filter(customer_id='C42').explain())
+
+    def test_keyset_listing_avoids_a_sort(self):
+        cursor = (self.day, time(9, 0), 1)
+        for queryset in (Booking.objects.all(), Booking.objects.filter(center=self.center)):
+            plan = queryset.filter(pagination.after(cursor)).order_by(*pagination.ORDERING)[:50].explain()
+            self.assertNotIn('TEMP B-TREE', plan)
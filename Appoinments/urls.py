@@ -1,11 +1,23 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
+    path('availability/earliest/<int:service_id>/', views.EarliestSlotView.as_view(), name='availability_earliest'),
+    # Ahead of availability/<center>/<date>/<service>/, which would read 'heatmap' as a date
+    path('availability/<int:center_id>/heatmap/<int:service_id>/', views.AvailabilityHeatmapView.as_view(), name='availability_heatmap'),
     path('availability/<int:center_id>/<str:date>/<int:service_id>/', views.AvailabilityView.as_view(), name='availability'),
+    path('availability/<int:center_id>/', views.AvailabilityMatrixView.as_view(), name='availability_matrix'),
     path('bookings/', views.BookingView.as_view(), name='bookings'),
-    path('centers/', views.CenterListView.as_view()),
-    path('services/', views.ServiceListView.as_view()),
+    path('bookings/bulk/', views.BulkBookingView.as_view(), name='bulk_bookings'),
+    path('bookings/export/', views.export_bookings, name='export_bookings'),
+    path('centers/', views.CenterListView.as_view(), name='centers'),
+    path('centers/nearest/', views.NearestCenterView.as_view(), name='nearest_centers'),
+    path('services/', views.ServiceListView.as_view(), name='services'),
     path('sendbooking/', views.send_booking, name='send_booking'),
+    path('metrics', views.metrics, name='metrics'),
+    # Async variants; under ASGI they wait on the DB/cache/HTTP without holding a thread
+    path('async/availability/<int:center_id>/<str:date>/<int:service_id>/', async_views.availability, name='async_availability'),
+    path('async/sendbooking/', async_views.send_booking, name='async_send_booking'),
+    path('stream/availability/<int:center_id>/<str:date>/', async_views.availability_stream, name='availability_stream'),
 
 ]
\ No newline at end of file
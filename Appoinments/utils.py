@@ -1,8 +1,10 @@
 # utils.py (Helper functions for availability)
 from datetime import datetime, timedelta,time
 from .models import Booking, Center
+from .occupancy import DayOccupancy, minute_of_day
 from django.utils import timezone
 from . import utils
+from . import day_summary
 
 BUFFER_MINUTES = 15  # Cleanup buffer
 
@@ -33,65 +35,27 @@ def merge_intervals(intervals):
     merged.append((current_start, current_end))
     return merged
 
-def get_free_intervals(center, date, duration_minutes):
+def get_free_intervals(center, date, duration_minutes, occupancy=None):
     """Get ALL free intervals between bookings"""
     workday_start_time, workday_end_time = get_workday_start_end()
-    workday_start = timezone.datetime.combine(date, workday_start_time)
-    workday_end = timezone.datetime.combine(date, workday_end_time)
+    day_start = timezone.datetime.combine(date, time(0, 0))
 
-    # Get all bookings for the day
-    bookings = Booking.objects.filter(
-        center=center,
-        date=date,
-        status='booked'
-    ).order_by('start_time')
+    # One query builds the day's occupancy bitmap; gaps are read from its zero bits
+    if occupancy is None:
+        occupancy = DayOccupancy.for_day(center, date)
 
-    # If no bookings, entire day is free
-    if not bookings.exists():
-        max_start = workday_end - timedelta(minutes=duration_minutes)
-        return [(workday_start, max_start)]
+    return [
+        (day_start + timedelta(minutes=free_start), day_start + timedelta(minutes=max_start))
+        for free_start, max_start in occupancy.free_intervals(
+            duration_minutes,
+            minute_of_day(workday_start_time),
+            minute_of_day(workday_end_time)
+        )
+    ]
 
-    free_intervals = []
-    
-    # Check gap before first booking
-    first_booking_start = timezone.datetime.combine(date, bookings[0].start_time)
-    if first_booking_start > workday_start:
-        free_end = first_booking_start
-        free_duration = (free_end - workday_start).total_seconds() / 60
-        if free_duration >= duration_minutes:
-            max_start = free_end - timedelta(minutes=duration_minutes)
-            free_intervals.append((workday_start, max_start))
-
-    # Check gaps between bookings
-    for i in range(len(bookings) - 1):
-        current_booking_end = timezone.datetime.combine(date, bookings[i].end_time)
-        next_booking_start = timezone.datetime.combine(date, bookings[i + 1].start_time)
-        
-        # Free time between current booking end and next booking start
-        if current_booking_end < next_booking_start:
-            free_start = current_booking_end
-            free_end = next_booking_start
-            free_duration = (free_end - free_start).total_seconds() / 60
-            
-            if free_duration >= duration_minutes:
-                max_start = free_end - timedelta(minutes=duration_minutes)
-                free_intervals.append((free_start, max_start))
-
-    # Check gap after last booking
-    last_booking_end = timezone.datetime.combine(date, bookings.last().end_time)
-    if last_booking_end < workday_end:
-        free_start = last_booking_end
-        free_end = workday_end
-        free_duration = (free_end - free_start).total_seconds() / 60
-        if free_duration >= duration_minutes:
-            max_start = free_end - timedelta(minutes=duration_minutes)
-            free_intervals.append((free_start, max_start))
-
-    return free_intervals
-
-def get_possible_slots(center, date, duration_minutes):
+def get_possible_slots(center, date, duration_minutes, occupancy=None):
     """Generate slots with dynamic intervals based on service type"""
-    gaps = get_free_intervals(center, date, duration_minutes)
+    gaps = get_free_intervals(center, date, duration_minutes, occupancy)
     slots = []
     
     # Calculate optimal interval considering buffer and efficiency
@@ -166,19 +130,35 @@ def round_time(dt, round_to):
         else:
             return dt.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
 
-def suggest_alternative_dates(center, service, days_ahead=7):
+def get_availability_matrix(center, services, start_date, end_date):
+    """Slots for every (day, service) in [start_date, end_date] from one range query"""
+    occupancy_by_day = DayOccupancy.for_range(center, start_date, end_date)
+    days = []
+    for day, occupancy in occupancy_by_day.items():
+        days.append({
+            'date': day,
+            'services': {
+                service.id: get_possible_slots(center, day, service.duration_minutes, occupancy)
+                for service in services
+            }
+        })
+    return days
+
+def suggest_alternative_dates(center, service, days_ahead=30):
     """Suggest dates with availability"""
     today = timezone.now().date()
-    suggestions = []
-    for i in range(1, days_ahead + 1):
-        candidate_date = today + timedelta(days=i)
-        slots = get_possible_slots(center, candidate_date, service.duration_minutes)
-        if slots:
-            suggestions.append({
-                'date': candidate_date,
-                'num_slots': len(slots),
-                'earliest_start': slots[0]['start_time'] if slots else None
-            })
+    # One indexed read of the DayAvailability summary covers the whole look-ahead window
+    summaries = day_summary.get_summaries(
+        center, service.duration_minutes, today + timedelta(days=1), today + timedelta(days=days_ahead)
+    )
+    suggestions = [
+        {
+            'date': summary.date,
+            'num_slots': summary.num_slots,
+            'earliest_start': summary.earliest_start
+        }
+        for summary in summaries if summary.num_slots
+    ]
     # Sort by num_slots descending
     suggestions.sort(key=lambda x: x['num_slots'], reverse=True)
-    return suggestions[:3]  # Top 3
\ No newline at end of file
+    return suggestions[:3]  # Top 3
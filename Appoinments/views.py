@@ -4,23 +4,29 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from .models import Booking, Center, Service
-from .serializers import BookingSerializer,BookingResponseSerializer
-from .utils import get_possible_slots, suggest_alternative_dates
+from .models import Booking, BookingArchive, Center, Service
+from .serializers import BookingSerializer,BookingResponseSerializer, AvailabilityMatrixQuerySerializer, AvailabilityHeatmapQuerySerializer, EarliestSlotQuerySerializer, NearestCenterQuerySerializer, BookingListQuerySerializer
+from .utils import get_possible_slots, suggest_alternative_dates, get_availability_matrix
+from .availability_cache import get_cached_slots
+from . import booking_engine, day_summary, export, geo, idempotency, pagination, projections, reference_cache, slot_search
+from .renderers import FAST_RENDERERS
+from rest_framework import serializers
 from django.utils import timezone
-from rest_framework.generics import ListAPIView
-from .serializers import CenterSerializer, ServiceSerializer
+from .serializers import CenterSerializer, ServiceSerializer, ReferenceListQuerySerializer
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from .metrics import log_sampled
 
 
 class AvailabilityView(APIView):
+    renderer_classes = FAST_RENDERERS
+
     def get(self, request, center_id, date, service_id):
         center = get_object_or_404(Center, id=center_id)
         service = get_object_or_404(Service, id=service_id)
         date_obj = timezone.datetime.strptime(date, '%Y-%m-%d').date()
 
-        slots = get_possible_slots(center, date_obj, service.duration_minutes)
+        slots = get_cached_slots(center, date_obj, service.duration_minutes)
         
         if not slots:
             alternatives = suggest_alternative_dates(center, service)
@@ -35,8 +41,150 @@ class AvailabilityView(APIView):
             'slots': slots[:10]  # Limit to first 10 best-fit
         })
 
+class AvailabilityMatrixView(APIView):
+    """Availability for a center over a date range and several services at once"""
+    renderer_classes = FAST_RENDERERS
+
+    def get(self, request, center_id):
+        query = AvailabilityMatrixQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        center = get_object_or_404(Center, id=center_id)
+        service_ids = query.validated_data['service_ids']
+        services = list(Service.objects.filter(id__in=service_ids))
+        missing = set(service_ids) - {service.id for service in services}
+        if missing:
+            return Response({
+                'service_ids': [f"Unknown service id(s): {', '.join(map(str, sorted(missing)))}"]
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        days = get_availability_matrix(
+            center,
+            services,
+            query.validated_data['start_date'],
+            query.validated_data['end_date']
+        )
+        return Response({
+            'center_id': center.id,
+            'start_date': query.validated_data['start_date'],
+            'end_date': query.validated_data['end_date'],
+            'services': ServiceSerializer(services, many=True).data,
+            'days': [
+                {
+                    'date': day['date'],
+                    'services': {
+                        service_id: {
+                            'available': bool(slots),
+                            'slots': slots[:10]  # Same limit as AvailabilityView
+                        }
+                        for service_id, slots in day['services'].items()
+                    }
+                }
+                for day in days
+            ]
+        })
+
+class AvailabilityHeatmapView(APIView):
+    """Per-day slot counts for one service over up to 90 days, read from DayAvailability"""
+    renderer_classes = FAST_RENDERERS
+
+    def get(self, request, center_id, service_id):
+        query = AvailabilityHeatmapQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        center = get_object_or_404(Center, id=center_id)
+        service = get_object_or_404(Service, id=service_id)
+        start_date = query.validated_data.get('start_date') or timezone.now().date()
+        end_date = start_date + timezone.timedelta(days=query.validated_data['days'] - 1)
+
+        summaries = day_summary.get_summaries(center, service.duration_minutes, start_date, end_date)
+        return Response({
+            'center_id': center.id,
+            'service_id': service.id,
+            'start_date': start_date,
+            'end_date': end_date,
+            'days': [
+                {
+                    'date': summary.date,
+                    'num_slots': summary.num_slots,
+                    'free_minutes': summary.free_minutes,
+                    'earliest_start': summary.earliest_start
+                }
+                for summary in summaries
+            ]
+        })
+
+class EarliestSlotView(APIView):
+    """The k soonest slots for a service across all (or the given) centers"""
+    renderer_classes = FAST_RENDERERS
+
+    def get(self, request, service_id):
+        query = EarliestSlotQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        service = get_object_or_404(Service, id=service_id)
+        center_ids = query.validated_data.get('centers')
+        centers = Center.objects.only('id', 'name')
+        if center_ids:
+            centers = list(centers.filter(id__in=center_ids))
+            missing = set(center_ids) - {center.id for center in centers}
+            if missing:
+                return Response({
+                    'centers': [f"Unknown center id(s): {', '.join(map(str, sorted(missing)))}"]
+                }, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            centers = list(centers)
+
+        return Response({
+            'service_id': service.id,
+            'results': slot_search.search(
+                centers,
+                service,
+                k=query.validated_data['k'],
+                days=query.validated_data['days'],
+                start_date=query.validated_data.get('start_date')
+            )
+        })
+
 class BookingView(APIView):
+    renderer_classes = FAST_RENDERERS
+
+    def get(self, request):
+        """Bookings in (date, start_time, id) order, one keyset page per request"""
+        query = BookingListQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        models = [Booking, BookingArchive] if params['include_archived'] else [Booking]
+        querysets = [
+            # Joined values() rows shaped like BookingSerializer output, no model instances
+            projections.booking_rows(export.filter_bookings(
+                model.objects.all(),
+                status=params.get('status'),
+                center_id=params.get('center_id'),
+                date_from=params.get('date_from'),
+                date_to=params.get('date_to'),
+                customer_id=params.get('customer_id')
+            ))
+            for model in models
+        ]
+        rows, next_cursor = pagination.keyset_page_across(
+            querysets, params.get('cursor'), params['limit'], key=projections.booking_key
+        )
+        return Response({
+            'results': [projections.booking_dict(row) for row in rows],
+            'next_cursor': next_cursor
+        })
+
     def post(self, request):
+        # Retries carrying the same Idempotency-Key get the first 201 back
+        return idempotency.run(request, lambda: self.create(request))
+
+    def create(self, request):
         serializer = BookingSerializer(data=request.data)
         if serializer.is_valid():
 
@@ -45,100 +193,189 @@ class BookingView(APIView):
             
             # 1. Fetch vehicle details from external service
             vehicle_name = request.data.get("vehicle_name")
-            print("DEBUG: Received customer_id:", customer_id)
-            print("DEBUG: Received vehicle_name:", vehicle_name)
-            print("DEBUG: Full request data:", request.data)
 
-            
-
-
-            # Get the objects
-            center = Center.objects.get(id=request.data.get('center_id'))
-            service = Service.objects.get(id=request.data.get('service_id'))
-            
-            # Create booking with actual objects
-            booking = Booking.objects.create(
-                center=center,
-                service=service,
-                date=serializer.validated_data['date'],
-                start_time=serializer.validated_data['start_time'],
-                end_time=serializer.validated_data['end_time'],
-                customer_name=serializer.validated_data['customer_name'],
-                vehicle_name=vehicle_name,
-                status=serializer.validated_data.get('status', 'pending')
-            )
+            # Center/Service were resolved by BookingSerializer.validate; the
+            # engine checks the slot against the day's bookings while holding
+            # the (center, date) lock so parallel requests cannot both take it
+            data = serializer.validated_data
+            try:
+                booking = booking_engine.create_booking(
+                    center=data['center'],
+                    service=data['service'],
+                    date=data['date'],
+                    start_time=data['start_time'],
+                    end_time=data['end_time'],
+                    customer_name=data['customer_name'],
+                    customer_id=customer_id,
+                    vehicle_name=vehicle_name,
+                    status=data.get('status', 'pending')
+                )
+            except serializers.ValidationError as exc:
+                log_sampled('booking.rejected', center_id=data['center'].id, date=data['date'],
+                            start_time=data['start_time'], errors=exc.detail)
+                return Response({'non_field_errors': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+            log_sampled('booking.created', booking_id=booking.id, center_id=booking.center_id,
+                        service_id=booking.service_id, date=booking.date, start_time=booking.start_time,
+                        has_customer_id=bool(customer_id), has_vehicle=bool(vehicle_name))
             return Response(BookingSerializer(booking).data, status=status.HTTP_201_CREATED)
+        log_sampled('booking.invalid', fields=sorted(serializer.errors))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-class CenterListView(ListAPIView):
-    queryset = Center.objects.all()
+class BulkBookingView(APIView):
+    """Create up to MAX_ITEMS bookings in one request with per-item results"""
+
+    MAX_ITEMS = 500
+
+    def post(self, request):
+        items = request.data.get('bookings') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'bookings': ['Expected a non-empty list of bookings.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.MAX_ITEMS:
+            return Response({'bookings': [f'At most {self.MAX_ITEMS} bookings per request.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Two queries resolve every center and service in the batch
+        context = {
+            'centers': Center.objects.in_bulk(_int_values(items, 'center_id')),
+            'services': Service.objects.in_bulk(_int_values(items, 'service_id')),
+        }
+
+        results = [None] * len(items)
+        valid_indexes, valid_items = [], []
+        for index, item in enumerate(items):
+            serializer = BookingSerializer(data=item, context=context)
+            if serializer.is_valid():
+                valid_indexes.append(index)
+                valid_items.append(serializer.validated_data)
+            else:
+                results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+        for index, outcome in zip(valid_indexes, booking_engine.create_bookings(valid_items)):
+            if isinstance(outcome, Booking):
+                results[index] = {'index': index, 'status': 'created', 'booking': BookingSerializer(outcome).data}
+            else:
+                results[index] = {'index': index, 'status': 'error', 'errors': {'non_field_errors': outcome}}
+
+        created = sum(1 for result in results if result['status'] == 'created')
+        return Response(
+            {'created': created, 'failed': len(results) - created, 'results': results},
+            status=status.HTTP_201_CREATED if created == len(results) else status.HTTP_207_MULTI_STATUS
+        )
+
+def _int_values(items, key):
+    values = set()
+    for item in items:
+        try:
+            values.add(int(item.get(key)))
+        except (AttributeError, TypeError, ValueError):
+            pass  # Reported per item by the serializer
+    return values
+
+class ReferenceListView(APIView):
+    """List served from reference_cache with ETag/Last-Modified; optional fields, limit and offset"""
+    kind = None
+    queryset = None
+    serializer_class = None
+    renderer_classes = FAST_RENDERERS
+
+    def get(self, request):
+        query = ReferenceListQuerySerializer(
+            data=request.query_params, context={'fields': self.serializer_class.Meta.fields}
+        )
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        token, last_modified = reference_cache.current_version(self.kind)
+        tag = reference_cache.etag(token, (params.get('fields'), params.get('limit'), params.get('offset')))
+        headers = reference_cache.validator_headers(tag, last_modified)
+        if reference_cache.not_modified(request, tag, last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        items = reference_cache.get_items(self.kind, token, self.load)
+        if 'fields' in params:
+            items = [{field: item[field] for field in params['fields']} for item in items]
+        if 'limit' in params or 'offset' in params:
+            offset = params.get('offset', 0)
+            end = offset + params['limit'] if 'limit' in params else None
+            return Response({'count': len(items), 'results': items[offset:end]}, headers=headers)
+        return Response(items, headers=headers)
+
+    def load(self):
+        return [dict(item) for item in self.serializer_class(self.queryset.all(), many=True).data]
+
+class CenterListView(ReferenceListView):
+    kind = 'centers'
+    queryset = Center.objects.order_by('id')
     serializer_class = CenterSerializer
 
-class ServiceListView(ListAPIView):
-    queryset = Service.objects.all()
+class NearestCenterView(APIView):
+    """The M centers closest to a point, optionally only those with a free slot on a date"""
+
+    def get(self, request):
+        query = NearestCenterQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        params = query.validated_data
+        service = None
+        if 'service_id' in params:
+            service = get_object_or_404(Service, id=params['service_id'])
+
+        matches = geo.nearest(
+            params['lat'], params['lon'], params['m'],
+            max_km=params.get('max_km'),
+            duration_minutes=service.duration_minutes if service else None,
+            date=params.get('date')
+        )
+        centers = Center.objects.in_bulk([center_id for _, center_id, _ in matches])
+        results = []
+        for distance, center_id, slots in matches:
+            if center_id not in centers:  # Deleted since the index was built
+                continue
+            result = CenterSerializer(centers[center_id]).data
+            result['distance_km'] = round(distance, 3)
+            if slots is not None:
+                result['num_slots'] = len(slots)
+                result['earliest_start'] = slots[0]['start_time']
+            results.append(result)
+        return Response({'results': results})
+
+class ServiceListView(ReferenceListView):
+    kind = 'services'
+    queryset = Service.objects.order_by('id')
     serializer_class = ServiceSerializer
 
 from django.shortcuts import get_object_or_404
 from .models import Booking
 from .serializers import BookingSerializer
-import requests
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from .metrics import registry
+from . import export, outbox
+from .serializers import BookingExportQuerySerializer
 
 @csrf_exempt
 def send_booking(request):
+    """Deliver the due outbox rows now, as process_outbox would
+
+    Each booking goes out once: this shares the outbox (leases, sent marks,
+    retries) with process_outbox instead of re-posting every pending booking.
+    Pending bookings without an outbox row (older or imported) are queued first.
+    """
     try:
-        # 1. Get all bookings with pending status
-        pending_bookings = Booking.objects.filter(status="pending")
+        outbox.enqueue_missing()
+        results, _ = outbox.deliver_batch(batch_size=outbox.SEND_NOW_BATCH_SIZE)
 
-        if not pending_bookings.exists():
+        if not results:
             return JsonResponse({
                 "status": "empty",
-                "message": "No pending bookings found"
+                "message": "No bookings waiting to be sent"
             }, status=200)
 
-        microservice_url = "https://httpbin.org/post"
-        results = []
-
-        # 2. Loop through each pending booking
-        for booking in pending_bookings:
-            serializer = BookingResponseSerializer(booking)
-            data = serializer.to_dict()
-
-            try:
-                response = requests.post(
-                    microservice_url,
-                    json=data,
-                    timeout=30
-                )
-
-                # 3. Process response
-                if response.status_code in [200, 201]:
-                    results.append({
-                        "booking_id": booking.id,
-                        "status": "pending",
-                        "response": response.json()
-                    })
-
-
-                else:
-                    results.append({
-                        "booking_id": booking.id,
-                        "status": "error",
-                        "error_code": response.status_code,
-                        "details": response.text
-                    })
-
-            except requests.exceptions.RequestException as e:
-                results.append({
-                    "booking_id": booking.id,
-                    "status": "error",
-                    "message": str(e)
-                })
-
-        # 4. Return batch results
         return JsonResponse({
             "status": "completed",
-            "message": "Processed all pending bookings",
+            "message": "Processed the bookings waiting to be sent",
             "results": results
         })
 
@@ -148,3 +385,26 @@ def send_booking(request):
             "message": "Internal server error",
             "details": str(e)
         }, status=500)
+
+
+def export_bookings(request):
+    """Stream bookings as NDJSON (default) or CSV without loading them all"""
+    query = BookingExportQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return JsonResponse(query.errors, status=400)
+
+    options = dict(query.validated_data)
+    export_format = options.pop('format')
+    rows = export.iter_all_rows(**options)
+
+    if export_format == 'csv':
+        response = StreamingHttpResponse(export.csv_lines(rows), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="bookings.csv"'
+    else:
+        response = StreamingHttpResponse(export.ndjson_lines(rows), content_type='application/x-ndjson')
+    return response
+
+
+def metrics(request):
+    """Prometheus text exposition of this process's request, DB, cache and downstream metrics"""
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,12 +53,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Appoinments.middleware.MetricsMiddleware',
+    'Appoinments.middleware.ProfilingMiddleware',
+    'Appoinments.middleware.ReplicaRoutingMiddleware',
 ]
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # your React app
 ]
 #CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 ROOT_URLCONF = 'Book_Appoinment.urls'
 
@@ -100,8 +106,102 @@ DATABASES = {
             'charset': 'utf8mb4',
         }
     }
+    # Read replicas are extra aliases with the same settings pointed at the
+    # replica host, e.g. 'replica1': {..., 'HOST': 'db-replica-1'}
+}
+
+# Read-only requests (DATABASE_REPLICA_VIEWS) read from a replica picked by
+# weight; writes and reads inside a transaction always use 'default'.
+# See Appoinments/routers.py.
+
+DATABASE_ROUTERS = ['Appoinments.routers.ReplicaRouter']
+DATABASE_REPLICAS = {}                   # alias -> weight, e.g. {'replica1': 2, 'replica2': 1}
+DATABASE_REPLICA_RETRY_SECONDS = 30      # how long a replica that failed to connect is skipped
+DATABASE_REPLICA_PIN_SECONDS = 5         # a client reads from 'default' this long after a write
+DATABASE_REPLICA_VIEWS = [
+    'availability', 'availability_matrix', 'availability_heatmap', 'availability_earliest',
+    'async_availability', 'centers', 'services', 'nearest_centers', 'export_bookings',
+]
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Point this at a shared backend (Redis/Memcached) when running several workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Slot lists served by AvailabilityView (see Appoinments/availability_cache.py)
+AVAILABILITY_CACHE_ALIAS = 'default'
+AVAILABILITY_CACHE_TIMEOUT = 300  # seconds
+
+# Booking microservice that /api/sendbooking/ delivers pending bookings to
+# (Appoinments/stub_service.py is a local stand-in for tests and benchmarks)
+BOOKING_SERVICE_URL = 'https://httpbin.org/post'
+BOOKING_DISPATCH_CONCURRENCY = 16  # max requests in flight / pooled connections
+BOOKING_DISPATCH_TIMEOUT = 10      # seconds per request
+BOOKING_DISPATCH_DEADLINE = 120    # seconds for the whole batch
+
+# /api/stream/availability/<center>/<date>/ pushes slot changes as server-sent
+# events (see Appoinments/live.py). LocalBroker only reaches streams in the same
+# process; with several workers use a broker class backed by shared pub/sub.
+
+AVAILABILITY_STREAM_BROKER = 'Appoinments.live.LocalBroker'
+AVAILABILITY_STREAM_QUEUE_SIZE = 100   # changes buffered per stream before it is sent a fresh snapshot
+AVAILABILITY_STREAM_HEARTBEAT = 15     # seconds between keepalive comments
+AVAILABILITY_STREAM_MAX_SECONDS = 300  # streams close after this; EventSource reconnects
+
+# POST /api/bookings/ with an Idempotency-Key header (see Appoinments/idempotency.py)
+# Use a cache shared by all workers, or retries landing elsewhere run again.
+
+IDEMPOTENCY_CACHE_ALIAS = 'default'
+IDEMPOTENCY_TTL = 24 * 3600      # seconds a created booking's response is replayed
+IDEMPOTENCY_LOCK_SECONDS = 30    # an in-flight request's claim on its key expires after this
+IDEMPOTENCY_WAIT_SECONDS = 5     # a duplicate waits this long for the first result, then gets 409
+
+# Logging
+# Booking requests are logged as key=value lines for a sampled fraction of calls
+
+BOOKING_LOG_SAMPLE_RATE = 0.01
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'plain',
+        },
+    },
+    'loggers': {
+        'Appoinments': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
 }
 
+# `manage.py archive_bookings` moves bookings older than this many days into
+# BookingArchive; listing and export read both tables
+
+BOOKING_ARCHIVE_AFTER_DAYS = 30
+
+# Per-request profiling (see Appoinments/profiling.py and `manage.py profiles`)
+# A request is captured when it sends `X-Profile: <PROFILING_TOKEN>` or is sampled.
+
+PROFILING_TOKEN = ''             # empty disables the header trigger
+PROFILING_SAMPLE_RATE = 0.0      # fraction of requests to capture
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_FILES = 200        # oldest captures are deleted beyond this
+PROFILING_VIEWS = ['availability', 'availability_matrix', 'bookings', 'bulk_bookings']
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,22 @@
+"""
+Settings override for the benchmark suite (SQLite, production-like DEBUG=False).
+
+    python manage.py migrate --settings=Book_Appoinment.settings_bench
+    python manage.py benchmark --settings=Book_Appoinment.settings_bench --output bench.json
+"""
+
+from .settings_test import *  # noqa: F401,F403
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'bench.sqlite3',
+        'OPTIONS': {
+            'timeout': 30,
+        },
+    }
+}
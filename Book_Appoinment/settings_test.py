@@ -0,0 +1,40 @@
+"""
+Settings override for running the test suite locally.
+
+settings.py hard-codes a MySQL server; tests run against SQLite instead:
+
+    python manage.py test --settings=Book_Appoinment.settings_test
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 30,
+        },
+        # A file (not in-memory) test database lets the concurrency tests
+        # open one real connection per thread
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # Second SQLite connection to the same file, standing in for a read
+    # replica; routing is off unless a test sets DATABASE_REPLICAS
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 30,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+DATABASE_REPLICAS = {}
+
+BOOKING_LOG_SAMPLE_RATE = 0